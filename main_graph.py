@@ -1,58 +1,87 @@
-from typing import TypedDict, Dict, Any
-from langgraph.graph import StateGraph, END
+import time
+import asyncio
+from typing import TypedDict, Dict, Any, Annotated
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from src.quant_engine.market_data import get_current_market_data
-from src.agents.strategist import analyze_strategy
+from src.agents.strategist import analyze_strategy, load_strategy_rules
 from src.agents.executor import execute_order
 from src.agents.risk_manager import validate_order
-from src.agents.market_researcher import perform_market_research
-from src.agents.position_monitor import monitor_positions
-from src.integration.yfinance_client import fetch_nifty_spot, fetch_india_vix
-from src.quant_engine.option_chain_builder import get_expiry_date
+from src.agents.market_researcher import aperform_market_research
+from src.agents.position_monitor import amonitor_positions
+from src.integration.market_snapshot import market_snapshot
+from src.data_ingestion.chain_book import get_chain_book
 from datetime import datetime
 
+def merge_timings(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    # Parallel branches each report their own node, so updates are merged
+    return {**(left or {}), **(right or {})}
+
 # Define the State
 class AgentState(TypedDict):
     market_data: Dict[str, Any]
     research_data: str # New field for web search
+    strategy_rules: Dict[str, str] # RAG rules/news, fetched up front
     strategy_decision: Dict[str, Any]
     final_order: Dict[str, Any]
     risk_status: str # New field for risk approval
+    risk_analysis: str # Risk manager's reasoning (LLM answer or hard-limit breaches)
+    risk_metrics: Dict[str, Any] # Portfolio Greeks / scenario loss from the risk engine
+    open_positions: list # Broker legs (type, strike, quantity, action) loaded by the monitor for portfolio risk
     adjustment_needed: bool # New field for monitor
     user_selected_strategy: str # New field for manual override
     error: str
+    node_timings: Annotated[Dict[str, float], merge_timings] # node -> wall time (ms)
 
-# Define Nodes
-# 1. Start Node: Market Scanner
-def market_scanner(state: Dict[str, Any]) -> Dict[str, Any]:
-    print("--- [Market Scanner] Checking Market Conditions ---")
-    
-    # Try fetching real spot & VIX
-    real_spot = fetch_nifty_spot()
-    real_vix = fetch_india_vix()
-    
+def market_data_from_book(book) -> Dict[str, Any]:
+    """Builds the scanner's market_data from a live streaming ChainBook snapshot."""
+    snap = book.snapshot()
+    expiry_date = snap["expiry"]
+    days_to_expiry = max((expiry_date - datetime.now()).days, 0) if expiry_date else None
+    return {
+        "symbol": snap["symbol"],
+        "spot_price": round(snap["spot_price"], 2),
+        "iv": round(snap["vix"], 2),
+        "days_to_expiry": days_to_expiry,
+        "expiry_date": expiry_date,
+        "option_chain": snap["chain"],
+        "data_source": "STREAM"
+    }
+
+def fetch_chain():
+    from src.integration.option_chain_client import fetch_option_chain
+    return fetch_option_chain()
+
+def stream_market_data():
+    """market_data from the live tick book when a ticker stream is feeding it, else None."""
+    book = get_chain_book("NIFTY")
+    if not book.is_fresh():
+        return None
+    market_data = market_data_from_book(book)
+    print(f"Market Data from stream: Spot={market_data['spot_price']}, IV={market_data['iv']}, DTE={market_data['days_to_expiry']}")
+    return market_data
+
+def build_market_data(real_spot, real_vix, chain_dict, chain_error: Exception = None) -> Dict[str, Any]:
+    """Assembles the scanner's market_data from fetched spot, VIX and option chain."""
     spot = real_spot if real_spot else 22000
     iv = real_vix if real_vix else 15
     
     print(f"Fetched Data: Spot={spot}, IV={iv} (VIX)")
     
-    # Fetch Option Chain
+    # Option Chain
     chain_data = {}
     expiry_date = None
     days_to_expiry = None
     
     try:
-        from src.integration.option_chain_client import fetch_option_chain
-        chain_dict = fetch_option_chain()
+        if chain_error:
+            raise chain_error
         
         # Convert dictionary format to DataFrame for compatibility
-        if chain_dict and 'chain' in chain_dict and len(chain_dict['chain']) > 0:
-            import pandas as pd
-            # Create DataFrame from chain data
-            chain_data = pd.DataFrame(chain_dict['chain'])
+        if chain_dict and chain_dict.get('chain') is not None and len(chain_dict['chain']) > 0:
+            # Chain is already a typed DataFrame (see option_chain_client.CHAIN_DTYPES)
+            chain_data = chain_dict['chain']
             
             # Parse expiry date from string format
             expiry_str = chain_dict.get('expiry')
@@ -157,74 +186,237 @@ def market_scanner(state: Dict[str, Any]) -> Dict[str, Any]:
     }
     
     print(f"Market Data fetched: Spot={spot}, IV={market_data['iv']}, DTE={market_data['days_to_expiry']}")
-    return {"market_data": market_data}
-
-def researcher_node(state: AgentState) -> AgentState:
-    result = perform_market_research(state)
-    return {"research_data": result["research_data"]}
+    return market_data
 
-def monitor_node(state: AgentState) -> AgentState:
-    # This runs in parallel or before strategy
-    result = monitor_positions(state)
-    return {"adjustment_needed": result["adjustment_needed"]}
+# Define Nodes
+# 1. Start Node: Market Scanner
+def market_scanner(state: Dict[str, Any]) -> Dict[str, Any]:
+    print("--- [Market Scanner] Checking Market Conditions ---")
+    
+    market_data = stream_market_data()
+    if market_data:
+        return {"market_data": market_data}
+    
+    # Spot & VIX come from one batched snapshot fetch (the chain fetch reuses it)
+    snapshot = market_snapshot.get()
+    real_spot, real_vix = snapshot["NIFTY"], snapshot["INDIA_VIX"]
+    
+    chain_dict, chain_error = None, None
+    try:
+        chain_dict = fetch_chain()
+    except Exception as e:
+        chain_error = e
+    return {"market_data": build_market_data(real_spot, real_vix, chain_dict, chain_error)}
 
-def strategy_lookup_node(state: AgentState) -> AgentState:
-    if state.get("error"): return state
+async def amarket_scanner(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Async Market Scanner: the quote snapshot and option chain are fetched concurrently."""
+    print("--- [Market Scanner] Checking Market Conditions ---")
     
-    # Enrich state with research before strategy
-    # Note: 'analyze_strategy' might need an update to use 'research_data' explicitly if we want
-    # but for now we trust it uses what's in 'state' if we updated the signature, 
-    # OR we just pass it along.
-    # ideally Strategist should see "research_data". 
-    # For now, we assume Strategist reads from state/context.
+    market_data = stream_market_data()
+    if market_data:
+        return {"market_data": market_data}
     
-    result = analyze_strategy(state)
+    # The chain fetch waits on the in-flight snapshot refresh instead of re-fetching spot
+    snapshot, chain_dict = await asyncio.gather(
+        asyncio.to_thread(market_snapshot.get),
+        asyncio.to_thread(fetch_chain),
+        return_exceptions=True
+    )
+    if isinstance(snapshot, Exception):
+        snapshot = {}
+    real_spot, real_vix = snapshot.get("NIFTY"), snapshot.get("INDIA_VIX")
+    chain_error = chain_dict if isinstance(chain_dict, Exception) else None
+    if chain_error:
+        chain_dict = None
+    return {"market_data": build_market_data(real_spot, real_vix, chain_dict, chain_error)}
+
+def timed(name: str, node):
+    """Wraps an async node so its wall time is reported in state['node_timings']."""
+    async def run(state: AgentState) -> AgentState:
+        start = time.perf_counter()
+        result = await node(state)
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        print(f"⏱️ [{name}] {elapsed_ms} ms")
+        return {**result, "node_timings": {name: elapsed_ms}}
+    return run
+
+async def researcher_node(state: AgentState) -> AgentState:
+    result = await aperform_market_research(state)
+    return {"research_data": result["research_data"]}
+
+async def rules_node(state: AgentState) -> AgentState:
+    # RAG lookup only depends on fixed topics, so it runs alongside the scanner
+    return {"strategy_rules": await asyncio.to_thread(load_strategy_rules)}
+
+async def monitor_node(state: AgentState) -> AgentState:
+    # Runs once both market data and research are available
+    result = await amonitor_positions(state)
+    update = {"adjustment_needed": result["adjustment_needed"]}
+    # Broker positions feed the risk manager's portfolio check (kept from the input state if unavailable)
+    if result.get("open_positions") is not None:
+        update["open_positions"] = result["open_positions"]
+    return update
+
+async def strategy_lookup_node(state: AgentState) -> AgentState:
+    if state.get("error"): return {}
+    result = await asyncio.to_thread(analyze_strategy, state)
     return {"strategy_decision": result["strategy_decision"]}
 
-def execution_node(state: AgentState) -> AgentState:
-    if state.get("error"): return state
-    result = execute_order(state)
+async def execution_node(state: AgentState) -> AgentState:
+    if state.get("error"): return {}
+    result = await asyncio.to_thread(execute_order, state)
     return {"final_order": result["final_order"]}
 
-def risk_node(state: AgentState) -> AgentState:
-    if state.get("error"): return state
-    result = validate_order(state)
+async def risk_node(state: AgentState) -> AgentState:
+    if state.get("error"): return {}
+    result = await asyncio.to_thread(validate_order, state)
     if result.get("error"):
         return {"error": result["error"]}
-    return {"risk_status": result["risk_status"]}
+    return {
+        "risk_status": result["risk_status"],
+        "risk_analysis": result.get("risk_analysis"),
+        "risk_metrics": result.get("risk_metrics"),
+    }
+
+# Build Graph (all nodes are coroutines: run with `await get_app().ainvoke(state)` or run_pipeline)
+def build_app():
+    """Compiles the agent graph. langgraph is imported here, not at module import."""
+    from langgraph.graph import StateGraph, START, END
+    workflow = StateGraph(AgentState)
+
+    workflow.add_node("market_scanner", timed("market_scanner", amarket_scanner))
+    workflow.add_node("market_researcher", timed("market_researcher", researcher_node))
+    workflow.add_node("strategy_rules", timed("strategy_rules", rules_node))
+    workflow.add_node("position_monitor", timed("position_monitor", monitor_node))
+    workflow.add_node("strategist", timed("strategist", strategy_lookup_node))
+    workflow.add_node("executor", timed("executor", execution_node))
+    workflow.add_node("risk_manager", timed("risk_manager", risk_node))
+
+    # Define Edges / Flow
+    # Independent I/O starts immediately: market data, web research and RAG rules
+    workflow.add_edge(START, "market_scanner")
+    workflow.add_edge(START, "market_researcher")
+    workflow.add_edge(START, "strategy_rules")
 
-# Build Graph
-workflow = StateGraph(AgentState)
+    # Monitor reads both market data and research_data
+    workflow.add_edge(["market_scanner", "market_researcher"], "position_monitor")
+    # Strategist needs market data and rules (not research) and runs alongside the monitor.
+    # LangGraph executes in supersteps, so it still starts only after the whole first step
+    # (including the researcher) has finished; the risk manager reads research_data anyway.
+    workflow.add_edge(["market_scanner", "strategy_rules"], "strategist")
 
-workflow.add_node("market_scanner", market_scanner)
-workflow.add_node("position_monitor", monitor_node)
-workflow.add_node("market_researcher", researcher_node)
-workflow.add_node("strategist", strategy_lookup_node)
-workflow.add_node("executor", execution_node)
-workflow.add_node("risk_manager", risk_node)
+    workflow.add_edge("strategist", "executor")
+    workflow.add_edge("executor", "risk_manager")
+    workflow.add_edge("risk_manager", END)
+    workflow.add_edge("position_monitor", END)
 
-# Define Edges / Flow
-workflow.set_entry_point("market_scanner")
+    return workflow.compile()
 
-# Parallelize Monitor and Research after Scanner
-workflow.add_edge("market_scanner", "position_monitor")
-workflow.add_edge("market_scanner", "market_researcher")
+_app = None
 
-# Re-converge to Strategist
-workflow.add_edge("position_monitor", "strategist")
-workflow.add_edge("market_researcher", "strategist")
+def get_app():
+    """The compiled graph, built once on first use and reused (e.g. across daemon cycles)."""
+    global _app
+    if _app is None:
+        _app = build_app()
+    return _app
 
-workflow.add_edge("strategist", "executor")
-workflow.add_edge("executor", "risk_manager")
-workflow.add_edge("risk_manager", END)
+def __getattr__(name):
+    # Backwards compatible `from main_graph import app`
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-app = workflow.compile()
+async def run_pipeline(initial_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs the graph and adds the end-to-end wall time to result['node_timings']['total']."""
+    start = time.perf_counter()
+    result = await get_app().ainvoke(initial_state)
+    timings = dict(result.get("node_timings") or {})
+    timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+    result["node_timings"] = timings
+    print("⏱️ Node timings (ms): " + ", ".join(f"{k}={v}" for k, v in timings.items()))
+    return result
+
+def warm_up():
+    """Builds the graph and loads the embedding model and vector store before the first cycle."""
+    from src.knowledge.vector_store import retrieval_service
+    start = time.perf_counter()
+    get_app()
+    retrieval_service.store
+    retrieval_service.embeddings.embed_query("warm-up")
+    print(f"🔥 Warm-up done in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+async def watch_spot_moves(scheduler, book, threshold_pct: float, poll_sec: float = 1.0):
+    """Triggers an out-of-cadence cycle when the streamed spot moves threshold_pct from the last trigger."""
+    reference = None
+    while True:
+        if book.is_fresh():
+            _, _, spot, _ = book.snapshot_arrays()
+            if reference is None:
+                reference = spot
+            elif reference and abs(spot - reference) / reference * 100 >= threshold_pct:
+                print(f"📈 Spot moved {reference} -> {spot}, triggering cycle")
+                scheduler.trigger("spot_move")
+                reference = spot
+        await scheduler.clock.sleep(poll_sec)
+
+async def run_daemon(initial_state: Dict[str, Any], interval_sec: float = 60.0,
+                     move_pct: float = None, max_cycles: int = None, clock=None, feed: str = None):
+    """
+    Long-running mode: the compiled graph, LLM clients and embedding model
+    stay warm across cycles. Cycles run every interval_sec (and on spot
+    moves >= move_pct); a cycle that would overlap a running one is skipped.
+    feed ('kite' or 'replay') starts a tick stream into the NIFTY chain book,
+    which the scanner then reads instead of polling. move_pct needs a feed
+    that is delivering ticks, otherwise the daemon refuses to start.
+    """
+    from src.runtime.scheduler import CycleScheduler
+    from src.integration.kite_ticker import ensure_chain_stream
+    await asyncio.to_thread(warm_up)
+
+    stream = await asyncio.to_thread(ensure_chain_stream, "NIFTY", feed) if feed else None
+    if stream is None and feed:
+        print(f"⚠️ {feed} tick feed unavailable, scanner falls back to polling")
+    if move_pct and (stream is None or not await asyncio.to_thread(stream.wait_fresh)):
+        raise RuntimeError(f"Spot-move triggers (move_pct={move_pct}) need a tick feed, "
+                           "but the NIFTY chain book is not receiving ticks")
+
+    async def cycle():
+        result = await run_pipeline(dict(initial_state))
+        print(f"🔁 Cycle done: strategy={result.get('strategy_decision', {}).get('strategy')}, "
+              f"risk={result.get('risk_status')}")
+
+    scheduler = CycleScheduler(cycle, interval_sec=interval_sec, clock=clock, max_cycles=max_cycles)
+    watcher = None
+    if move_pct:
+        watcher = asyncio.ensure_future(watch_spot_moves(scheduler, get_chain_book("NIFTY"), move_pct))
+    try:
+        await scheduler.run()
+    finally:
+        if watcher:
+            watcher.cancel()
+        if stream:
+            stream.stop()
+        print(f"📊 Scheduler metrics: {scheduler.metrics()}")
+    return scheduler
 
 if __name__ == "__main__":
+    import os
+    import argparse
+    parser = argparse.ArgumentParser(description="Hybrid Agentic RAG trading pipeline")
+    parser.add_argument("--daemon", action="store_true", help="keep running cycles on a fixed cadence")
+    parser.add_argument("--interval", type=float, default=float(os.environ.get("TRADING_LOOP_INTERVAL", 60)),
+                        help="seconds between cycles in daemon mode")
+    parser.add_argument("--move-pct", type=float, default=None,
+                        help="also trigger a cycle when streamed spot moves this many percent")
+    parser.add_argument("--feed", choices=["kite", "replay", "none"], default=os.environ.get("TICK_FEED", "kite"),
+                        help="tick stream for the chain book in daemon mode (replay = synthetic demo ticks)")
+    parser.add_argument("--max-cycles", type=int, default=None)
+    args = parser.parse_args()
+
     print("Starting Hybrid Agentic RAG System...")
     
     # Check for manual strategy override from environment
-    import os
     user_override = os.environ.get("USER_SELECTED_STRATEGY")
     
     # Initial run
@@ -233,7 +425,15 @@ if __name__ == "__main__":
         initial_state["user_selected_strategy"] = user_override
         print(f"Manual Override: {user_override}")
     
-    result = app.invoke(initial_state)
+    if args.daemon:
+        try:
+            asyncio.run(run_daemon(initial_state, args.interval, args.move_pct, args.max_cycles,
+                                   feed=None if args.feed == "none" else args.feed))
+        except KeyboardInterrupt:
+            print("Stopped.")
+        raise SystemExit(0)
+
+    result = asyncio.run(run_pipeline(initial_state))
     print("\n\n__JSON_START__")
     import json
     # Use default=str to handle datetime objects
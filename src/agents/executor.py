@@ -2,6 +2,9 @@ from typing import Dict, Any
 from src.integration.kite_app import kite_client
 from src.quant_engine.sigma_calculator import get_strangle_strikes, get_atm_strike
 from src.quant_engine.option_chain_builder import get_lot_size
+from src.quant_engine.implied_vol import fill_chain_iv, atm_implied_vol
+from src.quant_engine.strike_index import strike_index_for
+from src.quant_engine.vol_surface import get_vol_surface
 
 def execute_order(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -21,11 +24,14 @@ def execute_order(state: Dict[str, Any]) -> Dict[str, Any]:
     days = market_data.get("days_to_expiry")
     symbol = market_data.get("symbol", "NIFTY")
     option_chain = market_data.get("option_chain")
+    # Strikes/symbols don't change when IVs are filled in, so index the snapshot as received
+    chain_index = strike_index_for(option_chain) if option_chain is not None and not option_chain.empty else None
     
     # Get sigma multiplier from strategy decision (LLM recommendation)
     sigma_mult = strategy_dec.get("recommended_sigma", 1.0)
     
     strikes = {}
+    surface = None
     
     if strategy_name == "Short Straddle":
         atm = get_atm_strike(spot)
@@ -36,7 +42,32 @@ def execute_order(state: Dict[str, Any]) -> Dict[str, Any]:
         }
     else:
         # Default Strangle
-        strikes = get_strangle_strikes(spot, iv, days, sigma_mult)
+        # Prefer the ATM implied vol backed out of chain LTPs over India VIX
+        iv_source = "VIX"
+        if option_chain is not None and not option_chain.empty and days:
+            try:
+                option_chain = fill_chain_iv(option_chain, spot, days)
+                chain_iv = atm_implied_vol(option_chain, spot)
+                if chain_iv:
+                    iv = chain_iv
+                    iv_source = "CHAIN_ATM"
+                # Smile fitted from the chain IVs (cached; refits only when quotes move)
+                surface = get_vol_surface(symbol)
+                if surface.update_from_chain(option_chain, spot, days, market_data.get("expiry_date")) is None:
+                    surface = None
+            except Exception as e:
+                print(f"⚠️ Could not solve chain IVs, using VIX: {e}")
+                surface = None
+        if surface is not None:
+            # Each side's range uses the surface vol at its own strike (skew-aware)
+            strikes = surface.strangle_strikes(spot, days, sigma_mult)
+            iv_source = "SURFACE"
+            print(f"Using surface IVs CE={strikes['call_iv']} / PE={strikes['put_iv']} (ATM {strikes['atm_iv']}) for strike selection")
+        else:
+            print(f"Using IV={iv} ({iv_source}) for strike selection")
+            strikes = get_strangle_strikes(spot, iv, days, sigma_mult)
+        strikes["iv_used"] = iv
+        strikes["iv_source"] = iv_source
     
     # Place Orders via Kite
     call_strike = strikes["sell_call_strike"]
@@ -44,33 +75,20 @@ def execute_order(state: Dict[str, Any]) -> Dict[str, Any]:
     
     # Get real option symbols from option chain
     try:
-        if option_chain is not None and not option_chain.empty:
-            # Option chain DataFrame has columns: strike, tradingsymbol_ce, tradingsymbol_pe, etc.
-            available_strikes = option_chain['strike'].tolist()
-            
-            # Find closest strike for Call
-            ce_strike = min(available_strikes, key=lambda x: abs(x - call_strike))
-            # Find closest strike for Put  
-            pe_strike = min(available_strikes, key=lambda x: abs(x - put_strike))
-            
-            # Get the actual trading symbols from Kite data
-            ce_row = option_chain[option_chain['strike'] == ce_strike]
-            pe_row = option_chain[option_chain['strike'] == pe_strike]
+        if chain_index is not None:
+            # One binary-search lookup resolves both legs against the sorted strike index
+            ce_leg, pe_leg = chain_index.resolve([call_strike, put_strike], ["CE", "PE"])
+            ce_symbol, pe_symbol = ce_leg['tradingsymbol'], pe_leg['tradingsymbol']
             
-            if not ce_row.empty and ce_row['tradingsymbol_ce'].iloc[0]:
-                ce_symbol = ce_row['tradingsymbol_ce'].iloc[0]
-            else:
-                raise Exception(f"No CE option found for strike {ce_strike}")
-                
-            if not pe_row.empty and pe_row['tradingsymbol_pe'].iloc[0]:
-                pe_symbol = pe_row['tradingsymbol_pe'].iloc[0]
-            else:
-                raise Exception(f"No PE option found for strike {pe_strike}")
-            
-            call_strike = ce_strike  # Use actual strike from chain
-            put_strike = pe_strike  # Use actual strike from chain
+            call_strike = ce_leg['strike']  # Use actual strike from chain
+            put_strike = pe_leg['strike']  # Use actual strike from chain
             
             print(f"✅ Found options: {ce_symbol} and {pe_symbol}")
+            if surface is not None:
+                # Legs priced downstream (risk engine, Monte Carlo, dashboard) use these IVs,
+                # so take them at the listed strikes rather than the unrounded bounds
+                call_iv, put_iv = surface.iv([call_strike, put_strike], days, spot)
+                strikes["call_iv"], strikes["put_iv"] = round(float(call_iv), 2), round(float(put_iv), 2)
         else:
             raise Exception("Option chain data not available")
     except Exception as e:
@@ -91,28 +109,24 @@ def execute_order(state: Dict[str, Any]) -> Dict[str, Any]:
         "analysis": strikes
     }
 
-    # If adjustment needed, close existing position first (Mock logic for demo)
+    # If adjustment needed, close the open legs the monitor loaded from the broker first.
+    # 'close' marks them for the risk engine, which nets them against open_positions
     if state.get("adjustment_needed"):
-        print("--- [Executor] Generating CLOSE orders for existing position ---")
-        # In real system, fetch actual open positions here
-        # For demo, we close a hypothetical previous position
+        open_positions = state.get("open_positions") or []
+        print(f"--- [Executor] Generating CLOSE orders for {len(open_positions)} open legs ---")
+        if not open_positions:
+            print("⚠️ [Executor] Adjustment requested but no open positions were loaded; nothing to close")
         order["legs"].extend([
             {
-                "type": "CE",
-                "strike": call_strike, # Assuming we are rolling same strikes for simplicity in demo
-                "instrument": "EXISTING_CE",
-                "quantity": lot_size,
-                "action": "BUY", # Close Short
-                "order_id": "CLOSE_LEG_1"
-            },
-            {
-                "type": "PE",
-                "strike": put_strike,
-                "instrument": "EXISTING_PE",
-                "quantity": lot_size,
-                "action": "BUY", # Close Short
-                "order_id": "CLOSE_LEG_2"
+                "type": position["type"],
+                "strike": position["strike"],
+                "instrument": position["instrument"],
+                "quantity": position["quantity"],
+                "action": "BUY" if position["action"] == "SELL" else "SELL",
+                "order_id": None,
+                "close": True
             }
+            for position in open_positions
         ])
 
     # Add New Opening Legs
@@ -1,5 +1,5 @@
+import asyncio
 from typing import Dict, Any, List
-from langchain_core.tools import tool
 try:
     from googlesearch import search
     import requests
@@ -7,7 +7,76 @@ try:
 except ImportError:
     pass # Handle cases where deps might not be installed in CI/CD or minimal envs
 
-from src.integration.llm_client import query_llm
+from src.integration.llm_client import query_llm, aquery_llm
+
+SEARCH_QUERY = "Nifty 50 live market sentiment news india"
+
+NEWS_SOURCES = [
+    ("https://www.moneycontrol.com/news/business/markets/", "MoneyControl"),
+    ("https://www.marketwatch.com/latest-news", "MarketWatch"),
+    ("https://in.investing.com/news/stock-market-news", "Investing.com"),
+]
+
+SCRAPE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.google.com/'
+}
+
+SYSTEM_PROMPT = (
+    "You are a senior financial market analyst for the Indian Stock Market (Nifty 50). "
+    "Your job is to summarize the provided raw news headlines and search results into a concise market sentiment report. "
+    "Focus on: Volatility (VIX), FII/DII activity, Global Cues, and Major Domestic Events. "
+    "Conclude with a Sentiment Tag: 'Bullish', 'Bearish', 'Neutral', or 'Volatile'."
+    "If the raw data is empty or insufficient, return 'Data Unavailable'."
+)
+
+def search_results(query: str = SEARCH_QUERY) -> List:
+    """Top Google results for the query (empty on failure)."""
+    print(f"Searching Google for: {query}")
+    results = []
+    try:
+        # Fetch top 5 results
+        for result_url in search(query, num_results=5, advanced=True):
+            results.append(result_url)
+    except Exception as e:
+        print(f"Google Search failed: {e}")
+    return results
+
+def scrape_headlines(url: str, source_name: str) -> List[str]:
+    """Page title and leading h1/h2 headings for one news page (empty on failure)."""
+    headlines = []
+    try:
+        response = requests.get(url, headers=SCRAPE_HEADERS, timeout=10)
+        soup = BeautifulSoup(response.content, 'lxml')
+        
+        # Simple logic to find main headings (this varies by site and is brittle)
+        # Just grabbing title and some h1/h2 tags for now as a generic approach
+        page_title = soup.title.string if soup.title else ""
+        headlines.append(f"{source_name}: {page_title.strip()}")
+        
+        # Attempt to find article highlights (very generic)
+        texts = [h.get_text().strip() for h in soup.find_all(['h1', 'h2'], limit=3)]
+        for t in texts:
+            if len(t) > 20:
+                headlines.append(f"{source_name} Head: {t}")
+                
+    except Exception as e:
+        print(f"Failed to scrape {source_name}: {e}")
+    return headlines
+
+def compile_raw_data(results: List, headlines: List[str]) -> str:
+    raw_data = ""
+    if results:
+         raw_data += f"Top Search Links: {', '.join([r.title for r in results])}\n"
+         # Add descriptions from search results
+         for r in results:
+             raw_data += f"- {r.description}\n"
+    
+    if headlines:
+        raw_data += "\nDirect Site Headlines:\n" + "\n".join([f"- {h}" for h in headlines])
+    return raw_data
 
 def perform_market_research(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -16,68 +85,17 @@ def perform_market_research(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     print("--- [Market Researcher] Searching Web for Live Intel ---")
     
-    raw_data = ""
-    
     try:
         # 1. Google Search for top headlines
-        query = "Nifty 50 live market sentiment news india"
-        print(f"Searching Google for: {query}")
-        
-        search_results = []
-        try:
-            # Fetch top 5 results
-            for result_url in search(query, num_results=5, advanced=True):
-                search_results.append(result_url)
-        except Exception as e:
-            print(f"Google Search failed: {e}")
+        results = search_results()
 
         # 2. Scrape Specific News Sources (Simplified Scraper)
         headlines = []
-        
-        # Helper to scrape
-        def scrape_headlines(url, source_name):
-            try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.9',
-                    'Referer': 'https://www.google.com/'
-                }
-                response = requests.get(url, headers=headers, timeout=10)
-                soup = BeautifulSoup(response.content, 'lxml')
-                
-                # Simple logic to find main headings (this varies by site and is brittle)
-                # Just grabbing title and some h1/h2 tags for now as a generic approach
-                page_title = soup.title.string if soup.title else ""
-                headlines.append(f"{source_name}: {page_title.strip()}")
-                
-                # Attempt to find article highlights (very generic)
-                texts = [h.get_text().strip() for h in soup.find_all(['h1', 'h2'], limit=3)]
-                for t in texts:
-                    if len(t) > 20:
-                        headlines.append(f"{source_name} Head: {t}")
-                        
-            except Exception as e:
-                print(f"Failed to scrape {source_name}: {e}")
-
-        # Scrape MoneyControl (Market Section)
-        scrape_headlines("https://www.moneycontrol.com/news/business/markets/", "MoneyControl")
-        
-        # Scrape MarketWatch (Generic or Asia specific)
-        scrape_headlines("https://www.marketwatch.com/latest-news", "MarketWatch")
-        
-        # Scrape Investing.com India
-        scrape_headlines("https://in.investing.com/news/stock-market-news", "Investing.com")
+        for url, source_name in NEWS_SOURCES:
+            headlines.extend(scrape_headlines(url, source_name))
 
         # Compile results
-        if search_results:
-             raw_data += f"Top Search Links: {', '.join([r.title for r in search_results])}\n"
-             # Add descriptions from search results
-             for r in search_results:
-                 raw_data += f"- {r.description}\n"
-        
-        if headlines:
-            raw_data += "\nDirect Site Headlines:\n" + "\n".join([f"- {h}" for h in headlines])
+        raw_data = compile_raw_data(results, headlines)
             
         if not raw_data or "Could not fetch" in raw_data:
              print("⚠️ Market research failed. Returning 'Data Unavailable' to prevent hallucination.")
@@ -91,18 +109,50 @@ def perform_market_research(state: Dict[str, Any]) -> Dict[str, Any]:
     
     # 3. Summarize with LLM
     print("--- [Market Researcher] Synthesizing with LLM (Llama 3) ---")
-    system_prompt = (
-        "You are a senior financial market analyst for the Indian Stock Market (Nifty 50). "
-        "Your job is to summarize the provided raw news headlines and search results into a concise market sentiment report. "
-        "Focus on: Volatility (VIX), FII/DII activity, Global Cues, and Major Domestic Events. "
-        "Conclude with a Sentiment Tag: 'Bullish', 'Bearish', 'Neutral', or 'Volatile'."
-        "If the raw data is empty or insufficient, return 'Data Unavailable'."
-    )
     user_prompt = f"Raw Market Data:\n{raw_data}"
     
     try:
         # Use Llama 3 via Groq for fast synthesis
-        research_summary = query_llm(system_prompt, user_prompt, provider="groq", model="llama-3.3-70b-versatile")
+        research_summary = query_llm(SYSTEM_PROMPT, user_prompt, provider="groq", model="llama-3.3-70b-versatile")
+    except Exception as e:
+        print(f"LLM Summarization Failed: {e}")
+        research_summary = f"LLM Error. Raw Data length: {len(raw_data)}"
+    
+    print(f"LLM Summary: {research_summary}")
+    
+    return {"research_data": research_summary}
+
+async def aperform_market_research(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async Market Researcher Node.
+    The search and all site scrapes run concurrently; synthesis uses the async LLM client.
+    """
+    print("--- [Market Researcher] Searching Web for Live Intel (concurrent) ---")
+    
+    try:
+        fetched = await asyncio.gather(
+            asyncio.to_thread(search_results),
+            *(asyncio.to_thread(scrape_headlines, url, name) for url, name in NEWS_SOURCES)
+        )
+        results = fetched[0]
+        headlines = [h for source in fetched[1:] for h in source]
+        raw_data = compile_raw_data(results, headlines)
+        
+        if not raw_data or "Could not fetch" in raw_data:
+             print("⚠️ Market research failed. Returning 'Data Unavailable' to prevent hallucination.")
+             return {"research_data": "Data Unavailable (Scraping Failed)"}
+
+    except Exception as e:
+        print(f"Market Research Error: {e}")
+        return {"research_data": f"Error: {str(e)}"}
+
+    print(f"Raw Research Data (first 200 chars): {raw_data[:200]}...")
+    
+    print("--- [Market Researcher] Synthesizing with LLM (Llama 3) ---")
+    user_prompt = f"Raw Market Data:\n{raw_data}"
+    
+    try:
+        research_summary = await aquery_llm(SYSTEM_PROMPT, user_prompt, provider="groq", model="llama-3.3-70b-versatile")
     except Exception as e:
         print(f"LLM Summarization Failed: {e}")
         research_summary = f"LLM Error. Raw Data length: {len(raw_data)}"
@@ -1,77 +1,140 @@
-import csv
-import os
-from typing import Dict, Any
-from src.integration.llm_client import query_llm
+import asyncio
+from datetime import date
+from typing import Dict, Any, List, Optional
+from src.integration.llm_client import query_llm, aquery_llm
+from src.integration.kite_app import kite_client
+from src.integration.instrument_master import instrument_master
+from src.data_ingestion.history_store import history_store
 import json
 
-LOG_FILE = os.path.join(os.getcwd(), 'data', 'market_history', 'option_chain_log.csv')
+SYSTEM_PROMPT = (
+    "You are a Portfolio Manager. Monitor the following position. "
+    "Decide if we need to ADJUST (Roll/Hedge) or HOLD based on market conditions. "
+    "Rules: "
+    "1. If Spot Price has moved significantly (>2%) from Entry, consider Adjustment. "
+    "2. If News is 'Bearish' and we are Short Puts, consider Exit. "
+    "3. Otherwise, recommend HOLD to collect Theta. "
+    "Output JSON: {'decision': 'HOLD', 'ADJUST', or 'EXIT', 'reason': '...'}"
+)
 
-def monitor_positions(state: Dict[str, Any]) -> Dict[str, Any]:
+def last_trade_context(symbol: str = "NIFTY") -> str:
+    # In a real system, we'd read the actual open order book from Kite.
+    # Here we mock it with the latest logged chain snapshot (ATM row).
+    context = "No active positions found in log."
+    try:
+        latest = history_store.latest(symbol)
+        if latest is not None and len(latest) > 0:
+            spot = latest["spot"].iloc[0]
+            atm = latest.iloc[(latest["strike"] - spot).abs().argmin()]
+            context = (f"Last logged snapshot {atm['timestamp']}: {symbol} spot {spot}, "
+                       f"ATM strike {atm['strike']:.0f} CE {atm['ce_ltp']} / PE {atm['pe_ltp']}")
+    except Exception as e:
+        print(f"Error reading log: {e}")
+    return context
+
+def load_open_positions(symbol: str = "NIFTY") -> Optional[List[Dict[str, Any]]]:
     """
-    The Position Monitor Node.
-    Checks if existing positions need adjustment using LLM analysis.
+    Open option legs on `symbol` from the broker's net positions, as order legs
+    (type, strike, quantity, action, days_to_expiry) for the risk engine.
+    Returns None when positions are unavailable (no Kite session or fetch error).
     """
-    print("--- [Position Monitor] Checking Active Positions with LLM ---")
-    
-    # In a real system, we'd read the actual open order book from Kite.
-    # Here we mock reading the last "logged" trade from CSV if available.
-    
-    last_trade_context = "No active positions found in log."
-    entry_price = 0
-    
-    if os.path.exists(LOG_FILE):
-        try:
-            with open(LOG_FILE, 'r') as f:
-                lines = f.readlines()
-                if len(lines) > 1:
-                    last_trade_context = lines[-1].strip() # Simple mock: just take last line
-                    # Mock parsing (assuming CSV structure isn't strict for this demo)
-                    # Real impl would parse CSV properly
-        except Exception as e:
-            print(f"Error reading log: {e}")
+    try:
+        positions = kite_client.get_positions()
+    except Exception as e:
+        print(f"Error fetching positions: {e}")
+        return None
+    if positions is None:
+        return None
+    legs = []
+    for position in positions:
+        quantity = int(position.get("quantity") or 0)
+        if not quantity or position.get("exchange") != "NFO":
+            continue
+        row = instrument_master.by_tradingsymbol(position["tradingsymbol"])
+        if row is None or row["name"] != symbol or row["instrument_type"] not in ("CE", "PE"):
+            continue
+        legs.append({
+            "type": row["instrument_type"],
+            "strike": row["strike"],
+            "instrument": position["tradingsymbol"],
+            "quantity": abs(quantity),
+            "action": "SELL" if quantity < 0 else "BUY",
+            # Same convention as market_data: whole days, at least 1 on expiry day
+            "days_to_expiry": max((row["expiry"] - date.today()).days, 1) if row["expiry"] else None,
+        })
+    return legs
+
+def position_context(legs: Optional[List[Dict[str, Any]]], symbol: str = "NIFTY") -> str:
+    """Open legs from the broker when available, else the last logged snapshot."""
+    if not legs:
+        return last_trade_context(symbol)
+    return "Open positions: " + "; ".join(
+        f"{leg['action']} {leg['quantity']} {leg['instrument']} ({leg['days_to_expiry']}d)" for leg in legs)
 
+def build_user_prompt(state: Dict[str, Any], position_info: str) -> str:
     market_data = state.get("market_data", {})
     current_spot = market_data.get("spot_price", 22000)
     current_iv = market_data.get("iv", 12)
     research_summary = state.get("research_data", "No news.")
 
-    # Construct Prompt
-    system_prompt = (
-        "You are a Portfolio Manager. Monitor the following position. "
-        "Decide if we need to ADJUST (Roll/Hedge) or HOLD based on market conditions. "
-        "Rules: "
-        "1. If Spot Price has moved significantly (>2%) from Entry, consider Adjustment. "
-        "2. If News is 'Bearish' and we are Short Puts, consider Exit. "
-        "3. Otherwise, recommend HOLD to collect Theta. "
-        "Output JSON: {'decision': 'HOLD', 'ADJUST', or 'EXIT', 'reason': '...'}"
-    )
-    
-    user_prompt = f"""
+    return f"""
     Current Market:
     - Spot: {current_spot}
     - IV: {current_iv}
     - News: {research_summary}
     
     Position Info:
-    {last_trade_context}
+    {position_info}
     
     Decision?
     """
+
+def parse_monitor_response(llm_response: str, open_positions: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    print(f"Position Monitor Thoughts: {llm_response}")
+    
+    # Simple parsing
+    adjustment_needed = False
+    if "adjust" in llm_response.lower() or "exit" in llm_response.lower():
+        adjustment_needed = True
+        
+    return {
+        "adjustment_needed": adjustment_needed,
+        "monitor_analysis": llm_response,
+        "open_positions": open_positions
+    }
+
+def monitor_positions(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The Position Monitor Node.
+    Checks if existing positions need adjustment using LLM analysis.
+    """
+    print("--- [Position Monitor] Checking Active Positions with LLM ---")
+    
+    symbol = state.get("market_data", {}).get("symbol", "NIFTY")
+    open_positions = load_open_positions(symbol)
+    user_prompt = build_user_prompt(state, position_context(open_positions, symbol))
     
     try:
-        llm_response = query_llm(system_prompt, user_prompt)
-        print(f"Position Monitor Thoughts: {llm_response}")
+        llm_response = query_llm(SYSTEM_PROMPT, user_prompt)
+        return parse_monitor_response(llm_response, open_positions)
         
-        # Simple parsing
-        adjustment_needed = False
-        if "adjust" in llm_response.lower() or "exit" in llm_response.lower():
-            adjustment_needed = True
-            
-        return {
-            "adjustment_needed": adjustment_needed,
-            "monitor_analysis": llm_response
-        }
+    except Exception as e:
+        print(f"Position Monitor LLM Failed: {e}")
+        return {"adjustment_needed": False, "open_positions": open_positions}
+
+async def amonitor_positions(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Async Position Monitor Node (broker/file reads off the event loop, async LLM client)."""
+    print("--- [Position Monitor] Checking Active Positions with LLM ---")
+    
+    symbol = state.get("market_data", {}).get("symbol", "NIFTY")
+    open_positions = await asyncio.to_thread(load_open_positions, symbol)
+    position_info = await asyncio.to_thread(position_context, open_positions, symbol)
+    user_prompt = build_user_prompt(state, position_info)
+    
+    try:
+        llm_response = await aquery_llm(SYSTEM_PROMPT, user_prompt)
+        return parse_monitor_response(llm_response, open_positions)
         
     except Exception as e:
         print(f"Position Monitor LLM Failed: {e}")
-        return {"adjustment_needed": False}
+        return {"adjustment_needed": False, "open_positions": open_positions}
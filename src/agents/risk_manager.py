@@ -1,11 +1,13 @@
 from typing import Dict, Any
-from src.integration.llm_client import query_llm
+from src.integration.llm_client import stream_llm
+from src.quant_engine.risk_engine import assess_order
 import json
 
 def validate_order(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     The Risk Manager Node.
-    Validates the proposed order against safety checks using LLM reasoning.
+    Enforces deterministic portfolio risk limits (Greeks, scenario loss), then
+    validates the proposed order against safety checks using LLM reasoning.
     """
     print("--- [Risk Manager] Validating Order with LLM ---")
     order = state.get("final_order", {})
@@ -15,6 +17,19 @@ def validate_order(state: Dict[str, Any]) -> Dict[str, Any]:
     if not order:
         return {"error": "No order to validate."}
     
+    # Deterministic hard limits first: breaches are rejected without an LLM round-trip
+    risk_metrics = assess_order(order, market_data, state.get("open_positions") or [])
+    if not risk_metrics["approved"]:
+        breaches = "; ".join(risk_metrics["breaches"])
+        print(f"❌ [Risk Manager] Hard limit breach ({risk_metrics['elapsed_us']:.0f} µs): {breaches}")
+        return {
+            "risk_status": "rejected",
+            "risk_analysis": f"Rejected by hard risk limits: {breaches}",
+            "risk_metrics": risk_metrics
+        }
+    print(f"--- [Risk Manager] Hard limits passed ({risk_metrics['scenarios']} scenarios, "
+          f"worst loss {risk_metrics['worst_loss']:,.0f}) ---")
+    
     # Construct Prompt
     system_prompt = (
         "You are a strict Risk Manager for an options trading desk. "
@@ -33,6 +48,10 @@ def validate_order(state: Dict[str, Any]) -> Dict[str, Any]:
     - IV: {market_data.get('iv')}%
     - Sentiment: {market_sentiment}
     
+    Portfolio Risk (existing positions + this order):
+    - Greeks: {json.dumps(risk_metrics['greeks'])}
+    - Worst scenario loss: {risk_metrics['worst_loss']} at {json.dumps(risk_metrics['worst_scenario'])}
+    
     Proposed Order:
     {json.dumps(order, indent=2)}
     
@@ -42,16 +61,27 @@ def validate_order(state: Dict[str, Any]) -> Dict[str, Any]:
     try:
         # Use Llama 3 via Groq logic for "Second Opinion"
         # Since Strategist used GPT-4, we audit with Llama 3
-        llm_response = query_llm(system_prompt, user_prompt, provider="groq", model="llama-3.3-70b-versatile")
+        # Streamed: the stream is closed as soon as "decision" has been parsed
+        llm_response, fields = stream_llm(system_prompt, user_prompt, provider="groq",
+                                          model="llama-3.3-70b-versatile", required=("decision",))
         
         print(f"Risk Manager Thoughts: {llm_response}")
         
         # Robust JSON parsing with fallback
         decision = "approved"  # Default to approved (conservative)
         
+        import re
+        if isinstance(fields.get('decision'), str):
+            decision = fields['decision'].lower()
+            print(f"✅ Streamed Risk Decision: {decision}")
+            return {
+                "risk_status": decision,
+                "risk_analysis": llm_response,
+                "risk_metrics": risk_metrics
+            }
+
         try:
             # Try to parse JSON response
-            import re
             clean_response = re.sub(r'```json\s*|\s*```', '', llm_response)
             llm_json = json.loads(clean_response)
             
@@ -75,10 +105,11 @@ def validate_order(state: Dict[str, Any]) -> Dict[str, Any]:
                 
         return {
             "risk_status": decision,
-            "risk_analysis": llm_response
+            "risk_analysis": llm_response,
+            "risk_metrics": risk_metrics
         }
         
     except Exception as e:
         print(f"Risk Manager LLM Failed: {e}")
         # Fail safe: Reject if unsure
-        return {"risk_status": "rejected", "risk_analysis": "LLM Failure"}
+        return {"risk_status": "rejected", "risk_analysis": "LLM Failure", "risk_metrics": risk_metrics}
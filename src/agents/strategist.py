@@ -1,6 +1,37 @@
 from typing import Dict, Any
-from src.knowledge.retrieval_tool import lookup_strategy_rules
-from src.integration.llm_client import query_llm
+from src.integration.llm_client import stream_llm
+
+STRATEGY_TOPICS = {
+    "strangle": "Short Strangle management",
+    "straddle": "Short Straddle management",
+    "news": "market news",
+}
+
+def load_strategy_rules() -> Dict[str, str]:
+    """RAG lookup for the strategist's fixed topics (independent of market data)."""
+    # Deferred: the knowledge stack (langchain, Chroma, embeddings) loads on first lookup
+    from src.knowledge.retrieval_tool import lookup_strategy_rules_many
+    results = lookup_strategy_rules_many(list(STRATEGY_TOPICS.values()))
+    return dict(zip(STRATEGY_TOPICS, results))
+
+def _complete_rationale(late: Dict[str, Any]):
+    """
+    Fills the decision's rationale from the full response once the background
+    stream reader has finished. Called from both sides; whichever sees both
+    the decision and the text does the fill.
+    """
+    decision, text = late.get("decision"), late.get("text")
+    if decision is None or text is None:
+        return
+    import json
+    import re
+    try:
+        full = json.loads(re.sub(r'```json\s*|\s*```', '', text))
+    except ValueError:
+        full = {}
+    if isinstance(full, dict) and full.get("rationale"):
+        decision["rationale"] = full["rationale"]
+    decision["llm_analysis"] = text
 
 def analyze_strategy(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -10,15 +41,16 @@ def analyze_strategy(state: Dict[str, Any]) -> Dict[str, Any]:
     market_data = state.get("market_data", {})
     iv = market_data.get("iv", 0)
     
-    print("--- [Strategist] Querying RAG for Short Strangle & Straddle Rules ---")
-    strangle_rules = lookup_strategy_rules.invoke("Short Strangle management")
-    straddle_rules = lookup_strategy_rules.invoke("Short Straddle management")
-    
-    print("--- [Strategist] Querying RAG for Market News ---")
-    news = lookup_strategy_rules.invoke("market news")
+    # Rules may already have been fetched concurrently by the graph's strategy_rules node
+    rules = state.get("strategy_rules")
+    if not rules:
+        print("--- [Strategist] Querying RAG for Strangle/Straddle Rules & Market News ---")
+        rules = load_strategy_rules()
+    strangle_rules, straddle_rules, news = rules["strangle"], rules["straddle"], rules["news"]
     
     user_override = state.get("user_selected_strategy")
     recommended_sigma = 1.0  # Default sigma value
+    late = {}  # Full streamed response, filled in after the decision fields returned
     
     if user_override:
          print(f"--- [Strategist] Manual Override Active: {user_override} ---")
@@ -37,7 +69,16 @@ def analyze_strategy(state: Dict[str, Any]) -> Dict[str, Any]:
         )
         user_prompt = f"Market IV: {iv}%\nStrangle Rules: {strangle_rules}\nStraddle Rules: {straddle_rules}\nNews: {news}\n\nRecommend the best strategy and sigma multiplier."
         
-        llm_response = query_llm(system_prompt, user_prompt)
+        # Streamed: return as soon as the decision fields are in. The rationale (and
+        # 'constraints', reloaded from the rules below anyway) is read in the background
+        # and filled into the decision for the cache and the dashboard
+        def on_complete(text):
+            late["text"] = text
+            _complete_rationale(late)
+
+        llm_response, fields = stream_llm(system_prompt, user_prompt,
+                                          required=("strategy", "recommended_sigma"),
+                                          on_complete=on_complete)
         
         # Enhanced parsing with robust JSON extraction
         if "Error" in llm_response:
@@ -55,41 +96,51 @@ def analyze_strategy(state: Dict[str, Any]) -> Dict[str, Any]:
             rationale = llm_response
             recommended_sigma = 1.0
             
-            try:
-                # Attempt to parse as JSON
-                # Remove markdown code blocks if present
-                clean_response = re.sub(r'```json\s*|\s*```', '', llm_response)
-                llm_json = json.loads(clean_response)
+            if fields.get('strategy'):
+                # Fields already parsed incrementally from the stream
+                strategy = fields['strategy']
+                try:
+                    recommended_sigma = float(fields.get('recommended_sigma', 1.0))
+                except (TypeError, ValueError):
+                    recommended_sigma = 1.0
+                rationale = fields.get('rationale') or "(rationale still streaming)"
+                print(f"✅ Streamed JSON fields: strategy={strategy}, sigma={recommended_sigma}")
+            else:
+                try:
+                    # Attempt to parse as JSON
+                    # Remove markdown code blocks if present
+                    clean_response = re.sub(r'```json\s*|\s*```', '', llm_response)
+                    llm_json = json.loads(clean_response)
                 
-                # Extract values from JSON
-                strategy = llm_json.get('strategy')
-                recommended_sigma = float(llm_json.get('recommended_sigma', 1.0))
-                rationale = llm_json.get('rationale', llm_response)
+                    # Extract values from JSON
+                    strategy = llm_json.get('strategy')
+                    recommended_sigma = float(llm_json.get('recommended_sigma', 1.0))
+                    rationale = llm_json.get('rationale', llm_response)
                 
-                print(f"✅ Successfully parsed JSON: strategy={strategy}, sigma={recommended_sigma}")
+                    print(f"✅ Successfully parsed JSON: strategy={strategy}, sigma={recommended_sigma}")
                 
-            except (json.JSONDecodeError, ValueError) as e:
-                # Fallback to regex extraction
-                print(f"⚠️ JSON parsing failed, using regex fallback: {e}")
+                except (json.JSONDecodeError, ValueError) as e:
+                    # Fallback to regex extraction
+                    print(f"⚠️ JSON parsing failed, using regex fallback: {e}")
                 
-                # Extract strategy using regex (more robust)
-                if re.search(r'\bshort\s+straddle\b', llm_response, re.IGNORECASE):
-                    strategy = "Short Straddle"
-                elif re.search(r'\bshort\s+strangle\b', llm_response, re.IGNORECASE):
-                    strategy = "Short Strangle"
-                elif re.search(r'\bstraddle\b', llm_response, re.IGNORECASE):
-                    strategy = "Short Straddle"
-                elif re.search(r'\bstrangle\b', llm_response, re.IGNORECASE):
-                    strategy = "Short Strangle"
+                    # Extract strategy using regex (more robust)
+                    if re.search(r'\bshort\s+straddle\b', llm_response, re.IGNORECASE):
+                        strategy = "Short Straddle"
+                    elif re.search(r'\bshort\s+strangle\b', llm_response, re.IGNORECASE):
+                        strategy = "Short Strangle"
+                    elif re.search(r'\bstraddle\b', llm_response, re.IGNORECASE):
+                        strategy = "Short Straddle"
+                    elif re.search(r'\bstrangle\b', llm_response, re.IGNORECASE):
+                        strategy = "Short Strangle"
                 
-                # Extract sigma if mentioned
-                sigma_match = re.search(r'sigma[:\s]*(\d+\.?\d*)', llm_response, re.IGNORECASE)
-                if sigma_match:
-                    try:
-                        recommended_sigma = float(sigma_match.group(1))
-                        print(f"✅ Extracted sigma from text: {recommended_sigma}")
-                    except ValueError:
-                        pass
+                    # Extract sigma if mentioned
+                    sigma_match = re.search(r'sigma[:\s]*(\d+\.?\d*)', llm_response, re.IGNORECASE)
+                    if sigma_match:
+                        try:
+                            recommended_sigma = float(sigma_match.group(1))
+                            print(f"✅ Extracted sigma from text: {recommended_sigma}")
+                        except ValueError:
+                            pass
             
             # Final check: if strategy still not determined, default safely
             if not strategy:
@@ -103,13 +154,29 @@ def analyze_strategy(state: Dict[str, Any]) -> Dict[str, Any]:
             else:
                 constraints = strangle_rules
 
+    # Cross-check the sigma against the precomputed sweep optimum (informational only)
+    sigma_check = None
+    spot, days = market_data.get("spot_price"), market_data.get("days_to_expiry")
+    if strategy == "Short Strangle" and spot and iv and days:
+        try:
+            from src.quant_engine.param_sweep import check_recommendation
+            sigma_check = check_recommendation(spot, iv, days, recommended_sigma)
+            print(f"--- [Strategist] Sigma {recommended_sigma} vs sweep optimum {sigma_check['optimal_sigma']} "
+                  f"(POP {sigma_check['recommended']['pop']:.0%}, min {sigma_check['min_pop']:.0%}; "
+                  f"premium gap {sigma_check['premium_gap']:.2f} pts) ---")
+        except Exception as e:
+            print(f"⚠️ Sigma sweep check failed: {e}")
+
     strategy_decision = {
         "strategy": strategy,
         "rationale": rationale,
         "constraints": constraints,
         "market_sentiment": news,
         "llm_analysis": llm_response,
-        "recommended_sigma": recommended_sigma  # Pass sigma to executor
+        "recommended_sigma": recommended_sigma,  # Pass sigma to executor
+        "sigma_check": sigma_check
     }
+    late["decision"] = strategy_decision
+    _complete_rationale(late)
     
     return {"strategy_decision": strategy_decision}
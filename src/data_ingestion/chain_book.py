@@ -0,0 +1,167 @@
+import time
+import threading
+import numpy as np
+
+# Kite instrument tokens for the underlyings' index feeds
+NIFTY_SPOT_TOKEN = 256265
+BANKNIFTY_SPOT_TOKEN = 260105
+INDIA_VIX_TOKEN = 264969
+
+SPOT_TOKENS = {
+    "NIFTY": NIFTY_SPOT_TOKEN,
+    "BANKNIFTY": BANKNIFTY_SPOT_TOKEN,
+}
+
+# Per-strike fields kept for each side of the chain
+FIELDS = ("ltp", "oi", "volume", "bid", "ask")
+COLUMNS = [f"{side}_{field}" for side in ("ce", "pe") for field in FIELDS]
+ROW = {name: i for i, name in enumerate(COLUMNS)}
+
+class ChainBook:
+    """
+    Live in-memory option chain for one underlying and expiry.
+    State is a single float64 matrix (field x strike) with strikes sorted, so a
+    tick is an O(1) array write and a snapshot is one array copy.
+    Writers are serialized by a short lock; readers never take it and instead
+    use a sequence counter (seqlock) to retry if a write overlapped their copy.
+    """
+
+    def __init__(self, symbol="NIFTY", spot_token=None, vix_token=INDIA_VIX_TOKEN):
+        self.symbol = symbol
+        self.spot_token = spot_token or SPOT_TOKENS.get(symbol, NIFTY_SPOT_TOKEN)
+        self.vix_token = vix_token
+        self.expiry = None
+        self._write_lock = threading.Lock()
+        self._seq = 0
+        self._strikes = np.empty(0)
+        self._symbols = {"CE": np.empty(0, dtype=object), "PE": np.empty(0, dtype=object)}
+        self._data = np.full((len(COLUMNS), 0), np.nan)
+        self._token_slot = {}  # instrument_token -> (side, strike index)
+        self._spot = np.nan
+        self._vix = np.nan
+        self._updated_at = None  # monotonic time of last tick
+        self._tick_count = 0
+
+    def load_contracts(self, contracts):
+        """
+        Registers the option contracts to track.
+        contracts: DataFrame with instrument_token, strike, instrument_type, tradingsymbol
+        and expiry (as returned by get_option_chain_data).
+        """
+        import pandas as pd
+        strikes = np.unique(contracts['strike'].to_numpy(dtype=float))
+        symbols = {side: np.full(len(strikes), "", dtype=object) for side in ("CE", "PE")}
+        token_slot = {}
+
+        idx = np.searchsorted(strikes, contracts['strike'].to_numpy(dtype=float))
+        for token, i, opt_type, symbol in zip(contracts['instrument_token'].tolist(), idx.tolist(),
+                                              contracts['instrument_type'].tolist(),
+                                              contracts['tradingsymbol'].tolist()):
+            if opt_type not in symbols:
+                continue
+            symbols[opt_type][i] = symbol
+            token_slot[int(token)] = (opt_type.lower(), i)
+
+        with self._write_lock:
+            self._seq += 1
+            self._strikes = strikes
+            self._symbols = symbols
+            self._data = np.full((len(COLUMNS), len(strikes)), np.nan)
+            self._token_slot = token_slot
+            if 'expiry' in contracts.columns and len(contracts):
+                self.expiry = pd.Timestamp(contracts['expiry'].iloc[0]).to_pydatetime()
+            self._seq += 1
+
+    def tokens(self):
+        """All instrument tokens to subscribe for this book (options, spot, VIX)."""
+        return list(self._token_slot) + [self.spot_token, self.vix_token]
+
+    def apply_ticks(self, ticks):
+        """Applies a batch of KiteTicker tick dicts to the book."""
+        with self._write_lock:
+            self._seq += 1
+            data = self._data
+            for tick in ticks:
+                token = tick.get("instrument_token")
+                price = tick.get("last_price")
+                if token == self.spot_token:
+                    self._spot = price
+                    continue
+                if token == self.vix_token:
+                    self._vix = price
+                    continue
+                slot = self._token_slot.get(token)
+                if slot is None:
+                    continue
+                side, i = slot
+                data[ROW[f"{side}_ltp"], i] = price
+                if "oi" in tick:
+                    data[ROW[f"{side}_oi"], i] = tick["oi"]
+                if "volume_traded" in tick:
+                    data[ROW[f"{side}_volume"], i] = tick["volume_traded"]
+                depth = tick.get("depth")
+                if depth:
+                    if depth.get("buy"):
+                        data[ROW[f"{side}_bid"], i] = depth["buy"][0]["price"]
+                    if depth.get("sell"):
+                        data[ROW[f"{side}_ask"], i] = depth["sell"][0]["price"]
+            self._tick_count += len(ticks)
+            self._updated_at = time.monotonic()
+            self._seq += 1
+
+    def _read_consistent(self):
+        """Copies the book state, retrying if a writer was active during the copy."""
+        while True:
+            seq = self._seq
+            if seq % 2:
+                time.sleep(0)
+                continue
+            state = (self._strikes, self._symbols, self._data.copy(),
+                     self._spot, self._vix, self._updated_at)
+            if self._seq == seq:
+                return state
+
+    def snapshot_arrays(self):
+        """Returns (strikes, data matrix copy, spot, vix) without building a DataFrame."""
+        strikes, _, data, spot, vix, _ = self._read_consistent()
+        return strikes, data, spot, vix
+
+    def snapshot(self):
+        """
+        Returns a consistent point-in-time view of the book:
+        {'symbol', 'spot_price', 'vix', 'expiry', 'chain' (DataFrame), 'age_sec'}.
+        """
+        import pandas as pd
+        strikes, symbols, data, spot, vix, updated_at = self._read_consistent()
+        chain = pd.DataFrame(dict(zip(COLUMNS, data)))
+        chain.insert(0, 'strike', strikes)
+        chain['tradingsymbol_ce'] = symbols["CE"]
+        chain['tradingsymbol_pe'] = symbols["PE"]
+        return {
+            "symbol": self.symbol,
+            "spot_price": None if np.isnan(spot) else float(spot),
+            "vix": None if np.isnan(vix) else float(vix),
+            "expiry": self.expiry,
+            "chain": chain,
+            "age_sec": None if updated_at is None else time.monotonic() - updated_at,
+        }
+
+    def is_fresh(self, max_age_sec=5.0):
+        """True if the book has spot, VIX and a tick within the last max_age_sec."""
+        return (self._updated_at is not None
+                and time.monotonic() - self._updated_at <= max_age_sec
+                and not np.isnan(self._spot) and not np.isnan(self._vix)
+                and len(self._strikes) > 0)
+
+    @property
+    def tick_count(self):
+        return self._tick_count
+
+# Process-wide books, one per underlying
+chain_books = {}
+
+def get_chain_book(symbol="NIFTY"):
+    """Returns the shared ChainBook for an underlying, creating it on first use."""
+    if symbol not in chain_books:
+        chain_books[symbol] = ChainBook(symbol)
+    return chain_books[symbol]
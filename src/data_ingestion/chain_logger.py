@@ -1,18 +1,12 @@
-import csv
-import os
 import datetime
 import random
+import pandas as pd
+from src.data_ingestion.history_store import history_store
+from src.data_ingestion.tick_archive import tick_archive
 
 # For this mock, we will generate synthetic option chain data
 # similar to what we might get from an API (e.g., NSE Python)
 
-LOG_DIR = os.path.join(os.getcwd(), 'data', 'market_history')
-CSV_FILE = os.path.join(LOG_DIR, 'option_chain_log.csv')
-
-def ensure_log_dir():
-    if not os.path.exists(LOG_DIR):
-        os.makedirs(LOG_DIR)
-
 def get_mock_option_chain():
     """Generates a mock snapshot of an option chain."""
     spot = 22000 + random.randint(-50, 50)
@@ -34,8 +28,8 @@ def get_mock_option_chain():
             "timestamp": timestamp,
             "spot": spot,
             "strike": strike,
-            "ce_last_price": round(ce_price, 2),
-            "pe_last_price": round(pe_price, 2),
+            "ce_ltp": round(ce_price, 2),
+            "pe_ltp": round(pe_price, 2),
             "ce_iv": round(ce_iv, 2),
             "pe_iv": round(pe_iv, 2)
         }
@@ -43,23 +37,17 @@ def get_mock_option_chain():
         
     return chain_data
 
-def log_chain_snapshot():
-    """Fetches data and appends to CSV."""
-    ensure_log_dir()
-    
-    data = get_mock_option_chain()
+def log_chain_snapshot(symbol="NIFTY"):
+    """Fetches data and appends it to the columnar market-history store and the tick archive."""
+    data = pd.DataFrame(get_mock_option_chain())
+    timestamp = datetime.datetime.fromisoformat(data["timestamp"].iloc[0])
     
-    file_exists = os.path.isfile(CSV_FILE)
-    
-    with open(CSV_FILE, mode='a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=data[0].keys())
-        
-        if not file_exists:
-            writer.writeheader()
-            
-        writer.writerows(data)
+    history_store.append_snapshot(symbol, data, float(data["spot"].iloc[0]), timestamp)
+    history_store.flush()
+    tick_archive.append_snapshot(symbol, timestamp, float(data["spot"].iloc[0]), data)
+    tick_archive.flush()
         
-    print(f"Logged {len(data)} rows to {CSV_FILE}")
+    print(f"Logged {len(data)} rows to {history_store.root} ({symbol}, {timestamp.date()})")
 
 if __name__ == "__main__":
     log_chain_snapshot()
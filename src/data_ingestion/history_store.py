@@ -0,0 +1,240 @@
+import os
+import glob
+import uuid
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+HISTORY_DIR = os.path.join(os.getcwd(), 'data', 'market_history')
+# Append-only CSV written by the old chain logger (see import_csv_log)
+LEGACY_CSV = os.path.join(HISTORY_DIR, 'option_chain_log.csv')
+
+# Per-leg columns stored for each side of the chain
+LEG_COLUMNS = {
+    "ltp": "float64",
+    "iv": "float64",
+    "oi": "int64",
+    "volume": "int64",
+    "bid": "float64",
+    "ask": "float64",
+}
+
+_schema = None
+
+def history_schema():
+    """Arrow schema of one stored chain row (one row per strike per snapshot)."""
+    global _schema
+    if _schema is None:
+        import pyarrow as pa
+        fields = [
+            pa.field("timestamp", pa.timestamp("us")),
+            pa.field("spot", pa.float64()),
+            pa.field("vix", pa.float64()),
+            pa.field("expiry", pa.date32()),
+            pa.field("strike", pa.float64()),
+            pa.field("tradingsymbol_ce", pa.string()),
+            pa.field("tradingsymbol_pe", pa.string()),
+        ]
+        for side in ("ce", "pe"):
+            for name, dtype in LEG_COLUMNS.items():
+                fields.append(pa.field(f"{side}_{name}", pa.type_for_alias(dtype)))
+        _schema = pa.schema(fields)
+    return _schema
+
+class MarketHistoryStore:
+    """
+    Columnar market history, partitioned as
+        <root>/chain/symbol=<SYMBOL>/date=<YYYY-MM-DD>/part-*.parquet
+    plus a per-symbol "latest snapshot" file (<root>/latest/<SYMBOL>.arrow, Arrow IPC).
+
+    - append_snapshot() buffers rows in memory per (symbol, date); buffers are
+      written as one Parquet file when they reach flush_rows, or on flush()/close().
+      The latest-snapshot file is replaced atomically on every append that is
+      newer than it, so latest() is one small read regardless of history size.
+    - scan() only opens the date partitions in the requested range and pushes the
+      timestamp range (and any extra filter) down to Parquet row-group statistics.
+    """
+
+    def __init__(self, root: str = HISTORY_DIR, flush_rows: int = 50_000,
+                 row_group_size: int = 64_000, compression: str = "zstd"):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._buffers: Dict[tuple, List] = {}   # (symbol, date) -> [pa.Table, ...]
+        self._buffered_rows = 0
+        self._latest_ts: Dict[str, datetime] = {}
+        self.rows_written = 0
+        self.files_written = 0
+
+    # --- paths ---
+
+    def _partition_dir(self, symbol: str, day: date) -> str:
+        return os.path.join(self.root, "chain", f"symbol={symbol}", f"date={day.isoformat()}")
+
+    def _latest_path(self, symbol: str) -> str:
+        return os.path.join(self.root, "latest", f"{symbol}.arrow")
+
+    # --- writes ---
+
+    def _to_table(self, chain, spot, timestamp, vix=None, expiry=None):
+        import numpy as np
+        import pyarrow as pa
+        schema = history_schema()
+        n = len(chain)
+        columns = {
+            "timestamp": pa.array(np.full(n, np.datetime64(timestamp, "us")), pa.timestamp("us")),
+            "spot": pa.array(np.full(n, spot, dtype=float)),
+            "vix": pa.array([vix] * n, pa.float64()),
+            "expiry": pa.array([expiry.date() if isinstance(expiry, datetime) else expiry] * n, pa.date32()),
+        }
+        for field in schema:
+            if field.name in columns:
+                continue
+            if field.name in chain:
+                values = chain[field.name]
+                if pa.types.is_integer(field.type):
+                    # NaN (no data yet) becomes null rather than failing the cast
+                    values = values.astype("Int64")
+                columns[field.name] = pa.array(values, type=field.type, from_pandas=True)
+            else:
+                columns[field.name] = pa.nulls(n, field.type)
+        return pa.table(columns, schema=schema)
+
+    def append_snapshot(self, symbol: str, chain, spot: float, timestamp: datetime = None,
+                        vix: float = None, expiry=None):
+        """
+        Buffers one chain snapshot (DataFrame with a 'strike' column and any of the
+        per-leg columns, e.g. ce_ltp/pe_iv/ce_oi) and updates the latest-snapshot file.
+        """
+        timestamp = timestamp or datetime.now()
+        table = self._to_table(chain, spot, timestamp, vix, expiry)
+        if symbol not in self._latest_ts:
+            current = self.latest(symbol)
+            self._latest_ts[symbol] = current["timestamp"].iloc[0] if current is not None and len(current) else None
+        # Backfills (older timestamps) never replace the latest snapshot
+        if self._latest_ts[symbol] is None or timestamp >= self._latest_ts[symbol]:
+            self._write_latest(symbol, table)
+            self._latest_ts[symbol] = timestamp
+        with self._lock:
+            self._buffers.setdefault((symbol, timestamp.date()), []).append(table)
+            self._buffered_rows += table.num_rows
+            should_flush = self._buffered_rows >= self.flush_rows
+        if should_flush:
+            self.flush()
+
+    def _write_latest(self, symbol: str, table):
+        import pyarrow.ipc as ipc
+        path = self._latest_path(symbol)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with ipc.new_file(tmp_path, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def flush(self):
+        """Writes every buffered (symbol, date) partition as one sorted Parquet file."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+            self._buffered_rows = 0
+        for (symbol, day), tables in buffers.items():
+            table = pa.concat_tables(tables).sort_by([("timestamp", "ascending"), ("strike", "ascending")])
+            directory = self._partition_dir(symbol, day)
+            os.makedirs(directory, exist_ok=True)
+            first = table.column("timestamp")[0].as_py()
+            path = os.path.join(directory, f"part-{first:%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet")
+            tmp_path = path + ".tmp"
+            pq.write_table(table, tmp_path, row_group_size=self.row_group_size,
+                           compression=self.compression, write_statistics=True)
+            os.replace(tmp_path, path)
+            self.rows_written += table.num_rows
+            self.files_written += 1
+
+    def close(self):
+        self.flush()
+
+    def compact(self, symbol: str, day: date) -> Optional[str]:
+        """Merges one day's part files into a single sorted file (fewer, larger row groups)."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        directory = self._partition_dir(symbol, day)
+        parts = sorted(glob.glob(os.path.join(directory, "part-*.parquet")))
+        if len(parts) < 2:
+            return parts[0] if parts else None
+        table = pa.concat_tables([pq.read_table(p, schema=history_schema()) for p in parts])
+        table = table.sort_by([("timestamp", "ascending"), ("strike", "ascending")])
+        first = table.column("timestamp")[0].as_py()
+        path = os.path.join(directory, f"part-{first:%H%M%S%f}-c{uuid.uuid4().hex[:7]}.parquet")
+        pq.write_table(table, path + ".tmp", row_group_size=self.row_group_size,
+                       compression=self.compression, write_statistics=True)
+        os.replace(path + ".tmp", path)
+        for p in parts:
+            os.remove(p)
+        return path
+
+    # --- reads ---
+
+    def latest(self, symbol: str):
+        """Most recent snapshot for symbol as a DataFrame (one row per strike), or None."""
+        import pyarrow.ipc as ipc
+        path = self._latest_path(symbol)
+        if not os.path.exists(path):
+            return None
+        with ipc.open_file(path) as reader:
+            return reader.read_all().to_pandas()
+
+    def scan(self, symbol: str, start: datetime, end: datetime, columns: List[str] = None,
+             where=None):
+        """
+        Rows with start <= timestamp < end as a DataFrame.
+        `where` is an optional pyarrow.compute expression (e.g. pc.field("strike") == 22000)
+        combined with the time range and pushed down to the Parquet reader.
+        Buffered (unflushed) rows are not included.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+        files = []
+        day = start.date()
+        while day <= end.date():
+            files.extend(sorted(glob.glob(os.path.join(self._partition_dir(symbol, day), "part-*.parquet"))))
+            day += timedelta(days=1)
+        if not files:
+            return history_schema().empty_table().to_pandas()
+        dataset = ds.dataset(files, format="parquet", schema=history_schema())
+        ts = pc.field("timestamp")
+        expr = (ts >= pa.scalar(start, pa.timestamp("us"))) & (ts < pa.scalar(end, pa.timestamp("us")))
+        if where is not None:
+            expr = expr & where
+        return dataset.to_table(columns=columns, filter=expr).to_pandas()
+
+    def dates(self, symbol: str) -> List[date]:
+        """Partition dates present on disk for symbol."""
+        pattern = os.path.join(self.root, "chain", f"symbol={symbol}", "date=*")
+        return sorted(date.fromisoformat(os.path.basename(p)[5:]) for p in glob.glob(pattern))
+
+    def stats(self) -> Dict[str, int]:
+        return {"rows_written": self.rows_written, "files_written": self.files_written,
+                "buffered_rows": self._buffered_rows}
+
+def import_csv_log(csv_path: str = LEGACY_CSV, symbol: str = "NIFTY", store: "MarketHistoryStore" = None) -> int:
+    """One-off migration of the legacy option_chain_log.csv into the store; returns rows imported."""
+    import pandas as pd
+    store = store or history_store
+    if not os.path.exists(csv_path):
+        return 0
+    df = pd.read_csv(csv_path, parse_dates=["timestamp"])
+    df = df.rename(columns={"ce_last_price": "ce_ltp", "pe_last_price": "pe_ltp"})
+    for timestamp, snap in df.groupby("timestamp", sort=True):
+        store.append_snapshot(symbol, snap, float(snap["spot"].iloc[0]), timestamp.to_pydatetime())
+    store.flush()
+    return len(df)
+
+history_store = MarketHistoryStore()
+
+if __name__ == "__main__":
+    rows = import_csv_log()
+    print(f"Imported {rows} rows from {LEGACY_CSV} into {history_store.root}")
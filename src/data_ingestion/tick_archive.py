@@ -0,0 +1,276 @@
+import os
+import mmap
+import glob
+import zlib
+import struct
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+
+ARCHIVE_DIR = os.path.join(os.getcwd(), 'data', 'market_history', 'ticks')
+
+# Fixed-width little-endian record (64 bytes, 8-byte aligned fields)
+TICK_DTYPE = np.dtype([
+    ("ts_us", "<i8"),      # microseconds since epoch
+    ("strike", "<f8"),
+    ("spot", "<f8"),
+    ("ce_ltp", "<f8"),
+    ("pe_ltp", "<f8"),
+    ("ce_iv", "<f4"),
+    ("pe_iv", "<f4"),
+    ("ce_oi", "<i8"),
+    ("pe_oi", "<i8"),
+])
+
+# Segment header: magic, payload bytes, payload crc32, record count, first ts, last ts
+SEGMENT_MAGIC = 0x314B5354  # b"TSK1"
+SEGMENT_HEADER = struct.Struct("<IIIIqq")
+assert SEGMENT_HEADER.size % 8 == 0 and TICK_DTYPE.itemsize % 8 == 0
+
+def to_ts_us(ts) -> int:
+    return int(np.datetime64(ts, "us").astype(np.int64))
+
+def from_ts_us(ts_us) -> datetime:
+    return np.datetime64(int(ts_us), "us").astype(datetime)
+
+def _scan_segments(buf, size: int, verify_last: bool = True):
+    """
+    Walks the length-prefixed segments of an archive buffer.
+    Returns (sparse index array, valid byte length). Scanning stops at the
+    first incomplete or corrupt segment (a torn tail write); everything
+    before it is intact. Writers never emit empty segments, so a zero-count
+    header (e.g. zero-filled tail) counts as corrupt.
+    """
+    entries = []
+    offset = 0
+    while offset + SEGMENT_HEADER.size <= size:
+        magic, nbytes, crc, count, first_ts, last_ts = SEGMENT_HEADER.unpack_from(buf, offset)
+        payload = offset + SEGMENT_HEADER.size
+        if (magic != SEGMENT_MAGIC or count == 0 or nbytes != count * TICK_DTYPE.itemsize
+                or payload + nbytes > size or first_ts > last_ts):
+            break
+        entries.append((payload, count, first_ts, last_ts, crc))
+        offset = payload + nbytes
+    # Only the last segment can be torn by a crash mid-append; check its checksum
+    if entries and verify_last:
+        payload, count, _, _, crc = entries[-1]
+        if zlib.crc32(buf[payload:payload + count * TICK_DTYPE.itemsize]) != crc:
+            entries.pop()
+            offset = entries[-1][0] + entries[-1][1] * TICK_DTYPE.itemsize if entries else 0
+    index = np.array([e[:4] for e in entries], dtype=np.int64).reshape(-1, 4)
+    return index, offset
+
+class TickArchiveWriter:
+    """
+    Append-only writer for one archive file. Records are buffered and written
+    as one segment per flush ([32-byte header][records]); the header carries the
+    payload length, record count, crc32 and time range. Opening an existing file
+    truncates any torn tail segment left by a crash, so earlier data is never lost.
+    """
+
+    def __init__(self, path: str, flush_records: int = 4096, fsync: bool = True):
+        self.path = path
+        self.flush_records = flush_records
+        self.fsync = fsync
+        self._buffer: List[np.ndarray] = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a+b")
+        self._recover()
+
+    def _recover(self):
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+        if size == 0:
+            return
+        with mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) as buf:
+            _, valid = _scan_segments(buf, size)
+        if valid < size:
+            self._file.truncate(valid)
+            self._file.flush()
+
+    def append(self, records: np.ndarray):
+        """Buffers records (TICK_DTYPE structured array); flushes once flush_records are pending."""
+        records = np.asarray(records, dtype=TICK_DTYPE)
+        if not len(records):
+            return
+        with self._lock:
+            self._buffer.append(records)
+            self._buffered += len(records)
+            should_flush = self._buffered >= self.flush_records
+        if should_flush:
+            self.flush()
+
+    def append_snapshot(self, timestamp: datetime, spot: float, chain):
+        """Buffers one chain snapshot (DataFrame with strike and any of ce/pe ltp, iv, oi)."""
+        records = np.zeros(len(chain), dtype=TICK_DTYPE)
+        records["ts_us"] = to_ts_us(timestamp)
+        records["spot"] = spot
+        for name in TICK_DTYPE.names[3:]:
+            integer = TICK_DTYPE[name].kind == "i"
+            if name not in chain:
+                # Missing float fields are NaN; missing OI stays 0
+                if not integer:
+                    records[name] = np.nan
+                continue
+            values = np.asarray(chain[name], dtype=float)
+            records[name] = np.nan_to_num(values, nan=0.0) if integer else values
+        records["strike"] = np.asarray(chain["strike"], dtype=float)
+        self.append(records)
+
+    def flush(self):
+        with self._lock:
+            if not self._buffer:
+                return
+            records = np.concatenate(self._buffer)
+            self._buffer, self._buffered = [], 0
+            if not len(records):
+                return
+            # Sorted within a segment so readers can binary-search it
+            records = records[np.argsort(records["ts_us"], kind="stable")]
+            payload = records.tobytes()
+            header = SEGMENT_HEADER.pack(SEGMENT_MAGIC, len(payload), zlib.crc32(payload), len(records),
+                                         int(records["ts_us"][0]), int(records["ts_us"][-1]))
+            self._file.write(header + payload)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TickArchiveReader:
+    """
+    Memory-maps an archive file. Each segment is exposed as a zero-copy NumPy
+    structured array view over the map; the segment headers form a sparse time
+    index (payload offset, count, first/last ts) used to seek without touching
+    record data. Only complete, valid segments are visible.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) if size else None
+        self.index, self.valid_bytes = _scan_segments(self._map, size) if size else (np.zeros((0, 4), np.int64), 0)
+
+    def __len__(self) -> int:
+        return int(self.index[:, 1].sum())
+
+    @property
+    def segments(self) -> int:
+        return len(self.index)
+
+    def segment(self, i: int) -> np.ndarray:
+        """Zero-copy view of segment i."""
+        offset, count = int(self.index[i, 0]), int(self.index[i, 1])
+        return np.frombuffer(self._map, dtype=TICK_DTYPE, count=count, offset=offset)
+
+    def iter_range(self, start: datetime = None, end: datetime = None) -> Iterator[np.ndarray]:
+        """Zero-copy views of the records with start <= ts < end, one per overlapping segment."""
+        lo = to_ts_us(start) if start else np.iinfo(np.int64).min
+        hi = to_ts_us(end) if end else np.iinfo(np.int64).max
+        overlapping = np.nonzero((self.index[:, 3] >= lo) & (self.index[:, 2] < hi))[0]
+        for i in overlapping:
+            view = self.segment(i)
+            ts = view["ts_us"]
+            a = np.searchsorted(ts, lo, side="left") if ts[0] < lo else 0
+            b = np.searchsorted(ts, hi, side="left") if ts[-1] >= hi else len(view)
+            if b > a:
+                yield view[a:b]
+
+    def read(self, start: datetime = None, end: datetime = None) -> np.ndarray:
+        """
+        Records in [start, end) as one array (a view when they fall in one segment).
+        The result outlives the reader: `with TickArchiveReader(p) as r: data = r.read()` is safe.
+        """
+        parts = list(self.iter_range(start, end))
+        if not parts:
+            return np.zeros(0, dtype=TICK_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def close(self):
+        """
+        Releases the map. Views already handed out stay valid: while any are alive
+        the map cannot be closed, so it is dropped and unmapped by the garbage
+        collector with the last view.
+        """
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TickArchive:
+    """
+    Per-symbol, per-day archive files: <root>/<SYMBOL>/<YYYY-MM-DD>.ticks.
+    Writers are kept open per (symbol, day) so appends from a long-running
+    logger share one file handle.
+    """
+
+    def __init__(self, root: str = ARCHIVE_DIR, flush_records: int = 4096):
+        self.root = root
+        self.flush_records = flush_records
+        self._writers: Dict[Tuple[str, date], TickArchiveWriter] = {}
+        self._lock = threading.Lock()
+
+    def path(self, symbol: str, day: date) -> str:
+        return os.path.join(self.root, symbol, f"{day.isoformat()}.ticks")
+
+    def writer(self, symbol: str, day: date) -> TickArchiveWriter:
+        with self._lock:
+            key = (symbol, day)
+            if key not in self._writers:
+                self._writers[key] = TickArchiveWriter(self.path(symbol, day), self.flush_records)
+            return self._writers[key]
+
+    def append_snapshot(self, symbol: str, timestamp: datetime, spot: float, chain):
+        self.writer(symbol, timestamp.date()).append_snapshot(timestamp, spot, chain)
+
+    def flush(self):
+        with self._lock:
+            writers = list(self._writers.values())
+        for writer in writers:
+            writer.flush()
+
+    def close(self):
+        with self._lock:
+            writers, self._writers = list(self._writers.values()), {}
+        for writer in writers:
+            writer.close()
+
+    def read(self, symbol: str, start: datetime, end: datetime) -> np.ndarray:
+        """Records for symbol in [start, end); opens only the day files in range."""
+        parts = []
+        day = start.date()
+        while day <= end.date():
+            path = self.path(symbol, day)
+            if os.path.exists(path):
+                with TickArchiveReader(path) as reader:
+                    # Copy out before the map is closed
+                    parts.extend(np.array(p) for p in reader.iter_range(start, end))
+            day += timedelta(days=1)
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=TICK_DTYPE)
+
+    def days(self, symbol: str) -> List[date]:
+        return sorted(date.fromisoformat(os.path.basename(p)[:-6])
+                      for p in glob.glob(os.path.join(self.root, symbol, "*.ticks")))
+
+tick_archive = TickArchive()
@@ -0,0 +1,150 @@
+import json
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from src.integration.kite_ticker import pack_frame
+from src.quant_engine.greeks import calculate_greeks_batch
+
+logger = logging.getLogger(__name__)
+
+class TickReplayServer:
+    """
+    Local stand-in for the Kite WebSocket feed, for offline runs and tests.
+    Speaks the same protocol as the broker: accepts JSON subscribe/mode
+    messages and streams binary tick frames (only for subscribed tokens).
+    frames: list of tick batches (each a list of tick dicts), sent in order
+    every `interval` seconds; `loop=True` repeats them forever.
+    """
+
+    def __init__(self, frames, host="127.0.0.1", port=8765, interval=0.2, loop=False):
+        self.frames = frames
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.loop = loop
+        self._thread = None
+        self._event_loop = None
+        self._server = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def _handler(self, ws):
+        subscribed = set()
+
+        async def read_commands():
+            async for message in ws:
+                if isinstance(message, bytes):
+                    continue
+                try:
+                    cmd = json.loads(message)
+                except ValueError:
+                    continue
+                if cmd.get("a") == "subscribe":
+                    subscribed.update(int(t) for t in cmd.get("v", []))
+                elif cmd.get("a") == "unsubscribe":
+                    subscribed.difference_update(int(t) for t in cmd.get("v", []))
+
+        reader = asyncio.ensure_future(read_commands())
+        try:
+            while True:
+                for frame in self.frames:
+                    ticks = [t for t in frame if t["instrument_token"] in subscribed]
+                    # A 1-byte message is the protocol heartbeat
+                    await ws.send(pack_frame(ticks) if ticks else b"\x00")
+                    await asyncio.sleep(self.interval)
+                if not self.loop:
+                    break
+        except Exception as e:
+            logger.info(f"[Replay] Client disconnected: {e}")
+        finally:
+            reader.cancel()
+
+    def _run(self):
+        from websockets.asyncio.server import serve
+
+        self._event_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._event_loop)
+
+        async def main():
+            self._server = await serve(self._handler, self.host, self.port)
+            self._ready.set()
+            await self._server.wait_closed()
+
+        self._event_loop.run_until_complete(main())
+        self._event_loop.close()
+
+    def start(self):
+        """Starts serving in a daemon thread; returns once the socket is listening."""
+        self._thread = threading.Thread(target=self._run, name="tick-replay", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        return self
+
+    def stop(self):
+        if self._server and self._event_loop:
+            self._event_loop.call_soon_threadsafe(self._server.close)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+def demo_contracts(symbol="NIFTY", spot=22000.0, days_to_expiry=5, n_strikes=21, base=50):
+    """
+    Nearest-expiry contract table (get_option_chain_data layout) for demo runs
+    without a broker session: n_strikes CE/PE pairs around the ATM strike.
+    Tokens are made up but never fall in the indices segment.
+    """
+    import pandas as pd
+    atm = round(spot / base) * base
+    strikes = atm + base * (np.arange(n_strikes) - n_strikes // 2)
+    expiry = (datetime.now() + timedelta(days=days_to_expiry)).replace(hour=15, minute=30, second=0, microsecond=0)
+    rows = []
+    for i, strike in enumerate(strikes.tolist()):
+        for j, side in enumerate(("CE", "PE")):
+            rows.append({
+                "instrument_token": ((900000 + 2 * i + j) << 8) | 2,
+                "strike": float(strike),
+                "instrument_type": side,
+                "tradingsymbol": f"{symbol}{expiry:%y%b}{int(strike)}{side}".upper(),
+                "expiry": expiry,
+            })
+    return pd.DataFrame(rows)
+
+def synthetic_frames(contracts, spot, vix, spot_token, vix_token, days_to_expiry=5,
+                     n_frames=100, dt_sec=1.0, seed=0):
+    """
+    Generates replayable tick batches for a set of option contracts.
+    Spot follows a GBM at the VIX level; option LTPs are Black-Scholes prices.
+    contracts: DataFrame with instrument_token, strike and instrument_type.
+    """
+    rng = np.random.default_rng(seed)
+    tokens = contracts['instrument_token'].to_numpy(dtype=np.int64)
+    strikes = contracts['strike'].to_numpy(dtype=float)
+    is_call = contracts['instrument_type'].to_numpy() == "CE"
+
+    sigma = vix / 100.0
+    step = sigma * np.sqrt(dt_sec / (365 * 24 * 3600))
+    path = spot * np.exp(np.cumsum(rng.normal(-0.5 * step ** 2, step, n_frames)))
+    start = datetime.now()
+
+    frames = []
+    for i, s in enumerate(path):
+        ts = start + timedelta(seconds=i * dt_sec)
+        prices = calculate_greeks_batch(s, strikes, days_to_expiry, vix, is_call)["price"]
+        prices = np.maximum(np.round(prices / 0.05) * 0.05, 0.05)  # NSE tick size
+        frame = [{"instrument_token": spot_token, "last_price": round(float(s), 2), "exchange_timestamp": ts},
+                 {"instrument_token": vix_token, "last_price": vix, "exchange_timestamp": ts}]
+        for token, price in zip(tokens.tolist(), prices.tolist()):
+            frame.append({
+                "instrument_token": token,
+                "last_price": price,
+                "oi": 1000000,
+                "exchange_timestamp": ts,
+                "depth": {"buy": [{"price": max(price - 0.05, 0.05), "quantity": 75}],
+                          "sell": [{"price": price + 0.05, "quantity": 75}]},
+            })
+        frames.append(frame)
+    return frames
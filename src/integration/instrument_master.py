@@ -0,0 +1,196 @@
+import os
+import glob
+import logging
+import threading
+from datetime import datetime
+import numpy as np
+from src.integration.kite_app import kite_client
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(os.getcwd(), 'data', 'instruments')
+
+# Columns kept from the Kite instrument dump, with their on-disk dtypes
+COLUMNS = {
+    "instrument_token": np.int64,
+    "exchange_token": np.int64,
+    "tradingsymbol": str,
+    "name": str,
+    "expiry": "datetime64[D]",
+    "strike": np.float64,
+    "tick_size": np.float64,
+    "lot_size": np.int64,
+    "instrument_type": str,
+    "segment": str,
+    "exchange": str,
+}
+
+class InstrumentMaster:
+    """
+    Process-wide cache of the Kite instrument dump for one exchange.
+    The dump is downloaded at most once per trading day and persisted as a
+    columnar .npz file; it is only loaded on first use. Lookups go through
+    pre-built dict indexes so symbol, token and contract resolution are O(1).
+    """
+
+    def __init__(self, exchange="NFO", cache_dir=CACHE_DIR, client=None):
+        self.exchange = exchange
+        self.cache_dir = cache_dir
+        self.client = client if client is not None else kite_client
+        self._lock = threading.Lock()
+        self._loaded_for = None
+        self._columns = {}
+        self._by_contract = {}
+        self._by_symbol = {}
+        self._by_token = {}
+        self._expiries = {}
+        self._lot_sizes = {}
+        self._by_expiry = {}
+
+    def _cache_path(self, day):
+        return os.path.join(self.cache_dir, f"{self.exchange}_{day.isoformat()}.npz")
+
+    def _ensure_loaded(self):
+        today = datetime.now().date()
+        if self._loaded_for == today:
+            return
+        with self._lock:
+            if self._loaded_for == today:
+                return
+            columns = self._read_cache(today)
+            if columns is None:
+                columns = self._download(today)
+            self._build_indexes(columns)
+            if len(columns["instrument_token"]):
+                self._loaded_for = today
+
+    def _read_cache(self, day):
+        path = self._cache_path(day)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                return {name: npz[name] for name in npz.files}
+        except Exception as e:
+            logger.warning(f"Corrupt instrument cache {path}, re-downloading: {e}")
+            return None
+
+    def _download(self, day):
+        import pandas as pd
+        print(f"--- [Instrument Master] Downloading {self.exchange} instrument dump ---")
+        instruments = self.client.get_instruments() or []
+        df = pd.DataFrame(instruments, columns=list(COLUMNS))
+
+        columns = {}
+        for name, dtype in COLUMNS.items():
+            col = df[name]
+            if dtype is str:
+                columns[name] = col.fillna("").astype(str).to_numpy(dtype=str)
+            elif dtype == "datetime64[D]":
+                columns[name] = pd.to_datetime(col, errors="coerce").to_numpy(dtype="datetime64[D]")
+            else:
+                columns[name] = col.fillna(0).to_numpy(dtype=dtype)
+
+        # Only persist real dumps; an empty one (no API access) is retried next call
+        if len(df):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._cache_path(day)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez_compressed(f, **columns)
+            os.replace(tmp_path, path)
+            # Drop dumps from previous days
+            for old in glob.glob(os.path.join(self.cache_dir, f"{self.exchange}_*.npz")):
+                if old != path:
+                    os.remove(old)
+            print(f"✅ Cached {len(df)} instruments to {path}")
+        return columns
+
+    def _build_indexes(self, columns):
+        self._columns = columns
+        by_contract, by_symbol, by_token = {}, {}, {}
+        expiries, lot_sizes, by_expiry = {}, {}, {}
+
+        names = columns["name"].tolist()
+        expiry = columns["expiry"].astype(object).tolist()  # datetime.date / None
+        strikes = columns["strike"].tolist()
+        types = columns["instrument_type"].tolist()
+        symbols = columns["tradingsymbol"].tolist()
+        tokens = columns["instrument_token"].tolist()
+        lots = columns["lot_size"].tolist()
+
+        for i, name in enumerate(names):
+            by_contract[(name, expiry[i], strikes[i], types[i])] = i
+            by_symbol[symbols[i]] = i
+            by_token[tokens[i]] = i
+            if expiry[i] is not None:
+                expiries.setdefault(name, set()).add(expiry[i])
+                by_expiry.setdefault((name, expiry[i]), []).append(i)
+            if lots[i] and name not in lot_sizes:
+                lot_sizes[name] = int(lots[i])
+
+        self._by_contract = by_contract
+        self._by_symbol = by_symbol
+        self._by_token = by_token
+        self._expiries = {name: sorted(days) for name, days in expiries.items()}
+        self._lot_sizes = lot_sizes
+        self._by_expiry = {key: np.asarray(rows, dtype=np.int64) for key, rows in by_expiry.items()}
+
+    def _row(self, i):
+        if i is None:
+            return None
+        return {name: col[i].item() for name, col in self._columns.items()}
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._columns.get("instrument_token", ()))
+
+    def lookup(self, name, expiry, strike, instrument_type):
+        """Returns the instrument row for a contract, or None."""
+        self._ensure_loaded()
+        if isinstance(expiry, datetime):
+            expiry = expiry.date()
+        return self._row(self._by_contract.get((name, expiry, float(strike), instrument_type)))
+
+    def by_tradingsymbol(self, tradingsymbol):
+        """Returns the instrument row for a trading symbol, or None."""
+        self._ensure_loaded()
+        return self._row(self._by_symbol.get(tradingsymbol))
+
+    def by_token(self, instrument_token):
+        """Returns the instrument row for an instrument token, or None."""
+        self._ensure_loaded()
+        return self._row(self._by_token.get(int(instrument_token)))
+
+    def get_expiries(self, name, from_date=None):
+        """
+        Returns sorted expiry dates for an underlying, optionally from a date onwards.
+        A datetime from_date compares against expiry midnight, so today's expiry is
+        excluded once the day has started (the chain builder never picks DTE 0).
+        """
+        self._ensure_loaded()
+        expiries = self._expiries.get(name, [])
+        if isinstance(from_date, datetime):
+            expiries = [e for e in expiries if e > from_date.date()]
+        elif from_date is not None:
+            expiries = [e for e in expiries if e >= from_date]
+        return expiries
+
+    def get_lot_size(self, name):
+        """Returns the lot size for an underlying, or None if unknown."""
+        self._ensure_loaded()
+        return self._lot_sizes.get(name)
+
+    def get_contracts(self, name, expiry):
+        """Returns all contracts for an underlying and expiry as a DataFrame."""
+        import pandas as pd
+        self._ensure_loaded()
+        if isinstance(expiry, datetime):
+            expiry = expiry.date()
+        rows = self._by_expiry.get((name, expiry), np.empty(0, dtype=np.int64))
+        df = pd.DataFrame({col: values[rows] for col, values in self._columns.items()})
+        df["expiry"] = pd.to_datetime(df["expiry"])
+        return df
+
+# Shared instance, loaded lazily on first lookup
+instrument_master = InstrumentMaster()
@@ -0,0 +1,129 @@
+import ast
+import json
+from typing import Any, List, Tuple
+
+class IncrementalJSONFields:
+    """
+    Extracts top-level fields of a JSON object from a text stream as soon as
+    each value is complete, without waiting for the closing brace.
+    Tolerates leading prose/markdown fences and single-quoted (Python-style)
+    keys and strings, which LLMs often emit.
+
+        parser = IncrementalJSONFields()
+        for chunk in stream:
+            for key, value in parser.feed(chunk):
+                ...
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0          # nesting depth; 1 = inside the top-level object
+        self._quote = None       # active string quote char, if inside a string
+        self._escape = False
+        self._state = "seek"     # seek -> key -> colon -> value -> (comma) -> key ...
+        self._token_start = None
+        self._key = None
+        self._done = False
+
+    @staticmethod
+    def _decode(raw: str) -> Any:
+        raw = raw.strip()
+        try:
+            return json.loads(raw)
+        except ValueError:
+            pass
+        try:
+            return ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            lowered = raw.lower()
+            if lowered in ("true", "false", "null", "none"):
+                return {"true": True, "false": False}.get(lowered)
+            return raw.strip("'\"")
+
+    def _emit(self, end: int, out: List[Tuple[str, Any]]):
+        value = self._decode(self._buf[self._token_start:end])
+        self.fields[self._key] = value
+        out.append((self._key, value))
+        self._key = None
+        self._token_start = None
+        self._state = "comma"
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consumes more text; returns the (key, value) pairs completed by it."""
+        out = []
+        if self._done:
+            return out
+        self._buf += chunk
+        buf = self._buf
+        i = self._pos
+
+        while i < len(buf):
+            c = buf[i]
+
+            if self._quote:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == self._quote:
+                    self._quote = None
+                    if self._depth == 1 and self._state == "key":
+                        self._key = self._decode(buf[self._token_start:i + 1])
+                        self._token_start = None
+                        self._state = "colon"
+                    elif self._depth == 1 and self._state == "value":
+                        self._emit(i + 1, out)
+                i += 1
+                continue
+
+            if self._state == "seek":
+                if c == "{":
+                    self._depth = 1
+                    self._state = "key"
+                i += 1
+                continue
+
+            if self._depth == 1 and self._state == "key":
+                if c in "\"'":
+                    self._quote = c
+                    self._token_start = i
+                elif c == "}":
+                    self._done = True
+                    break
+            elif self._depth == 1 and self._state == "colon":
+                if c == ":":
+                    self._state = "value"
+            elif self._depth == 1 and self._state == "comma":
+                if c == ",":
+                    self._state = "key"
+                elif c == "}":
+                    self._done = True
+                    break
+            elif self._state == "value":
+                if self._token_start is None:
+                    if c.isspace():
+                        i += 1
+                        continue
+                    self._token_start = i
+                if c in "\"'":
+                    self._quote = c
+                elif c in "{[":
+                    self._depth += 1
+                elif c in "}]":
+                    if self._depth == 1:
+                        # Bare scalar terminated by the closing brace
+                        self._emit(i, out)
+                        self._done = True
+                        break
+                    self._depth -= 1
+                    if self._depth == 1:
+                        self._emit(i + 1, out)
+                elif c == "," and self._depth == 1:
+                    self._emit(i, out)
+                    self._state = "key"
+            i += 1
+
+        self._pos = i
+        return out
@@ -1,6 +1,6 @@
 import os
 import logging
-from kiteconnect import KiteConnect
+from src.runtime.lazy import LazyProvider
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +17,7 @@ class KiteApp:
             self.kite = None
             return
 
+        from kiteconnect import KiteConnect
         self.kite = KiteConnect(api_key=self.api_key)
 
         if self.access_token:
@@ -44,6 +45,12 @@ class KiteApp:
             return {inst: {"last_price": 100.0, "oi": 50000} for inst in instruments}
         return self.kite.quote(instruments)
 
+    def get_positions(self):
+        """Net positions for the day (Kite 'net' list); None when there is no session."""
+        if not self.kite:
+            return None
+        return self.kite.positions().get("net", [])
+
     def place_order(self, symbol, transaction_type, quantity, price=None, order_type="MARKET"):
         """Places an order."""
         if not self.kite:
@@ -73,5 +80,5 @@ class KiteApp:
             return []
         return self.kite.instruments("NFO")
 
-# Singleton instance
-kite_client = KiteApp()
+# Singleton instance, created on first use (keeps kiteconnect out of import time)
+kite_client = LazyProvider(KiteApp, "kite")
@@ -0,0 +1,241 @@
+import os
+import time
+import struct
+import logging
+from datetime import datetime
+from src.data_ingestion.chain_book import get_chain_book
+
+logger = logging.getLogger(__name__)
+
+# Kite WebSocket binary protocol (see Kite Connect "WebSocket streaming" docs).
+# A frame is: [uint16 packet count] then per packet [uint16 length][payload].
+# All integers are big-endian; prices are in paise for NSE/NFO.
+MODE_LTP = "ltp"
+MODE_QUOTE = "quote"
+MODE_FULL = "full"
+SEGMENT_INDICES = 9
+PRICE_DIVISOR = 100.0
+
+def _segment(token):
+    return token & 0xff
+
+def _paise(price):
+    return int(round((price or 0) * PRICE_DIVISOR))
+
+def pack_tick(tick):
+    """
+    Encodes one tick dict as a Kite binary packet in FULL mode
+    (32 bytes for indices, 184 bytes for tradable instruments).
+    """
+    token = int(tick["instrument_token"])
+    ohlc = tick.get("ohlc", {})
+    ts = tick.get("exchange_timestamp") or tick.get("timestamp") or datetime.now()
+    epoch = int(ts.timestamp()) if isinstance(ts, datetime) else int(ts)
+
+    if _segment(token) == SEGMENT_INDICES:
+        return struct.pack(">iiiiiiii", token, _paise(tick.get("last_price")),
+                           _paise(ohlc.get("high")), _paise(ohlc.get("low")),
+                           _paise(ohlc.get("open")), _paise(ohlc.get("close")),
+                           _paise(tick.get("change", 0)), epoch)
+
+    packet = struct.pack(">iiiiiiiiiii", token, _paise(tick.get("last_price")),
+                         int(tick.get("last_traded_quantity", 0)),
+                         _paise(tick.get("average_traded_price")),
+                         int(tick.get("volume_traded", 0)),
+                         int(tick.get("total_buy_quantity", 0)),
+                         int(tick.get("total_sell_quantity", 0)),
+                         _paise(ohlc.get("open")), _paise(ohlc.get("high")),
+                         _paise(ohlc.get("low")), _paise(ohlc.get("close")))
+    last_trade = tick.get("last_trade_time")
+    last_trade = int(last_trade.timestamp()) if isinstance(last_trade, datetime) else epoch
+    packet += struct.pack(">iiiii", last_trade, int(tick.get("oi", 0)),
+                          int(tick.get("oi_day_high", 0)), int(tick.get("oi_day_low", 0)), epoch)
+
+    depth = tick.get("depth", {})
+    for side in ("buy", "sell"):
+        levels = list(depth.get(side, []))[:5]
+        levels += [{}] * (5 - len(levels))
+        for level in levels:
+            packet += struct.pack(">iiHxx", int(level.get("quantity", 0)),
+                                  _paise(level.get("price")), int(level.get("orders", 0)))
+    return packet
+
+def pack_frame(ticks):
+    """Encodes a list of tick dicts as one binary WebSocket message."""
+    packets = [pack_tick(t) for t in ticks]
+    body = b"".join(struct.pack(">H", len(p)) + p for p in packets)
+    return struct.pack(">H", len(packets)) + body
+
+def parse_frame(frame):
+    """
+    Decodes a binary WebSocket message into tick dicts with the same keys
+    KiteTicker emits (LTP, quote and full modes, indices and tradables).
+    A 1-byte message is a heartbeat and yields no ticks.
+    """
+    if len(frame) < 2:
+        return []
+
+    ticks = []
+    count = struct.unpack(">H", frame[0:2])[0]
+    offset = 2
+    for _ in range(count):
+        length = struct.unpack(">H", frame[offset:offset + 2])[0]
+        packet = frame[offset + 2:offset + 2 + length]
+        offset += 2 + length
+
+        token, raw_price = struct.unpack(">ii", packet[0:8])
+        tradable = _segment(token) != SEGMENT_INDICES
+        tick = {"tradable": tradable, "instrument_token": token,
+                "last_price": raw_price / PRICE_DIVISOR}
+
+        if length == 8:
+            tick["mode"] = MODE_LTP
+        elif length in (28, 32):
+            high, low, open_, close, change = struct.unpack(">iiiii", packet[8:28])
+            tick["mode"] = MODE_FULL if length == 32 else MODE_QUOTE
+            tick["ohlc"] = {"high": high / PRICE_DIVISOR, "low": low / PRICE_DIVISOR,
+                            "open": open_ / PRICE_DIVISOR, "close": close / PRICE_DIVISOR}
+            tick["change"] = change / PRICE_DIVISOR
+            if length == 32:
+                tick["exchange_timestamp"] = datetime.fromtimestamp(struct.unpack(">i", packet[28:32])[0])
+        elif length in (44, 184):
+            (ltq, atp, volume, buy_qty, sell_qty,
+             open_, high, low, close) = struct.unpack(">iiiiiiiii", packet[8:44])
+            tick["mode"] = MODE_FULL if length == 184 else MODE_QUOTE
+            tick.update({
+                "last_traded_quantity": ltq,
+                "average_traded_price": atp / PRICE_DIVISOR,
+                "volume_traded": volume,
+                "total_buy_quantity": buy_qty,
+                "total_sell_quantity": sell_qty,
+                "ohlc": {"open": open_ / PRICE_DIVISOR, "high": high / PRICE_DIVISOR,
+                         "low": low / PRICE_DIVISOR, "close": close / PRICE_DIVISOR},
+            })
+            if length == 184:
+                last_trade, oi, oi_high, oi_low, ts = struct.unpack(">iiiii", packet[44:64])
+                tick.update({
+                    "last_trade_time": datetime.fromtimestamp(last_trade),
+                    "oi": oi, "oi_day_high": oi_high, "oi_day_low": oi_low,
+                    "exchange_timestamp": datetime.fromtimestamp(ts),
+                })
+                depth = {"buy": [], "sell": []}
+                for i in range(10):
+                    qty, price, orders = struct.unpack(">iiHxx", packet[64 + i * 12:76 + i * 12])
+                    side = "buy" if i < 5 else "sell"
+                    depth[side].append({"quantity": qty, "price": price / PRICE_DIVISOR, "orders": orders})
+                tick["depth"] = depth
+        ticks.append(tick)
+    return ticks
+
+class TickStream:
+    """
+    Feeds a ChainBook from the Kite WebSocket ticker.
+    Pass `root` (e.g. a TickReplayServer url) to stream from a local replay
+    server instead of the broker feed.
+    """
+
+    def __init__(self, book, api_key=None, access_token=None, root=None):
+        self.book = book
+        self.api_key = api_key or os.environ.get("KITE_API_KEY", "replay")
+        self.access_token = access_token or os.environ.get("KITE_ACCESS_TOKEN", "replay")
+        self.root = root
+        self.ticker = None
+        self.server = None  # TickReplayServer owned by this stream (demo feed)
+
+    def start(self):
+        """Connects in a background thread and subscribes all book tokens in FULL mode."""
+        from kiteconnect import KiteTicker
+
+        kwargs = {"root": self.root} if self.root else {}
+        self.ticker = KiteTicker(self.api_key, self.access_token, **kwargs)
+
+        def on_connect(ws, response):
+            tokens = self.book.tokens()
+            ws.subscribe(tokens)
+            ws.set_mode(ws.MODE_FULL, tokens)
+            logger.info(f"[Ticker] Subscribed {len(tokens)} tokens for {self.book.symbol}")
+
+        def on_ticks(ws, ticks):
+            self.book.apply_ticks(ticks)
+
+        def on_error(ws, code, reason):
+            logger.error(f"[Ticker] Error {code}: {reason}")
+
+        self.ticker.on_connect = on_connect
+        self.ticker.on_ticks = on_ticks
+        self.ticker.on_error = on_error
+        self.ticker.connect(threaded=True)
+        return self
+
+    def wait_fresh(self, timeout=15.0, poll_sec=0.1):
+        """Blocks until the book has fresh spot, VIX and ticks; False on timeout."""
+        deadline = time.monotonic() + timeout
+        while not self.book.is_fresh():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_sec)
+        return True
+
+    def stop(self):
+        if self.ticker:
+            self.ticker.close()
+            self.ticker = None
+        if self.server:
+            self.server.stop()
+            self.server = None
+
+def start_chain_stream(symbol="NIFTY", root=None, contracts=None):
+    """
+    Loads the nearest-expiry contracts for `symbol` into its shared ChainBook
+    and starts streaming ticks into it. Returns the running TickStream.
+    """
+    if contracts is None:
+        from src.quant_engine.option_chain_builder import get_option_chain_data
+        contracts = get_option_chain_data(symbol)
+    book = get_chain_book(symbol)
+    book.load_contracts(contracts)
+    return TickStream(book, root=root).start()
+
+# Running streams, one per underlying
+chain_streams = {}
+
+def start_replay_stream(symbol="NIFTY", spot=None, vix=None, days_to_expiry=5):
+    """
+    Demo feed: serves synthetic ticks for a made-up nearest-expiry chain from a
+    local TickReplayServer and streams them into the symbol's ChainBook.
+    """
+    from src.data_ingestion.tick_replay import TickReplayServer, demo_contracts, synthetic_frames
+    spot, vix = spot or 22000.0, vix or 15.0
+    book = get_chain_book(symbol)
+    contracts = demo_contracts(symbol, spot, days_to_expiry)
+    frames = synthetic_frames(contracts, spot, vix, book.spot_token, book.vix_token, days_to_expiry)
+    server = TickReplayServer(frames, port=int(os.environ.get("TICK_REPLAY_PORT", 8765)), loop=True).start()
+    stream = start_chain_stream(symbol, root=server.url, contracts=contracts)
+    stream.server = server
+    return stream
+
+def ensure_chain_stream(symbol="NIFTY", feed="kite", spot=None, vix=None):
+    """
+    Starts the symbol's chain stream once per process and returns it.
+    feed: 'kite' (broker WebSocket) or 'replay' (synthetic demo ticks).
+    Returns None, with the reason logged, when the feed cannot be started.
+    """
+    stream = chain_streams.get(symbol)
+    if stream is not None:
+        return stream
+    try:
+        if feed == "replay":
+            stream = start_replay_stream(symbol, spot, vix)
+        elif feed == "kite":
+            stream = start_chain_stream(symbol)
+        else:
+            raise ValueError(f"Unknown tick feed '{feed}' (expected 'kite' or 'replay')")
+    except Exception as e:
+        logger.error(f"[Ticker] Could not start {feed} stream for {symbol}: {e}")
+        return None
+    chain_streams[symbol] = stream
+    return stream
+
+def stop_chain_streams():
+    for symbol in list(chain_streams):
+        chain_streams.pop(symbol).stop()
@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+CACHE_FILE = os.path.join(os.getcwd(), 'data', 'llm_cache.sqlite')
+
+# Modes (env LLM_CACHE_MODE):
+#   off    - never read or write the cache (default: live agents always see fresh replies)
+#   cache  - read-through: serve hits younger than LLM_CACHE_TTL, store new responses (dev)
+#   record - always call the LLM, store every response (builds a replay set)
+#   replay - serve only from the cache, ignoring TTL; a miss never calls the LLM
+MODES = ("off", "cache", "record", "replay")
+
+def prompt_fingerprint(provider: str, model: str, system_prompt: str, user_prompt: str, params: dict) -> str:
+    """Stable hash of everything that determines an LLM response."""
+    payload = json.dumps({
+        "provider": provider,
+        "model": model,
+        "system": system_prompt,
+        "user": user_prompt,
+        "params": params,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    SQLite-backed LLM response store with TTL and size-bounded (LRU) eviction.
+    Safe to share across threads; WAL mode keeps reads from blocking writes.
+    """
+
+    def __init__(self, path: str = CACHE_FILE, ttl_sec: float = 900, max_entries: int = 5000):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL, provider TEXT, model TEXT,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, ignore_ttl: bool = False) -> Optional[str]:
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or (not ignore_ttl and now - row[1] > self.ttl_sec):
+                self.misses += 1
+                return None
+            db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str, provider: str = None, model: str = None):
+        with self._lock:
+            db = self._db()
+            now = time.time()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, provider, model, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, provider, model, now, now),
+            )
+            # Evict least recently used rows beyond the size bound
+            db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db().execute("DELETE FROM responses")
+            self._db().commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._db().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+llm_cache = LLMResponseCache(
+    ttl_sec=float(os.environ.get("LLM_CACHE_TTL", 900)),
+    max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 5000)),
+)
+
+def cache_mode() -> str:
+    mode = os.environ.get("LLM_CACHE_MODE", "off").lower()
+    return mode if mode in MODES else "off"
+
+def lookup(key: str) -> Optional[str]:
+    """Returns a cached response for the current mode, or None if the LLM must be called."""
+    mode = cache_mode()
+    if mode in ("off", "record"):
+        return None
+    return llm_cache.get(key, ignore_ttl=(mode == "replay"))
+
+def store(key: str, response: str, provider: str, model: str):
+    """Stores a successful response unless caching is off. Error strings are never cached."""
+    if cache_mode() == "off" or response is None or response.startswith("Error"):
+        return
+    llm_cache.put(key, response, provider, model)
+
+def replay_miss_message(key: str) -> str:
+    return f"Error calling LLM: replay mode cache miss ({key[:12]})"
@@ -1,47 +1,64 @@
 import os
-from openai import OpenAI
-from typing import Optional
+import time
+import random
+import asyncio
+import weakref
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
 from dotenv import load_dotenv
+from src.integration import llm_cache
+from src.integration.json_stream import IncrementalJSONFields
+from src.runtime.lazy import LazyProvider
 
 load_dotenv()
 
-# Initialize clients
-client_openai = None
-client_groq = None
+# Sampling temperature; set LLM_TEMPERATURE=0 for reproducible runs
+DEFAULT_TEMPERATURE = float(os.environ.get("LLM_TEMPERATURE", 0.7))
+# Return streamed responses as soon as the decision fields arrive (LLM_EARLY_EXIT=0 to disable)
+EARLY_EXIT = os.environ.get("LLM_EARLY_EXIT", "1") != "0"
+
+# Clients are created on first use (the openai SDK import is deferred with them)
 
 # 1. Setup OpenAI
-try:
-    if os.environ.get("OPENAI_API_KEY"):
-        client_openai = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-        print("✅ [LLM Client] OpenAI Client Initialized Successfully")
-    else:
+def _init_openai():
+    try:
+        if os.environ.get("OPENAI_API_KEY"):
+            from openai import OpenAI
+            client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+            print("✅ [LLM Client] OpenAI Client Initialized Successfully")
+            return client
         print("❌ [LLM Client] OPENAI_API_KEY not found in environment")
-except Exception as e:
-    print(f"❌ [LLM Client] OpenAI Client Init Failed: {e}")
+    except Exception as e:
+        print(f"❌ [LLM Client] OpenAI Client Init Failed: {e}")
+    return None
 
 # 2. Setup Groq (for Llama 3)
-try:
-    if os.environ.get("GROQ_API_KEY"):
-        client_groq = OpenAI(
-            base_url="https://api.groq.com/openai/v1",
-            api_key=os.environ.get("GROQ_API_KEY")
-        )
-        print("✅ [LLM Client] Groq Client Initialized Successfully (Llama 3 Ready)")
-    else:
+def _init_groq():
+    try:
+        if os.environ.get("GROQ_API_KEY"):
+            from openai import OpenAI
+            client = OpenAI(
+                base_url=os.environ.get("GROQ_BASE_URL") or "https://api.groq.com/openai/v1",
+                api_key=os.environ.get("GROQ_API_KEY")
+            )
+            print("✅ [LLM Client] Groq Client Initialized Successfully (Llama 3 Ready)")
+            return client
         print("⚠️ [LLM Client] GROQ_API_KEY not found. Llama 3 requests will fallback to OpenAI.")
-except Exception as e:
-    print(f"❌ [LLM Client] Groq Client Init Failed: {e}")
+    except Exception as e:
+        print(f"❌ [LLM Client] Groq Client Init Failed: {e}")
+    return None
 
-def query_llm(system_prompt: str, user_prompt: str, model: str = None, provider: str = "openai") -> str:
-    """
-    Wrapper to call LLM APIs (OpenAI or Groq).
-    
-    Args:
-        system_prompt: The system instruction.
-        user_prompt: The user query.
-        model: Optional model name override.
-        provider: 'openai' or 'groq'.
-    """
+client_openai = LazyProvider(_init_openai, "openai")
+client_groq = LazyProvider(_init_groq, "groq")
+
+def _cache_key(system_prompt: str, user_prompt: str, model: str, provider: str, temperature: float) -> str:
+    """Fingerprint of the request as made (before any provider fallback)."""
+    requested_model = model or ASYNC_PROVIDERS.get(provider, ASYNC_PROVIDERS["openai"])["default_model"]
+    return llm_cache.prompt_fingerprint(provider, requested_model, system_prompt, user_prompt,
+                                        {"temperature": temperature})
+
+def _select_client(model: str, provider: str):
+    """Resolves (sync client, model) for a provider, falling back from Groq to OpenAI."""
     active_client = client_openai
     active_model = model
     
@@ -56,15 +73,39 @@ def query_llm(system_prompt: str, user_prompt: str, model: str = None, provider:
             active_client = client_openai
             # Do NOT use the llama model name for OpenAI, fallback to GPT default
             active_model = "gpt-4-turbo" 
-            
+
+    if not active_model:
+         active_model = "gpt-4-turbo"
+    return active_client, active_model
+
+def query_llm(system_prompt: str, user_prompt: str, model: str = None, provider: str = "openai",
+              temperature: float = None) -> str:
+    """
+    Wrapper to call LLM APIs (OpenAI or Groq).
+    Responses go through the prompt-fingerprint cache (see llm_cache, LLM_CACHE_MODE).
+    
+    Args:
+        system_prompt: The system instruction.
+        user_prompt: The user query.
+        model: Optional model name override.
+        provider: 'openai' or 'groq'.
+        temperature: Sampling temperature (defaults to LLM_TEMPERATURE / 0.7).
+    """
+    temperature = DEFAULT_TEMPERATURE if temperature is None else temperature
+    cache_key = _cache_key(system_prompt, user_prompt, model, provider, temperature)
+    cached = llm_cache.lookup(cache_key)
+    if cached is not None:
+        print(f"⚡ [LLM Client] Cache hit ({cache_key[:12]})")
+        return cached
+    if llm_cache.cache_mode() == "replay":
+        return llm_cache.replay_miss_message(cache_key)
+
+    active_client, active_model = _select_client(model, provider)
     if not active_client:
         error_msg = "❌ No LLM Client initialized. Check that API keys are set in .env file."
         print(error_msg)
         return f"Error: {error_msg}"
 
-    if not active_model:
-         active_model = "gpt-4-turbo"
-
     try:
         provider_name = "GROQ" if active_client == client_groq else "OPENAI"
         print(f"🔄 [LLM Client] Querying {provider_name}: {active_model}")
@@ -77,11 +118,12 @@ def query_llm(system_prompt: str, user_prompt: str, model: str = None, provider:
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            temperature=0.7
+            temperature=temperature
         )
         
         result = response.choices[0].message.content
         print(f"✅ [LLM Client] Received response ({len(result)} chars)")
+        llm_cache.store(cache_key, result, provider, active_model)
         return result
         
     except Exception as e:
@@ -91,6 +133,247 @@ def query_llm(system_prompt: str, user_prompt: str, model: str = None, provider:
         # Return error to prevent silent failures
         return f"Error calling LLM: {str(e)}"
 
+# Early-exited streams still being read in the background (full response for the cache and caller)
+_pending_stores = []
+_pending_lock = threading.Lock()
+
+def _finish_stream(stream, text: str, cache_key: str, provider: str, model: str,
+                   on_complete: Callable[[str], None] = None):
+    """Reads the rest of an early-exited stream, caches the complete response and hands it to on_complete."""
+    try:
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                text += delta
+        llm_cache.store(cache_key, text, provider, model)
+        if on_complete:
+            on_complete(text)
+    except Exception as e:
+        print(f"⚠️ [LLM Client] Could not finish stream: {e}")
+    finally:
+        stream.close()
+        with _pending_lock:
+            _pending_stores.remove(threading.current_thread())
+
+def wait_for_pending_stores(timeout: float = None) -> bool:
+    """Blocks until background stream reads have finished (cached, on_complete called); False on timeout."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with _pending_lock:
+        threads = list(_pending_stores)
+    for thread in threads:
+        thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    return not any(t.is_alive() for t in threads)
+
+def stream_llm(system_prompt: str, user_prompt: str, model: str = None, provider: str = "openai",
+               temperature: float = None, required: Tuple[str, ...] = (), early_exit: bool = None,
+               on_field: Callable[[str, Any], None] = None,
+               on_complete: Callable[[str], None] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Streaming variant of query_llm that parses the JSON answer as it arrives.
+    Top-level JSON fields are emitted (via on_field) as soon as their value is
+    complete. With early_exit, the call returns once every `required` field
+    has been seen, so callers can act before the rationale finishes; the rest
+    of the stream is read on a background thread, the complete response is
+    cached (so record/replay covers these calls) and passed to on_complete.
+    Returns (text received, parsed fields). Errors are returned in the text as
+    'Error calling LLM: ...' like query_llm.
+    """
+    temperature = DEFAULT_TEMPERATURE if temperature is None else temperature
+    early_exit = EARLY_EXIT if early_exit is None else early_exit
+    parser = IncrementalJSONFields()
+
+    def consume(text):
+        for key, value in parser.feed(text):
+            if on_field:
+                on_field(key, value)
+
+    # Full responses are shared with query_llm's cache
+    cache_key = _cache_key(system_prompt, user_prompt, model, provider, temperature)
+    cached = llm_cache.lookup(cache_key)
+    if cached is not None:
+        print(f"⚡ [LLM Client] Cache hit ({cache_key[:12]})")
+        consume(cached)
+        return cached, parser.fields
+    if llm_cache.cache_mode() == "replay":
+        return llm_cache.replay_miss_message(cache_key), {}
+
+    active_client, active_model = _select_client(model, provider)
+    if not active_client:
+        error_msg = "❌ No LLM Client initialized. Check that API keys are set in .env file."
+        print(error_msg)
+        return f"Error: {error_msg}", {}
+
+    text = ""
+    try:
+        provider_name = "GROQ" if active_client == client_groq else "OPENAI"
+        print(f"🔄 [LLM Client] Streaming {provider_name}: {active_model}")
+        start = time.perf_counter()
+        stream = active_client.chat.completions.create(
+            model=active_model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            stream=True
+        )
+
+        completed = True
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            text += delta
+            consume(delta)
+            if early_exit and required and all(f in parser.fields for f in required):
+                completed = False
+                break
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if completed:
+            print(f"✅ [LLM Client] Streamed response ({len(text)} chars, {elapsed_ms:.0f} ms)")
+            llm_cache.store(cache_key, text, provider, active_model)
+        else:
+            # Only complete responses are cached (a truncated one would poison query_llm hits),
+            # so the remainder is read off the caller's path. Not a daemon thread: a one-shot
+            # run still waits for the record to be written before the interpreter exits.
+            print(f"⚡ [LLM Client] Decision fields {list(required)} received after {elapsed_ms:.0f} ms, "
+                  "finishing the stream in the background")
+            finisher = threading.Thread(target=_finish_stream, name="llm-stream-finish",
+                                        args=(stream, text, cache_key, provider, active_model, on_complete))
+            with _pending_lock:
+                _pending_stores.append(finisher)
+            finisher.start()
+        return text, parser.fields
+
+    except Exception as e:
+        print(f"❌ Error streaming LLM ({active_model}): {str(e)}")
+        print(f"   Error Type: {type(e).__name__}")
+        return f"Error calling LLM: {str(e)}", parser.fields
+
 def mock_query_llm(system_prompt: str, user_prompt: str) -> str:
     """Fallback for testing without API keys."""
     return f"[MOCK LLM RESPONSE] Based on {user_prompt[:20]}... Strategy looks good."
+
+# --- Async client ---
+# Each provider gets one pooled HTTP client and one concurrency semaphore per
+# event loop (asyncio primitives and httpx pools cannot be shared across loops).
+
+ASYNC_PROVIDERS = {
+    "openai": {
+        "api_key_env": "OPENAI_API_KEY",
+        "base_url_env": "OPENAI_BASE_URL",
+        "base_url": None,
+        "default_model": "gpt-4-turbo",
+        "max_concurrency": 8,
+    },
+    "groq": {
+        "api_key_env": "GROQ_API_KEY",
+        "base_url_env": "GROQ_BASE_URL",
+        "base_url": "https://api.groq.com/openai/v1",
+        "default_model": "llama-3.3-70b-versatile",
+        "max_concurrency": 4,
+    },
+}
+
+# Status codes worth retrying (rate limit and transient server errors)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_async_state = weakref.WeakKeyDictionary()  # event loop -> {provider: (client, semaphore)}
+
+def _async_provider(provider: str):
+    """Returns (AsyncOpenAI client, semaphore) for a provider on the running loop, or None."""
+    loop = asyncio.get_running_loop()
+    state = _async_state.setdefault(loop, {})
+    if provider not in state:
+        cfg = ASYNC_PROVIDERS[provider]
+        api_key = os.environ.get(cfg["api_key_env"])
+        if not api_key:
+            state[provider] = None
+        else:
+            import httpx
+            from openai import AsyncOpenAI
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=cfg["max_concurrency"] * 2,
+                                    max_keepalive_connections=cfg["max_concurrency"]),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+            )
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=os.environ.get(cfg["base_url_env"]) or cfg["base_url"],
+                http_client=http_client,
+                max_retries=0,  # retries are handled below, with jitter and failover
+            )
+            state[provider] = (client, asyncio.Semaphore(cfg["max_concurrency"]))
+    return state[provider]
+
+def _is_retryable(error: Exception) -> bool:
+    from openai import APIConnectionError, APIStatusError, APITimeoutError
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+async def _acomplete(provider: str, model: str, system_prompt: str, user_prompt: str,
+                     temperature: float, max_attempts: int, base_delay: float) -> str:
+    client, semaphore = _async_provider(provider)
+    for attempt in range(1, max_attempts + 1):
+        try:
+            async with semaphore:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=temperature
+                )
+            return response.choices[0].message.content
+        except Exception as e:
+            if attempt == max_attempts or not _is_retryable(e):
+                raise
+            # Full jitter exponential backoff
+            delay = random.uniform(0, base_delay * 2 ** (attempt - 1))
+            print(f"⚠️ [LLM Client] {provider.upper()} {type(e).__name__}, retry {attempt}/{max_attempts - 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+async def aquery_llm(system_prompt: str, user_prompt: str, model: str = None, provider: str = "openai",
+                     temperature: float = None, max_attempts: int = 3, base_delay: float = 0.5) -> str:
+    """
+    Async counterpart of query_llm (shares its response cache).
+    Retries 429/5xx/connection errors with jittered backoff, then fails over to
+    the other provider (with its default model). Returns the same
+    'Error calling LLM: ...' string as query_llm if every provider fails.
+    """
+    temperature = DEFAULT_TEMPERATURE if temperature is None else temperature
+    cache_key = _cache_key(system_prompt, user_prompt, model, provider, temperature)
+    cached = llm_cache.lookup(cache_key)
+    if cached is not None:
+        print(f"⚡ [LLM Client] Cache hit ({cache_key[:12]})")
+        return cached
+    if llm_cache.cache_mode() == "replay":
+        return llm_cache.replay_miss_message(cache_key)
+
+    order = [provider] + [p for p in ASYNC_PROVIDERS if p != provider]
+    last_error = None
+
+    for i, active_provider in enumerate(order):
+        if _async_provider(active_provider) is None:
+            continue
+        # A requested model only applies to the requested provider
+        active_model = model if i == 0 and model else ASYNC_PROVIDERS[active_provider]["default_model"]
+        try:
+            print(f"🔄 [LLM Client] Async querying {active_provider.upper()}: {active_model}")
+            result = await _acomplete(active_provider, active_model, system_prompt, user_prompt,
+                                      temperature, max_attempts, base_delay)
+            print(f"✅ [LLM Client] Received response ({len(result)} chars)")
+            llm_cache.store(cache_key, result, active_provider, active_model)
+            return result
+        except Exception as e:
+            last_error = e
+            print(f"❌ Error calling LLM ({active_provider}/{active_model}): {e}")
+
+    if last_error is None:
+        error_msg = "❌ No LLM Client initialized. Check that API keys are set in .env file."
+        print(error_msg)
+        return f"Error: {error_msg}"
+    return f"Error calling LLM: {str(last_error)}"
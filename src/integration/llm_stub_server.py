@@ -0,0 +1,122 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubLLMServer:
+    """
+    Minimal OpenAI-compatible chat-completions server for offline runs and tests.
+    Point a provider at it with OPENAI_BASE_URL / GROQ_BASE_URL = server.base_url.
+    reply: fixed string, or callable(request_json) -> str.
+    fail_with: status codes returned, in order, for the first requests
+               (e.g. [429, 503] to exercise retries).
+    delay: seconds to sleep per request (to observe concurrency).
+    Requests with "stream": true get the reply as SSE chunks of chunk_chars
+    characters, chunk_delay seconds apart.
+    """
+
+    def __init__(self, reply='{"decision": "approved", "reason": "stub"}', fail_with=None,
+                 delay=0.0, chunk_chars=8, chunk_delay=0.0, host="127.0.0.1", port=0):
+        self.reply = reply
+        self.chunk_chars = chunk_chars
+        self.chunk_delay = chunk_delay
+        self.fail_with = list(fail_with or [])
+        self.delay = delay
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_concurrency = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_stream(self, model, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                step = max(1, server.chunk_chars)
+                pieces = [content[i:i + step] for i in range(0, len(content), step)]
+                try:
+                    for n, piece in enumerate(pieces + [None]):
+                        chunk = {
+                            "id": f"chatcmpl-stub-{server.requests}",
+                            "object": "chat.completion.chunk",
+                            "created": int(time.time()),
+                            "model": model,
+                            "choices": [{"index": 0,
+                                         "delta": {"content": piece} if piece is not None else {},
+                                         "finish_reason": None if piece is not None else "stop"}],
+                        }
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                        self.wfile.flush()
+                        if server.chunk_delay and piece is not None:
+                            time.sleep(server.chunk_delay)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client closed the stream early
+                    pass
+                self.close_connection = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.peak_concurrency = max(server.peak_concurrency, server.in_flight)
+                    status = server.fail_with.pop(0) if server.fail_with else 200
+                try:
+                    if server.delay:
+                        time.sleep(server.delay)
+                    if status != 200:
+                        self._send(status, {"error": {"message": f"stub error {status}", "type": "stub"}})
+                        return
+                    content = server.reply(request) if callable(server.reply) else server.reply
+                    if request.get("stream"):
+                        self._send_stream(request.get("model", "stub"), content)
+                        return
+                    self._send(200, {
+                        "id": f"chatcmpl-stub-{server.requests}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": request.get("model", "stub"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": content}}],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                    })
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
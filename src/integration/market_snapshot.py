@@ -0,0 +1,89 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# Underlying name -> Yahoo Finance ticker
+YAHOO_TICKERS = {
+    "NIFTY": "^NSEI",
+    "BANKNIFTY": "^NSEBANK",
+    "INDIA_VIX": "^INDIAVIX",
+}
+
+def fetch_yahoo_closes(tickers: List[str]) -> Dict[str, Optional[float]]:
+    """Latest close per ticker from one batched yfinance download (None if unavailable)."""
+    import pandas as pd
+    import yfinance as yf
+    data = yf.download(tickers, period="1d", group_by="ticker", threads=True,
+                       progress=False, auto_adjust=False)
+    closes = {}
+    for ticker in tickers:
+        try:
+            if isinstance(data.columns, pd.MultiIndex):
+                series = data[ticker]["Close"].dropna()
+            else:
+                series = data["Close"].dropna()
+        except KeyError:
+            series = []
+        closes[ticker] = round(float(series.iloc[-1]), 2) if len(series) else None
+    return closes
+
+class MarketSnapshotProvider:
+    """
+    Shared, short-lived snapshot of underlying quotes (spot, VIX).
+    All symbols are fetched together in one batched request and served from
+    memory for ttl_sec. Concurrent callers during a refresh wait for that
+    refresh instead of issuing their own, so one scanner pass costs at most
+    one network fetch per symbol.
+    """
+
+    def __init__(self, ttl_sec: float = 3.0, symbols: Dict[str, str] = YAHOO_TICKERS,
+                 fetcher: Callable[[List[str]], Dict[str, Optional[float]]] = fetch_yahoo_closes,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_sec = ttl_sec
+        self.symbols = dict(symbols)
+        self.fetcher = fetcher
+        self.clock = clock
+        self.fetches = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._fetched_at = None
+
+    def _fresh(self) -> bool:
+        return self._snapshot is not None and self.clock() - self._fetched_at < self.ttl_sec
+
+    def get(self, force: bool = False) -> Dict:
+        """
+        Returns {"NIFTY": float|None, "BANKNIFTY": ..., "INDIA_VIX": ..., "timestamp": datetime}.
+        """
+        with self._lock:
+            if not force and self._fresh():
+                self.hits += 1
+                return self._snapshot
+            tickers = list(self.symbols.values())
+            try:
+                closes = self.fetcher(tickers)
+            except Exception as e:
+                print(f"Error fetching market snapshot from yfinance: {e}")
+                closes = {}
+            self.fetches += 1
+            snapshot = {name: closes.get(ticker) for name, ticker in self.symbols.items()}
+            snapshot["timestamp"] = datetime.now()
+            # Failures are cached too, so a dead feed is not retried on every call within the TTL
+            self._snapshot = snapshot
+            self._fetched_at = self.clock()
+            return snapshot
+
+    def quote(self, name: str) -> Optional[float]:
+        return self.get().get(name)
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"fetches": self.fetches, "hits": self.hits}
+
+market_snapshot = MarketSnapshotProvider(ttl_sec=float(os.environ.get("MARKET_SNAPSHOT_TTL", 3)))
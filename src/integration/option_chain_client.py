@@ -1,12 +1,55 @@
 import datetime
 import pandas as pd
 import yfinance as yf
+from src.integration.market_snapshot import market_snapshot, YAHOO_TICKERS
+
+# Typed columns of a normalized option chain table (one row per strike)
+CHAIN_DTYPES = {
+    'strike': 'float64',
+    'tradingsymbol_ce': 'string',
+    'tradingsymbol_pe': 'string',
+    'ce_iv': 'float64',
+    'pe_iv': 'float64',
+    'ce_oi': 'int64',
+    'pe_oi': 'int64',
+    'ce_ltp': 'float64',
+    'pe_ltp': 'float64',
+}
+
+# yfinance option columns -> per-leg field name, and the default when missing
+LEG_FIELDS = {'impliedVolatility': 'iv', 'openInterest': 'oi', 'lastPrice': 'ltp'}
+LEG_DEFAULTS = {'iv': 15.0, 'oi': 0, 'ltp': 0.0}
+
+def normalize_chain(calls, puts, symbol, expiry_date):
+    """
+    Normalizes yfinance calls/puts frames into one typed chain table.
+    Does a single outer merge on strike; missing legs/columns get defaults
+    (IV 15%, OI 0, LTP 0) and trading symbols are generated column-wise.
+    """
+    legs = []
+    for side, df in (("ce", calls), ("pe", puts)):
+        leg = df.reindex(columns=['strike', *LEG_FIELDS]).drop_duplicates('strike')
+        leg = leg.rename(columns={src: f"{side}_{dst}" for src, dst in LEG_FIELDS.items()})
+        leg[f"{side}_iv"] = leg[f"{side}_iv"] * 100  # yfinance IV is a decimal
+        legs.append(leg)
+
+    chain = legs[0].merge(legs[1], on='strike', how='outer').sort_values('strike', ignore_index=True)
+    chain = chain.fillna({f"{side}_{field}": default
+                          for side in ("ce", "pe") for field, default in LEG_DEFAULTS.items()})
+
+    prefix = f"{symbol}{expiry_date.strftime('%d%b%y').upper()}"
+    strike_str = chain['strike'].astype(int).astype(str)
+    chain['tradingsymbol_ce'] = prefix + strike_str + "CE"
+    chain['tradingsymbol_pe'] = prefix + strike_str + "PE"
+
+    return chain[list(CHAIN_DTYPES)].astype(CHAIN_DTYPES)
 
 def fetch_option_chain(symbol="NIFTY"):
     """
     Fetches option chain data using yfinance.
     For NIFTY, uses ^NSEI ticker.
-    Returns a cleaned dictionary with option chain data.
+    Returns a cleaned dictionary with option chain data
+    ('chain' is a typed DataFrame, see CHAIN_DTYPES).
     """
     print(f"--- [Option Chain] Fetching data for {symbol} via yfinance ---")
     
@@ -42,61 +85,34 @@ def fetch_option_chain(symbol="NIFTY"):
         calls = opt_chain.calls
         puts = opt_chain.puts
         
-        # Get current spot price
-        spot_price = ticker.history(period="1d")['Close'].iloc[-1] if len(ticker.history(period="1d")) > 0 else 23500
+        # Get current spot price (shared snapshot, no extra history request)
+        spot_price = market_snapshot.quote(symbol if symbol in ticker_map else "NIFTY") or 23500
         print(f"Spot Price: {spot_price:.2f}")
         
-        # Merge calls and puts on strike
-        strikes_data = []
-        
-        # Get unique strikes from both calls and puts
-        all_strikes = sorted(set(calls['strike'].tolist() + puts['strike'].tolist()))
+        # Merge calls and puts on strike in one vectorized pass
+        chain = normalize_chain(calls, puts, symbol, expiry_date)
         
-        for strike in all_strikes:
-            # Get CE data
-            ce_data = calls[calls['strike'] == strike]
-            pe_data = puts[puts['strike'] == strike]
-            
-            # Generate trading symbols
-            expiry_str = expiry_date.strftime("%d%b%y").upper()
-            ce_symbol = f"{symbol}{expiry_str}{int(strike)}CE"
-            pe_symbol = f"{symbol}{expiry_str}{int(strike)}PE"
-            
-            strike_info = {
-                'strike': strike,
-                'tradingsymbol_ce': ce_symbol,
-                'tradingsymbol_pe': pe_symbol,
-                'ce_iv': ce_data['impliedVolatility'].iloc[0] * 100 if not ce_data.empty and 'impliedVolatility' in ce_data.columns else 15.0,
-                'pe_iv': pe_data['impliedVolatility'].iloc[0] * 100 if not pe_data.empty and 'impliedVolatility' in pe_data.columns else 15.0,
-                'ce_oi': ce_data['openInterest'].iloc[0] if not ce_data.empty and 'openInterest' in ce_data.columns else 0,
-                'pe_oi': pe_data['openInterest'].iloc[0] if not pe_data.empty and 'openInterest' in pe_data.columns else 0,
-                'ce_ltp': ce_data['lastPrice'].iloc[0] if not ce_data.empty and 'lastPrice' in ce_data.columns else 0,
-                'pe_ltp': pe_data['lastPrice'].iloc[0] if not pe_data.empty and 'lastPrice' in pe_data.columns else 0,
-            }
-            strikes_data.append(strike_info)
-        
-        print(f"✅ Fetched {len(strikes_data)} strikes from yfinance")
+        print(f"✅ Fetched {len(chain)} strikes from yfinance")
         
         return {
             "symbol": symbol,
             "expiry": current_expiry,
+            "spot_price": spot_price,
+            "chain": chain
         }
         
     except Exception as e:
         print(f"yfinance fetch failed: {e}")
         print("⚠️ Falling back to generated option chain data")
-        # Try to get spot from yfinance even if options fail
-        try:
-            ticker = yf.Ticker(ticker_map.get(symbol, "^NSEI"))
-            spot_price = ticker.history(period="1d")['Close'].iloc[-1]
+        # Try to get spot from the market snapshot even if options fail
+        spot_price = market_snapshot.quote(symbol if symbol in YAHOO_TICKERS else "NIFTY")
+        if spot_price:
             print(f"Got live spot for mock generation: {spot_price}")
-        except:
-            spot_price = None
             
         return generate_mock_chain(symbol, spot_price)
 
 import math
-from scipy.stats import norm
+from src.quant_engine.greeks import norm
 
 def black_scholes_price(S, K, T, r, sigma, option_type="CE"):
     """
@@ -123,20 +139,19 @@ def generate_mock_chain(symbol="NIFTY", spot_price=None):
     Uses live spot price and live VIX if available.
     """
     # 1. Get Live Spot Price
+    snapshot = market_snapshot.get()
     if spot_price is None:
-        try:
-            ticker = yf.Ticker("^NSEI")
-            spot_price = ticker.history(period="1d")['Close'].iloc[-1]
+        spot_price = snapshot.get("NIFTY")
+        if spot_price:
             print(f"Got live spot for simulation: {spot_price}")
-        except:
+        else:
             spot_price = 25200.0 # Fallback
             
     # 2. Get Live VIX (Volatility)
-    try:
-        vix_ticker = yf.Ticker("^INDIAVIX")
-        vix = vix_ticker.history(period="1d")['Close'].iloc[-1]
+    vix = snapshot.get("INDIA_VIX")
+    if vix:
         print(f"Got live VIX for simulation: {vix}")
-    except:
+    else:
         vix = 13.5 # Fallback average VIX
         
     print(f"--- [Mock Chain] Generating strikes around Spot: {spot_price:.2f} with VIX: {vix:.2f} ---")
@@ -195,14 +210,15 @@ def generate_mock_chain(symbol="NIFTY", spot_price=None):
         "symbol": symbol,
         "expiry": current_expiry,
         "spot_price": spot_price,
-        "chain": strikes_data
+        "chain": pd.DataFrame(strikes_data).astype(CHAIN_DTYPES)
     }
 
 if __name__ == "__main__":
     chain = fetch_option_chain()
-    print(f"\n✅ Fetched {len(chain.get('chain', []))} strikes")
-    if chain.get('chain'):
+    chain_df = chain.get('chain')
+    print(f"\n✅ Fetched {0 if chain_df is None else len(chain_df)} strikes")
+    if chain_df is not None and not chain_df.empty:
         print(f"Spot: {chain.get('spot_price', 'N/A')}")
         print("\nSample strikes:")
-        for strike in chain['chain'][8:11]:
-            print(f"  {strike['strike']}: CE={strike['tradingsymbol_ce']}, PE={strike['tradingsymbol_pe']}")
+        for row in chain_df.iloc[8:11].itertuples():
+            print(f"  {row.strike}: CE={row.tradingsymbol_ce}, PE={row.tradingsymbol_pe}")
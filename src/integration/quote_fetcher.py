@@ -0,0 +1,121 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.integration.kite_app import kite_client
+
+logger = logging.getLogger(__name__)
+
+# Kite accepts at most 500 instruments per /quote request
+MAX_QUOTE_BATCH = 500
+# Kite's quote endpoint allows 1 request per second; a larger burst risks HTTP 429s
+QUOTE_RATE_PER_SEC = float(os.environ.get("KITE_QUOTE_RATE_PER_SEC", 1.0))
+QUOTE_BURST = int(os.environ.get("KITE_QUOTE_BURST", 1))
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+    Holds up to `capacity` tokens, refilled continuously at `rate` per second.
+    """
+
+    def __init__(self, rate=QUOTE_RATE_PER_SEC, capacity=QUOTE_BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` are available, then consumes them."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+# Shared limiter so concurrent callers in one process respect the broker limit together
+quote_rate_limiter = TokenBucket()
+
+def chunked(items, size):
+    """Splits a list into consecutive chunks of at most `size` items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _quotes_to_columns(quotes):
+    """Flattens a Kite quote response dict into a columnar DataFrame."""
+    import pandas as pd
+    tokens, last_price, oi, volume, bid, ask, ts = [], [], [], [], [], [], []
+    for key, q in quotes.items():
+        tokens.append(q.get("instrument_token", key))
+        last_price.append(q.get("last_price", np.nan))
+        oi.append(q.get("oi", 0))
+        volume.append(q.get("volume", 0))
+        depth = q.get("depth") or {}
+        buy, sell = depth.get("buy") or [], depth.get("sell") or []
+        bid.append(buy[0].get("price", np.nan) if buy else np.nan)
+        ask.append(sell[0].get("price", np.nan) if sell else np.nan)
+        ts.append(q.get("timestamp"))
+
+    return pd.DataFrame({
+        "instrument_token": pd.to_numeric(pd.Series(tokens, dtype=object), errors="coerce").astype("Int64"),
+        "last_price": np.asarray(last_price, dtype=float),
+        "oi": np.asarray(oi, dtype=np.int64),
+        "volume": np.asarray(volume, dtype=np.int64),
+        "bid": np.asarray(bid, dtype=float),
+        "ask": np.asarray(ask, dtype=float),
+        "timestamp": pd.to_datetime(pd.Series(ts, dtype=object), errors="coerce"),
+    })
+
+def fetch_quote_batches(tokens, client=None, chunk_size=MAX_QUOTE_BATCH, max_workers=4, rate_limiter=None):
+    """
+    Fetches raw quotes for any number of instruments.
+    Splits the token list into broker-sized chunks and fetches them under a
+    token-bucket rate limit. Chunks run on a thread pool only as wide as the
+    limiter's burst: with Kite's 1 req/s and burst 1, extra threads would just
+    queue on the bucket, so the batches are fetched in order on this thread.
+    Chunks that fail are logged and skipped so one bad batch does not drop the rest.
+    Returns: (merged Kite quote dict keyed like get_quote, number of batches)
+    """
+    client = client or kite_client
+    rate_limiter = rate_limiter or quote_rate_limiter
+    batches = chunked(list(dict.fromkeys(tokens)), chunk_size)
+
+    def fetch(batch):
+        rate_limiter.acquire()
+        try:
+            return client.get_quote(batch) or {}
+        except Exception as e:
+            logger.error(f"Quote batch of {len(batch)} failed: {e}")
+            return {}
+
+    workers = min(max_workers, len(batches), max(1, int(rate_limiter.capacity)))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            responses = list(pool.map(fetch, batches))
+    else:
+        responses = [fetch(batch) for batch in batches]
+
+    merged = {}
+    for response in responses:
+        merged.update(response)
+    return merged, len(batches)
+
+def fetch_quotes(tokens, client=None, chunk_size=MAX_QUOTE_BATCH, max_workers=4, rate_limiter=None):
+    """
+    Fetches quotes for any number of instruments (see fetch_quote_batches) and
+    merges them into one columnar DataFrame (one row per instrument).
+    """
+    start = time.perf_counter()
+    merged, n_batches = fetch_quote_batches(tokens, client, chunk_size, max_workers, rate_limiter)
+    snapshot = _quotes_to_columns(merged)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"✅ [Quotes] {len(snapshot)} quotes in {n_batches} batches ({elapsed_ms:.0f} ms)")
+    return snapshot
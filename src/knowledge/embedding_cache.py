@@ -0,0 +1,196 @@
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, single writer assumed
+    fcntl = None
+
+CACHE_DIR = os.path.join(os.getcwd(), 'data', 'embedding_cache')
+KEY_BYTES = 16
+
+def text_key(model_name: str, kind: str, text: str) -> bytes:
+    """Cache key: truncated SHA-256 of model name, embedding kind ('doc'/'query') and text."""
+    return hashlib.sha256(f"{model_name}\0{kind}\0{text}".encode("utf-8")).digest()[:KEY_BYTES]
+
+class DiskEmbeddingStore:
+    """
+    Append-only on-disk embedding table for one model.
+    vectors.f32 holds a float32 matrix (row per text) read through np.memmap;
+    keys.bin holds the matching 16-byte keys and is loaded into a dict index.
+    A vector is written before its key, so a crash mid-append never exposes a
+    key without its vector. Several processes (dashboard, daemon) may share a
+    directory: appends hold an exclusive flock on the 'lock' file and first pick
+    up rows other processes appended, so only a torn final record is truncated.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.keys_path = os.path.join(directory, "keys.bin")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock_path = os.path.join(directory, "lock")
+        self.dim = None
+        self._index = {}
+        self._rows = 0
+        self._matrix = None
+        self._lock = threading.Lock()
+        self._refresh()
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _disk_rows(self):
+        """Returns (complete rows on disk, key bytes, vector bytes)."""
+        key_bytes = os.path.getsize(self.keys_path) if os.path.exists(self.keys_path) else 0
+        vector_bytes = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        return min(key_bytes // KEY_BYTES, vector_bytes // (4 * self.dim)), key_bytes, vector_bytes
+
+    def _refresh(self):
+        """Extends the index with complete rows appended since the last read (by any process)."""
+        if self.dim is None:
+            if not os.path.exists(self.meta_path):
+                return
+            with open(self.meta_path) as f:
+                self.dim = json.load(f)["dim"]
+        rows, _, _ = self._disk_rows()
+        if rows <= self._rows:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._rows * KEY_BYTES)
+            keys = f.read((rows - self._rows) * KEY_BYTES)
+        for i in range(rows - self._rows):
+            self._index[keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]] = self._rows + i
+        self._rows = rows
+
+    def _map(self):
+        if self._matrix is None or self._matrix.shape[0] < self._rows:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self._rows, self.dim)) \
+                if self._rows else None
+        return self._matrix
+
+    def __len__(self):
+        return self._rows
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        with self._lock:
+            rows = [self._index.get(k) for k in keys]
+            if any(r is None for r in rows):
+                self._refresh()
+                rows = [self._index.get(k) for k in keys]
+            if all(r is None for r in rows):
+                return [None] * len(keys)
+            matrix = self._map()
+            return [None if r is None else np.array(matrix[r]) for r in rows]
+
+    def put_many(self, keys: List[bytes], vectors: List[List[float]]):
+        with self._lock, self._file_lock():
+            self._refresh()
+            fresh = [(k, v) for k, v in zip(keys, vectors) if k not in self._index]
+            if not fresh:
+                return
+            block = np.asarray([v for _, v in fresh], dtype=np.float32)
+            if self.dim is None:
+                self.dim = block.shape[1]
+                with open(self.meta_path, "w") as f:
+                    json.dump({"dim": self.dim}, f)
+            # Under the file lock nobody else is mid-append, so bytes past the last
+            # complete row are a torn record from a crashed writer
+            rows, key_bytes, vector_bytes = self._disk_rows()
+            if vector_bytes != rows * 4 * self.dim:
+                with open(self.vectors_path, "r+b") as f:
+                    f.truncate(rows * 4 * self.dim)
+            if key_bytes != rows * KEY_BYTES:
+                with open(self.keys_path, "r+b") as f:
+                    f.truncate(rows * KEY_BYTES)
+            with open(self.vectors_path, "ab") as f:
+                f.write(block.tobytes())
+            with open(self.keys_path, "ab") as f:
+                f.write(b"".join(k for k, _ in fresh))
+            for k, _ in fresh:
+                self._index[k] = self._rows
+                self._rows += 1
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that skips the model forward pass for texts seen before.
+    Lookups go to an in-memory LRU first, then the on-disk store; only misses
+    are sent to the wrapped model, in one batch.
+    """
+
+    def __init__(self, base: Embeddings, model_name: str, cache_dir: str = CACHE_DIR, lru_size: int = 4096):
+        self.base = base
+        self.model_name = model_name
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk = DiskEmbeddingStore(os.path.join(cache_dir, model_name.replace("/", "__")))
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: bytes, vector: List[float]):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def lookup(self, texts: List[str], kind: str = "doc"):
+        """Returns (keys, vectors) with None in place of every uncached text."""
+        keys = [text_key(self.model_name, kind, t) for t in texts]
+        vectors = [None] * len(texts)
+        with self._lock:
+            for i, k in enumerate(keys):
+                if k in self._lru:
+                    self._lru.move_to_end(k)
+                    vectors[i] = self._lru[k]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            found = self.disk.get_many([keys[i] for i in missing])
+            with self._lock:
+                for i, vec in zip(missing, found):
+                    if vec is not None:
+                        vectors[i] = vec.tolist()
+                        self._remember(keys[i], vectors[i])
+        return keys, vectors
+
+    def store(self, keys: List[bytes], vectors: List[List[float]]):
+        """Adds freshly computed vectors to both cache tiers."""
+        self.disk.put_many(keys, vectors)
+        with self._lock:
+            for k, v in zip(keys, vectors):
+                self._remember(k, list(v))
+
+    def _embed(self, texts: List[str], kind: str, compute) -> List[List[float]]:
+        keys, vectors = self.lookup(texts, kind)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            # Deduplicate repeated texts within the batch before the model call
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            computed = dict(zip(unique, compute(unique)))
+            for i in missing:
+                vectors[i] = list(computed[texts[i]])
+            self.store([keys[i] for i in missing], [vectors[i] for i in missing])
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), "doc", self.base.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query", lambda ts: [self.base.embed_query(t) for t in ts])[0]
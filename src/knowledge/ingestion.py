@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import hashlib
+import multiprocessing
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from src.knowledge.vector_store import DATA_DIR, MANIFEST_FILE, retrieval_service
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+EMBED_BATCH = 64
+# Pools start after the Chroma client and the embedding model (torch, tokenizers) are
+# loaded in this process; forking then can copy held locks into the children and hang
+# them, so workers are spawned fresh and import only what they need
+POOL_CONTEXT = multiprocessing.get_context("spawn")
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def load_manifest(path: str = MANIFEST_FILE) -> Dict:
+    """
+    Manifest layout:
+    {"version": int, "files": {source: {"sha256": ..., "pages": {page: {"hash": ..., "chunk_ids": [...]}}}}}
+    'version' increases every time the collection contents change.
+    """
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {"version": 0, "files": {}}
+
+def save_manifest(manifest: Dict, path: str = MANIFEST_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+# --- Worker functions (top-level so they can run in a process pool) ---
+
+def _parse_pdf(path: str):
+    """Returns (path, [(page_number, text), ...]) for one PDF."""
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    return path, [(i, page.extract_text() or "") for i, page in enumerate(reader.pages)]
+
+_worker_embedder = None
+
+def _init_embedder(model_name: str):
+    global _worker_embedder
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    _worker_embedder = HuggingFaceEmbeddings(model_name=model_name)
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    return _worker_embedder.embed_documents(texts)
+
+# --- Pipeline ---
+
+def _split_page(text: str) -> List[str]:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return splitter.split_text(text)
+
+def _batches(items: List, size: int) -> List[List]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def ingest_incremental(data_dir: str = DATA_DIR, workers: Optional[int] = None,
+                       manifest_path: str = MANIFEST_FILE) -> Dict:
+    """
+    Incrementally syncs the PDFs in data_dir into the vector store.
+    - Files whose SHA-256 is unchanged are skipped without parsing.
+    - Changed/new files are parsed in a process pool; only pages whose text
+      hash changed are re-chunked and re-embedded (embedding also runs in the
+      pool, in batches of EMBED_BATCH chunks).
+    - Vectors for removed files and replaced pages are deleted, so re-runs
+      never duplicate chunks.
+    Returns throughput metrics (pages/s, chunks/s) and change counts.
+    """
+    workers = workers or max(1, min(4, os.cpu_count() or 1))
+    manifest = load_manifest(manifest_path)
+    files = manifest["files"]
+    collection = retrieval_service.store._collection
+
+    pdfs = sorted(os.path.join(data_dir, f) for f in os.listdir(data_dir) if f.endswith(".pdf"))
+    current = {path: sha256_file(path) for path in pdfs}
+
+    # 1. Removed files: drop their vectors
+    delete_ids = []
+    removed = [src for src in files if src not in current]
+    for src in removed:
+        for page in files.pop(src)["pages"].values():
+            delete_ids.extend(page["chunk_ids"])
+
+    # 2. Changed or new files need parsing
+    to_parse = [path for path, digest in current.items()
+                if files.get(path, {}).get("sha256") != digest]
+
+    # Files ingested before the manifest existed: clear their untracked vectors
+    for path in to_parse:
+        if path not in files:
+            collection.delete(where={"source": path})
+
+    start = time.perf_counter()
+    parsed = []
+    if to_parse:
+        if workers > 1 and len(to_parse) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(to_parse)),
+                                     mp_context=POOL_CONTEXT) as pool:
+                parsed = list(pool.map(_parse_pdf, to_parse))
+        else:
+            parsed = [_parse_pdf(path) for path in to_parse]
+    parse_sec = time.perf_counter() - start
+
+    # 3. Diff pages and collect new chunks
+    new_ids, new_texts, new_metas = [], [], []
+    pages_parsed = pages_changed = 0
+    for path, pages in parsed:
+        old_pages = files.get(path, {}).get("pages", {})
+        entry = {"sha256": current[path], "pages": {}}
+        for page_no, text in pages:
+            pages_parsed += 1
+            key = str(page_no)
+            page_hash = sha256_text(text)
+            old = old_pages.pop(key, None)
+            if old and old["hash"] == page_hash:
+                entry["pages"][key] = old
+                continue
+            if old:
+                delete_ids.extend(old["chunk_ids"])
+            pages_changed += 1
+            chunk_ids = []
+            for chunk in _split_page(text):
+                chunk_id = f"{sha256_text(path)[:12]}:{page_no}:{sha256_text(chunk)[:16]}"
+                if chunk_id in chunk_ids:
+                    continue
+                chunk_ids.append(chunk_id)
+                new_ids.append(chunk_id)
+                new_texts.append(chunk)
+                new_metas.append({"source": path, "page": page_no})
+            entry["pages"][key] = {"hash": page_hash, "chunk_ids": chunk_ids}
+        # Pages that no longer exist in the file
+        for old in old_pages.values():
+            delete_ids.extend(old["chunk_ids"])
+        files[path] = entry
+
+    if delete_ids:
+        collection.delete(ids=delete_ids)
+
+    # 4. Embed changed chunks in batches and upsert with precomputed vectors.
+    # Chunks already in the embedding cache skip the model entirely.
+    start = time.perf_counter()
+    embeddings = retrieval_service.embeddings
+    keys, new_vectors = embeddings.lookup(new_texts)
+    missing = [i for i, v in enumerate(new_vectors) if v is None]
+    batches = _batches(missing, EMBED_BATCH)
+    if batches:
+        text_batches = [[new_texts[i] for i in b] for b in batches]
+        if workers > 1 and len(batches) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(batches)),
+                                     mp_context=POOL_CONTEXT,
+                                     initializer=_init_embedder,
+                                     initargs=(retrieval_service.model_name,)) as pool:
+                vectors = list(pool.map(_embed_batch, text_batches))
+        else:
+            vectors = [embeddings.base.embed_documents(t) for t in text_batches]
+        for b, vecs in zip(batches, vectors):
+            embeddings.store([keys[i] for i in b], vecs)
+            for i, vec in zip(b, vecs):
+                new_vectors[i] = vec
+    for b in _batches(list(range(len(new_ids))), EMBED_BATCH):
+        collection.upsert(ids=[new_ids[i] for i in b], embeddings=[new_vectors[i] for i in b],
+                          documents=[new_texts[i] for i in b],
+                          metadatas=[new_metas[i] for i in b])
+    embed_sec = time.perf_counter() - start
+
+    changed = bool(delete_ids or new_ids or removed)
+    if changed:
+        manifest["version"] = manifest.get("version", 0) + 1
+    save_manifest(manifest, manifest_path)
+    if changed:
+        retrieval_service.bump_version()
+
+    metrics = {
+        "files_total": len(pdfs),
+        "files_parsed": len(to_parse),
+        "files_removed": len(removed),
+        "pages_parsed": pages_parsed,
+        "pages_changed": pages_changed,
+        "chunks_embedded": len(new_ids),
+        "chunks_cache_hits": len(new_ids) - len(missing),
+        "chunks_deleted": len(delete_ids),
+        "parse_sec": round(parse_sec, 3),
+        "embed_sec": round(embed_sec, 3),
+        "pages_per_sec": round(pages_parsed / parse_sec, 1) if parse_sec > 0 else None,
+        "chunks_per_sec": round(len(new_ids) / embed_sec, 1) if embed_sec > 0 else None,
+        "version": manifest["version"],
+    }
+    print(f"Ingestion: {metrics['files_parsed']}/{metrics['files_total']} files parsed, "
+          f"{pages_changed} pages changed, {len(new_ids)} chunks embedded, "
+          f"{len(delete_ids)} deleted ({metrics['pages_per_sec']} pages/s, {metrics['chunks_per_sec']} chunks/s)")
+    return metrics
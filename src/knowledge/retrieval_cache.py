@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+
+class SemanticResultCache:
+    """
+    Caches top-k retrieval results per query.
+    A query hits if the same (topic, k) was seen before, or if a cached query
+    with the same k has cosine similarity >= threshold with it. The whole cache
+    is dropped when the corpus version passed to get/put changes.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 256):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = OrderedDict()  # (topic, k) -> (unit vector, results)
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def get(self, topic: str, k: int, vector, version) -> Optional[List[str]]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get((topic, k))
+            if entry is not None:
+                self._entries.move_to_end((topic, k))
+                self.hits += 1
+                return entry[1]
+
+            candidates = [(key, e) for key, e in self._entries.items() if key[1] == k]
+            if candidates:
+                matrix = np.stack([e[0] for _, e in candidates])
+                sims = matrix @ self._unit(vector)
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    key, (_, results) = candidates[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.semantic_hits += 1
+                    return results
+
+            self.misses += 1
+            return None
+
+    def put(self, topic: str, k: int, vector, results: List[str], version):
+        with self._lock:
+            self._check_version(version)
+            self._entries[(topic, k)] = (self._unit(vector), results)
+            self._entries.move_to_end((topic, k))
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -1,5 +1,6 @@
 from langchain_core.tools import tool
-from src.knowledge.vector_store import query_strategy_rules
+from typing import List
+from src.knowledge.vector_store import query_strategy_rules, query_strategy_rules_many
 
 @tool
 def lookup_strategy_rules(topic: str) -> str:
@@ -14,3 +15,13 @@ def lookup_strategy_rules(topic: str) -> str:
     if not results:
         return "No specific rules found for this topic."
     return "\n\n".join(results)
+
+def lookup_strategy_rules_many(topics: List[str]) -> List[str]:
+    """
+    Batched form of lookup_strategy_rules: one embedding pass and one
+    collection query for all topics. Returns one formatted string per topic.
+    """
+    return [
+        "\n\n".join(results) if results else "No specific rules found for this topic."
+        for results in query_strategy_rules_many(topics)
+    ]
@@ -1,10 +1,12 @@
 import os
-from typing import List
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import uuid
+import hashlib
+import threading
+from typing import List, TYPE_CHECKING
+from src.knowledge.retrieval_cache import SemanticResultCache
 import warnings
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
 # Suppress LangChain deprecation warnings specifically
 warnings.filterwarnings("ignore", category=UserWarning, module="langchain")
 warnings.filterwarnings("ignore", category=DeprecationWarning, module="langchain")
@@ -12,44 +14,132 @@ warnings.filterwarnings("ignore", category=DeprecationWarning, module="langchain
 # Define paths
 DATA_DIR = os.path.join(os.getcwd(), 'data')
 DB_DIR = os.path.join(os.getcwd(), 'chroma_db')
+MANIFEST_FILE = os.path.join(DB_DIR, 'ingest_manifest.json')
 
-# Initialize Embedding Function (Local/Offline by default)
-embedding_function = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+# Embedding model (Local/Offline by default)
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
-def ingest_documents():
-    """Reads PDFs from data folder and stores them in ChromaDB."""
-    documents = []
-    
+class RetrievalService:
+    """
+    Long-lived handle on the Chroma collection and the embedding model.
+    Both are created lazily on first use and then kept warm for the life of
+    the process; initialization is guarded by a lock so concurrent callers
+    share one client and one model. Embeddings go through CachedEmbeddings,
+    so repeated texts never reach the model, and query results go through a
+    SemanticResultCache keyed to the corpus version.
+    """
+
+    def __init__(self, persist_directory: str = DB_DIR, model_name: str = EMBEDDING_MODEL):
+        self.persist_directory = persist_directory
+        self.model_name = model_name
+        # Rewritten with a fresh token by every process that changes the collection
+        self.version_path = os.path.join(persist_directory, 'corpus_version')
+        self._lock = threading.RLock()
+        self._embeddings = None
+        self._store = None
+        self.result_cache = SemanticResultCache()
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    # Deferred: importing sentence-transformers/torch costs seconds
+                    from langchain_community.embeddings import HuggingFaceEmbeddings
+                    from src.knowledge.embedding_cache import CachedEmbeddings
+                    self._embeddings = CachedEmbeddings(
+                        HuggingFaceEmbeddings(model_name=self.model_name), self.model_name
+                    )
+        return self._embeddings
+
+    @property
+    def store(self) -> "Chroma":
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    from langchain_chroma import Chroma
+                    self._store = Chroma(
+                        persist_directory=self.persist_directory,
+                        embedding_function=self.embeddings
+                    )
+        return self._store
+
+    def reset(self):
+        """Drops the collection handle so the next call reopens it (e.g. after re-ingestion)."""
+        with self._lock:
+            self._store = None
+        self.bump_version()
+
+    def bump_version(self):
+        """Marks the collection as changed so every process drops its cached retrieval results."""
+        os.makedirs(self.persist_directory, exist_ok=True)
+        tmp_path = f"{self.version_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp_path, self.version_path)
+
+    def corpus_version(self):
+        """
+        Token from the version file. Ingestion and add_texts rewrite it after every
+        change, in whichever process made it (daemon, dashboard, news loader).
+        """
+        try:
+            with open(self.version_path) as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def add_texts(self, texts: List[str], metadatas: List[dict] = None):
+        # Content-derived IDs make re-adding the same text an upsert, not a duplicate
+        ids = [hashlib.sha256(t.encode("utf-8")).hexdigest()[:32] for t in texts]
+        self.store.add_texts(texts=texts, metadatas=metadatas, ids=ids)
+        self.bump_version()
+
+    def query(self, topic: str, k: int = 3) -> List[str]:
+        return self.query_many([topic], k=k)[0]
+
+    def query_many(self, topics: List[str], k: int = 3) -> List[List[str]]:
+        """
+        Embeds all topics in one batch and runs their searches in a single collection query.
+        Topics answered by the result cache (same or near-identical query) skip the search.
+        """
+        if not topics:
+            return []
+        topics = list(topics)
+        vectors = self.embeddings.embed_documents(topics)
+        version = self.corpus_version()
+
+        answers = [self.result_cache.get(t, k, v, version) for t, v in zip(topics, vectors)]
+        missing = [i for i, a in enumerate(answers) if a is None]
+        if missing:
+            with self._lock:
+                collection = self.store._collection
+            results = collection.query(query_embeddings=[vectors[i] for i in missing],
+                                       n_results=k, include=["documents"])
+            for i, docs in zip(missing, results["documents"]):
+                answers[i] = list(docs)
+                self.result_cache.put(topics[i], k, vectors[i], answers[i], version)
+        return answers
+
+# Shared service; nothing is loaded until the first query
+retrieval_service = RetrievalService()
+
+def ingest_documents(workers: int = None):
+    """
+    Syncs PDFs from the data folder into ChromaDB.
+    Incremental: only new or changed pages are parsed and embedded
+    (see src.knowledge.ingestion). Returns throughput metrics.
+    """
     # Check if data directory exists
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
         print(f"Created {DATA_DIR}. Please place PDFs there.")
         return
 
-    # Load PDFs
-    for file in os.listdir(DATA_DIR):
-        if file.endswith(".pdf"):
-            pdf_path = os.path.join(DATA_DIR, file)
-            print(f"Loading {file}...")
-            loader = PyPDFLoader(pdf_path)
-            documents.extend(loader.load())
-
-    if not documents:
-        print("No documents found to ingest.")
-        return
-
-    # Split text
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    chunks = text_splitter.split_documents(documents)
-
-    # Store in Chroma
-    print(f"Storing {len(chunks)} chunks in ChromaDB...")
-    vector_store = Chroma.from_documents(
-        documents=chunks,
-        embedding=embedding_function,
-        persist_directory=DB_DIR
-    )
+    from src.knowledge.ingestion import ingest_incremental
+    metrics = ingest_incremental(DATA_DIR, workers=workers)
     print("Ingestion Complete.")
+    return metrics
 
 def add_texts(texts: List[str], metadatas: List[dict] = None):
     """Adds raw text data (e.g. news) to the vector store."""
@@ -57,11 +147,7 @@ def add_texts(texts: List[str], metadatas: List[dict] = None):
         return
         
     print(f"Adding {len(texts)} text entries to ChromaDB...")
-    vector_store = Chroma(
-        persist_directory=DB_DIR,
-        embedding_function=embedding_function
-    )
-    vector_store.add_texts(texts=texts, metadatas=metadatas)
+    retrieval_service.add_texts(texts=texts, metadatas=metadatas)
     print("Texts Added.")
 
 def query_strategy_rules(topic: str, k: int = 3) -> List[str]:
@@ -72,14 +158,19 @@ def query_strategy_rules(topic: str, k: int = 3) -> List[str]:
         print("Database not found. Please run ingestion first.")
         return []
 
-    vector_store = Chroma(
-        persist_directory=DB_DIR,
-        embedding_function=embedding_function
-    )
-
     print(f"Querying for: {topic}")
-    results = vector_store.similarity_search(topic, k=k)
-    return [doc.page_content for doc in results]
+    return retrieval_service.query(topic, k=k)
+
+def query_strategy_rules_many(topics: List[str], k: int = 3) -> List[List[str]]:
+    """Retrieves top k relevant chunks for each topic, embedding all topics in one batch."""
+    if not os.path.exists(DB_DIR):
+        print("Database not found. Please run ingestion first.")
+        return [[] for _ in topics]
+
+    print(f"Querying for: {', '.join(topics)}")
+    results = retrieval_service.query_many(topics, k=k)
+    print(f"Retrieval cache: {retrieval_service.result_cache.stats()}")
+    return results
 
 if __name__ == "__main__":
     # For testing purposes
@@ -0,0 +1,254 @@
+"""
+Backtesting for the sigma strangle / straddle strategy.
+
+Each market row (one snapshot per trading day) is an entry event. The
+strategist and risk manager LLM nodes are replaced by deterministic rules
+(stub_decision), strikes come from the executor's sigma / ATM logic, and
+every position is marked to market along its holding path until expiry
+or stop-loss. All entries x sigma multipliers x holding days are evaluated
+as NumPy arrays in one pass, so a parameter sweep costs the same as one run.
+
+    market = synthetic_market(n_days=500, seed=7)
+    result = run_backtest(market, sigma_mults=(1.0, 1.5, 2.0), dte=7)
+    print(result["summary"])
+"""
+from datetime import datetime
+from typing import Any, Dict, Sequence
+import numpy as np
+from src.quant_engine.greeks import calculate_greeks_batch
+from src.quant_engine.sigma_calculator import get_strangle_strikes_batch, round_to_nearest_batch
+
+DEFAULT_SIGMAS = (1.0, 1.25, 1.5, 1.75, 2.0)
+# Risk manager rule 1: do not sell options below 11% IV
+MIN_IV = 11.0
+# Strategist: straddles for low (but tradeable) volatility, strangles otherwise
+STRADDLE_MAX_IV = 13.0
+MIN_PREMIUM = 0.05  # exchange tick
+
+def synthetic_market(n_days: int = 250, spot: float = 22000.0, iv: float = 14.0, seed: int = 0,
+                     start: str = "2025-01-01", realized_ratio: float = 0.85,
+                     iv_reversion: float = 0.05, iv_vol: float = 0.6) -> Dict[str, np.ndarray]:
+    """
+    Deterministic (seeded) daily market: spot follows GBM whose volatility is
+    realized_ratio x the current IV; IV mean-reverts around `iv`.
+    Returns {"date": datetime64[D] (business days), "spot", "iv"} arrays.
+    """
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset(np.datetime64(start, "D"), np.arange(n_days), roll="forward")
+    iv_shocks, spot_shocks = rng.standard_normal((2, n_days))
+    ivs = np.empty(n_days)
+    ivs[0] = iv
+    for t in range(1, n_days):
+        ivs[t] = max(ivs[t - 1] + iv_reversion * (iv - ivs[t - 1]) + iv_vol * iv_shocks[t], 8.0)
+    daily_vol = realized_ratio * ivs / 100.0 / np.sqrt(252)
+    log_returns = np.concatenate([[0.0], daily_vol[:-1] * spot_shocks[1:] - 0.5 * daily_vol[:-1] ** 2])
+    return {"date": dates, "spot": spot * np.exp(np.cumsum(log_returns)), "iv": ivs}
+
+def market_from_history(symbol: str = "NIFTY", start: datetime = None, end: datetime = None,
+                        store=None) -> Dict[str, np.ndarray]:
+    """
+    Daily market rows from logged chain snapshots (last snapshot of each day).
+    IV is the ATM strike's mean CE/PE IV, falling back to VIX when IVs are missing.
+    """
+    if store is None:
+        from src.data_ingestion.history_store import history_store as store
+    start = start or datetime(2000, 1, 1)
+    end = end or datetime.now()
+    df = store.scan(symbol, start, end, columns=["timestamp", "spot", "vix", "strike", "ce_iv", "pe_iv"])
+    if df.empty:
+        raise ValueError(f"No logged history for {symbol} between {start} and {end}")
+    df["date"] = df["timestamp"].dt.normalize()
+    last = df[df["timestamp"] == df.groupby("date")["timestamp"].transform("max")].copy()
+    last["distance"] = (last["strike"] - last["spot"]).abs()
+    atm = last.sort_values("distance").groupby("date").first().sort_index()
+    iv = atm[["ce_iv", "pe_iv"]].mean(axis=1).fillna(atm["vix"]).ffill()
+    if iv.isna().all():
+        raise ValueError(f"Logged history for {symbol} has no IV or VIX values")
+    return {
+        "date": atm.index.values.astype("datetime64[D]"),
+        "spot": atm["spot"].to_numpy(dtype=float),
+        "iv": iv.bfill().to_numpy(dtype=float),
+    }
+
+# --- Deterministic stand-ins for the LLM nodes ---
+
+def stub_decision(iv, strategy: str = "auto", min_iv: float = MIN_IV,
+                  straddle_max_iv: float = STRADDLE_MAX_IV) -> Dict[str, np.ndarray]:
+    """
+    Rule-based strategist + risk manager, vectorized over IV.
+    strategy: 'auto', 'Short Strangle' or 'Short Straddle' (forced, as in the dashboard).
+    Returns {"straddle": bool array, "approved": bool array}.
+    """
+    iv = np.asarray(iv, dtype=float)
+    if strategy == "auto":
+        straddle = iv <= straddle_max_iv
+    else:
+        straddle = np.full(iv.shape, strategy == "Short Straddle")
+    return {"straddle": straddle, "approved": iv >= min_iv}
+
+def stub_strategist(state: Dict[str, Any], sigma_mult: float = 1.0) -> Dict[str, Any]:
+    """Drop-in for analyze_strategy with no LLM or RAG calls (deterministic runs and tests)."""
+    iv = state.get("market_data", {}).get("iv", 0)
+    decision = stub_decision(iv, state.get("user_selected_strategy") or "auto")
+    strategy = "Short Straddle" if decision["straddle"] else "Short Strangle"
+    return {"strategy_decision": {
+        "strategy": strategy,
+        "rationale": f"Deterministic rule: IV {iv}% ({'<=' if decision['straddle'] else '>'} {STRADDLE_MAX_IV}%).",
+        "constraints": "",
+        "market_sentiment": "",
+        "llm_analysis": "Deterministic stub. LLM analysis skipped.",
+        "recommended_sigma": sigma_mult,
+    }}
+
+def stub_risk_manager(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop-in for validate_order: approves only when IV >= MIN_IV."""
+    iv = state.get("market_data", {}).get("iv", 0)
+    approved = bool(stub_decision(iv)["approved"])
+    return {
+        "risk_status": "approved" if approved else "rejected",
+        "risk_analysis": f"Deterministic rule: IV {iv}% {'>=' if approved else '<'} {MIN_IV}%.",
+    }
+
+# --- Engine ---
+
+def _sell_fill(price, slippage_pct, slippage_points):
+    return np.maximum(price * (1 - slippage_pct) - slippage_points, MIN_PREMIUM)
+
+def _buy_fill(price, slippage_pct, slippage_points):
+    return price * (1 + slippage_pct) + slippage_points
+
+def run_backtest(market: Dict[str, np.ndarray], sigma_mults: Sequence[float] = DEFAULT_SIGMAS,
+                 dte: int = 7, strategy: str = "auto", entry_every: int = 1, lot_size: int = 50,
+                 slippage_pct: float = 0.01, slippage_points: float = 0.5,
+                 stop_loss_mult: float = None, base: int = 50) -> Dict[str, Any]:
+    """
+    Replays `market` ({"date", "spot", "iv"} arrays, one row per trading day).
+
+    A position is opened every `entry_every` rows with expiry `dte` calendar days
+    later, for every sigma multiplier. Legs are sold at the Black-Scholes price
+    less slippage and bought back (plus slippage) on the last row before expiry,
+    or settled at intrinsic value on expiry day. With stop_loss_mult, a position
+    is closed on the first day its loss reaches stop_loss_mult x the credit.
+    Entries whose expiry lies beyond the data are dropped.
+
+    Returns {"trades": DataFrame (one row per entry x sigma), "summary": DataFrame
+    (per sigma), "paths": {"pnl", "delta", "gamma", "theta", "vega"} arrays of shape
+    (entries, sigmas, holding days) for the short position (NaN after exit),
+    "params": dict}.
+    """
+    import pandas as pd
+    dates = np.asarray(market["date"], dtype="datetime64[D]")
+    spot = np.asarray(market["spot"], dtype=float)
+    iv = np.asarray(market["iv"], dtype=float)
+    sigmas = np.asarray(sigma_mults, dtype=float)
+
+    entries = np.arange(0, len(dates), max(1, entry_every))
+    expiry = dates[entries] + np.timedelta64(dte, "D")
+    complete = expiry <= dates[-1]
+    entries, expiry = entries[complete], expiry[complete]
+    if not len(entries):
+        raise ValueError(f"Market data spans less than one {dte}-day expiry cycle")
+    exit_idx = np.searchsorted(dates, expiry, side="right") - 1
+    hold = exit_idx - entries                                      # (N,)
+
+    # Holding paths: row index and days to expiry for every (entry, step)
+    steps = np.arange(int(hold.max()) + 1)
+    live = steps[None, :] <= hold[:, None]                         # (N, H)
+    idx = np.minimum(entries[:, None] + steps, exit_idx[:, None])  # (N, H)
+    days_left = (expiry[:, None] - dates[idx]).astype(float)
+
+    # Strategist / risk manager stand-ins, then the executor's strike logic
+    decision = stub_decision(iv[entries], strategy)
+    straddle, approved = decision["straddle"][:, None], decision["approved"]
+    strangle = get_strangle_strikes_batch(spot[entries][:, None], iv[entries][:, None], dte, sigmas[None, :], base)
+    atm = round_to_nearest_batch(spot[entries], base)[:, None]
+    call_k = np.where(straddle, atm, strangle["sell_call_strike"])  # (N, M)
+    put_k = np.where(straddle, atm, strangle["sell_put_strike"])
+
+    # Mark every leg along every path: (N, M, H)
+    S, v, T = spot[idx][:, None, :], iv[idx][:, None, :], days_left[:, None, :]
+    ce = calculate_greeks_batch(S, call_k[:, :, None], T, v, "CE")
+    pe = calculate_greeks_batch(S, put_k[:, :, None], T, v, "PE")
+
+    credit = (_sell_fill(ce["price"][:, :, 0], slippage_pct, slippage_points)
+              + _sell_fill(pe["price"][:, :, 0], slippage_pct, slippage_points))
+    settled = T <= 0
+    close_cost = np.where(settled, ce["price"] + pe["price"],
+                          _buy_fill(ce["price"], slippage_pct, slippage_points)
+                          + _buy_fill(pe["price"], slippage_pct, slippage_points))
+    pnl_path = (credit[:, :, None] - close_cost) * lot_size
+
+    exit_step = np.broadcast_to(hold[:, None], credit.shape)
+    stopped = np.zeros(credit.shape, dtype=bool)
+    if stop_loss_mult is not None:
+        breach = live[:, None, :] & (steps > 0) & (pnl_path <= -stop_loss_mult * credit[:, :, None] * lot_size)
+        stopped = breach.any(axis=2)
+        exit_step = np.where(stopped, breach.argmax(axis=2), exit_step)
+    held = steps[None, None, :] <= exit_step[:, :, None]
+    pnl = np.take_along_axis(pnl_path, exit_step[:, :, None], axis=2)[:, :, 0]
+    pnl = np.where(approved[:, None], pnl, 0.0)
+
+    paths = {"pnl": np.where(held, pnl_path, np.nan)}
+    for greek in ("delta", "gamma", "theta", "vega"):
+        paths[greek] = np.where(held, -(ce[greek] + pe[greek]) * lot_size, np.nan)
+
+    n, m = credit.shape
+    exit_rows = np.take_along_axis(np.broadcast_to(idx[:, None, :], pnl_path.shape), exit_step[:, :, None], axis=2)[:, :, 0]
+    trades = pd.DataFrame({
+        "entry_date": np.repeat(dates[entries], m),
+        "exit_date": dates[exit_rows].ravel(),
+        "expiry": np.repeat(expiry, m),
+        "sigma_mult": np.tile(sigmas, n),
+        "strategy": np.repeat(np.where(decision["straddle"], "Short Straddle", "Short Strangle"), m),
+        "approved": np.repeat(approved, m),
+        "spot": np.repeat(spot[entries], m),
+        "iv": np.repeat(iv[entries], m),
+        "call_strike": call_k.ravel(),
+        "put_strike": put_k.ravel(),
+        "credit": credit.ravel(),
+        "exit_cost": np.take_along_axis(close_cost, exit_step[:, :, None], axis=2).ravel(),
+        "pnl": pnl.ravel(),
+        "stopped": stopped.ravel(),
+        "days_held": (dates[exit_rows] - np.repeat(dates[entries], m).reshape(n, m)).astype(int).ravel(),
+        "delta": paths["delta"][:, :, 0].ravel(),
+        "gamma": paths["gamma"][:, :, 0].ravel(),
+        "theta": paths["theta"][:, :, 0].ravel(),
+        "vega": paths["vega"][:, :, 0].ravel(),
+    })
+
+    # Per-sigma stats over approved trades (entries are in exit-date order)
+    traded = approved[:, None] & np.ones((1, m), dtype=bool)
+    count = traded.sum(axis=0)
+    wins = ((pnl > 0) & traded).sum(axis=0)
+    gains = np.where(pnl > 0, pnl, 0.0).sum(axis=0)
+    losses = -np.where(pnl < 0, pnl, 0.0).sum(axis=0)
+    equity = np.cumsum(pnl, axis=0)
+    drawdown = (np.maximum.accumulate(np.maximum(equity, 0.0), axis=0) - equity).max(axis=0)
+    traded_pnl = np.where(traded, pnl, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        summary = pd.DataFrame({
+            "sigma_mult": sigmas,
+            "trades": count,
+            "win_rate": np.where(count > 0, wins / np.maximum(count, 1), np.nan),
+            "total_pnl": pnl.sum(axis=0),
+            "avg_pnl": np.nanmean(traded_pnl, axis=0) if count.any() else np.full(m, np.nan),
+            "pnl_std": np.nanstd(traded_pnl, axis=0) if count.any() else np.full(m, np.nan),
+            "worst_trade": np.nanmin(traded_pnl, axis=0) if count.any() else np.full(m, np.nan),
+            "profit_factor": np.where(losses > 0, gains / losses, np.inf),
+            "max_drawdown": drawdown,
+            "stopped": (stopped & traded).sum(axis=0),
+            "avg_credit": np.where(traded, credit, 0.0).sum(axis=0) / np.maximum(count, 1) * lot_size,
+        }).set_index("sigma_mult")
+
+    return {
+        "trades": trades,
+        "summary": summary,
+        "paths": paths,
+        "params": {"dte": dte, "strategy": strategy, "entry_every": entry_every, "lot_size": lot_size,
+                   "slippage_pct": slippage_pct, "slippage_points": slippage_points,
+                   "stop_loss_mult": stop_loss_mult, "base": base},
+    }
+
+if __name__ == "__main__":
+    result = run_backtest(synthetic_market(n_days=500, seed=7), stop_loss_mult=2.0)
+    print(result["summary"].round(2).to_string())
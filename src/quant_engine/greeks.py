@@ -1,9 +1,31 @@
 import numpy as np
-from scipy.stats import norm
 
 # Risk-free rate assumption (India ~ 7%)
 R = 0.07
 
+SQRT_2PI = np.sqrt(2 * np.pi)
+
+class _StandardNormal:
+    """
+    N(0, 1) cdf/pdf, drop-in for scipy.stats.norm in the pricing code.
+    scipy.special.ndtr is imported on first use; scipy.stats itself costs ~1 s to import.
+    """
+
+    def __init__(self):
+        self._ndtr = None
+
+    def cdf(self, x):
+        if self._ndtr is None:
+            from scipy.special import ndtr
+            self._ndtr = ndtr
+        return self._ndtr(x)
+
+    @staticmethod
+    def pdf(x):
+        return np.exp(-0.5 * np.square(x)) / SQRT_2PI
+
+norm = _StandardNormal()
+
 def calculate_greeks(spot, strike, time_to_expiry_days, iv, option_type="CE"):
     """
     Calculates Option Greeks using Black-Scholes Model.
@@ -41,3 +63,113 @@ def calculate_greeks(spot, strike, time_to_expiry_days, iv, option_type="CE"):
         "theta": round(theta, 4),
         "vega": round(vega, 4)
     }
+
+def calculate_greeks_batch(spot, strike, time_to_expiry_days, iv, option_type="CE"):
+    """
+    Vectorized Black-Scholes Greeks for many contracts in one pass.
+    All inputs broadcast against each other (scalars or NumPy arrays).
+    option_type: 'CE'/'PE' string or array of them, or a boolean array (True = CE).
+    Returns a dict of float arrays: price, delta, gamma, theta, vega, rho.
+    Expired contracts (DTE <= 0) get intrinsic price and zero Greeks.
+    """
+    S = np.asarray(spot, dtype=float)
+    K = np.asarray(strike, dtype=float)
+    days = np.asarray(time_to_expiry_days, dtype=float)
+    v = np.asarray(iv, dtype=float) / 100.0
+    r = R
+
+    is_call = np.asarray(option_type)
+    if is_call.dtype != bool:
+        is_call = np.char.upper(is_call.astype(str)) == "CE"
+
+    S, K, days, v, is_call = np.broadcast_arrays(S, K, days, v, is_call)
+
+    live = (days > 0) & (v > 0)
+    T = np.where(live, days, 1.0) / 365.0
+    v_safe = np.where(live, v, 1.0)
+
+    # Shared intermediates: computed once and reused by every output
+    sqrt_T = np.sqrt(T)
+    vol_sqrt_T = v_safe * sqrt_T
+    d1 = (np.log(S / K) + (r + 0.5 * v_safe ** 2) * T) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
+    pdf_d1 = norm.pdf(d1)
+    cdf_d1 = norm.cdf(d1)
+    cdf_d2 = norm.cdf(d2)
+    disc_K = K * np.exp(-r * T)
+
+    # Put values follow from put-call parity on the shared CDFs
+    call_price = S * cdf_d1 - disc_K * cdf_d2
+    put_price = call_price - S + disc_K
+    price = np.where(is_call, call_price, put_price)
+    delta = np.where(is_call, cdf_d1, cdf_d1 - 1.0)
+
+    theta_common = -(S * pdf_d1 * v_safe) / (2 * sqrt_T)
+    theta = np.where(is_call,
+                     theta_common - r * disc_K * cdf_d2,
+                     theta_common + r * disc_K * (1.0 - cdf_d2)) / 365.0
+    gamma = pdf_d1 / (S * vol_sqrt_T)
+    vega = (S * pdf_d1 * sqrt_T) / 100.0  # Sensitivity per 1% change
+    rho = np.where(is_call,
+                   disc_K * T * cdf_d2,
+                   -disc_K * T * (1.0 - cdf_d2)) / 100.0  # Per 1% rate change
+
+    intrinsic = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+
+    return {
+        "price": np.where(live, price, intrinsic),
+        "delta": np.where(live, delta, 0.0),
+        "gamma": np.where(live, gamma, 0.0),
+        "theta": np.where(live, theta, 0.0),
+        "vega": np.where(live, vega, 0.0),
+        "rho": np.where(live, rho, 0.0),
+    }
+
+def calculate_price_batch(spot, strike, time_to_expiry_days, iv, option_type="CE"):
+    """
+    Black-Scholes prices only, with the same inputs and conventions as
+    calculate_greeks_batch (expired contracts get intrinsic value).
+    For repricing large scenario/path grids where the Greeks are not needed.
+    """
+    S = np.asarray(spot, dtype=float)
+    K = np.asarray(strike, dtype=float)
+    days = np.asarray(time_to_expiry_days, dtype=float)
+    v = np.asarray(iv, dtype=float) / 100.0
+
+    is_call = np.asarray(option_type)
+    if is_call.dtype != bool:
+        is_call = np.char.upper(is_call.astype(str)) == "CE"
+
+    live = (days > 0) & (v > 0)
+    T = np.where(live, days, 1.0) / 365.0
+    vol_sqrt_T = np.where(live, v, 1.0) * np.sqrt(T)
+    d1 = (np.log(S / K) + R * T) / vol_sqrt_T + 0.5 * vol_sqrt_T
+    disc_K = K * np.exp(-R * T)
+    call_price = S * norm.cdf(d1) - disc_K * norm.cdf(d1 - vol_sqrt_T)
+    price = np.where(is_call, call_price, call_price - S + disc_K)
+    intrinsic = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+    return np.where(live, price, intrinsic)
+
+def calculate_chain_greeks(chain_df, spot, time_to_expiry_days, iv=None):
+    """
+    Computes CE and PE Greeks for every strike of an option-chain DataFrame.
+    Uses the chain's 'ce_iv'/'pe_iv' columns when present, otherwise the scalar iv.
+    Returns a copy of the chain with ce_*/pe_* Greek columns added.
+    """
+    strikes = chain_df['strike'].to_numpy(dtype=float)
+    out = chain_df.copy()
+
+    for side in ("ce", "pe"):
+        iv_col = f"{side}_iv"
+        if iv_col in chain_df.columns:
+            side_iv = chain_df[iv_col].to_numpy(dtype=float)
+        elif iv is not None:
+            side_iv = iv
+        else:
+            raise ValueError(f"Chain has no '{iv_col}' column and no iv was given")
+
+        greeks = calculate_greeks_batch(spot, strikes, time_to_expiry_days, side_iv, side.upper())
+        for name, values in greeks.items():
+            out[f"{side}_{name}"] = values
+
+    return out
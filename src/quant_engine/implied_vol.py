@@ -0,0 +1,146 @@
+import numpy as np
+from src.quant_engine.greeks import R, norm
+
+# Solver bounds on annualized volatility (decimal)
+MIN_VOL = 1e-4
+MAX_VOL = 5.0
+
+def _call_price_vega(S, K, T, r, sigma):
+    """Vectorized Black-Scholes call price, vega and d1/d2 (sigma as decimal)."""
+    sqrt_T = np.sqrt(T)
+    vol_sqrt_T = sigma * sqrt_T
+    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
+    price = S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2)
+    vega = S * norm.pdf(d1) * sqrt_T
+    return price, vega, d1, d2
+
+def _initial_guess(call_price, S, K, T, r):
+    """
+    Corrado-Miller closed-form approximation, clipped to the solver bounds.
+    Falls back to Brenner-Subrahmanyam where the square root goes negative.
+    """
+    disc_K = K * np.exp(-r * T)
+    half_gap = (S - disc_K) / 2.0
+    excess = call_price - half_gap
+    radicand = excess ** 2 - (S - disc_K) ** 2 / np.pi
+    cm = np.sqrt(2 * np.pi / T) / (S + disc_K) * (excess + np.sqrt(np.maximum(radicand, 0.0)))
+    bs = np.sqrt(2 * np.pi / T) * call_price / S
+    guess = np.where(radicand >= 0, cm, bs)
+    guess = np.where(np.isfinite(guess), guess, 0.2)
+    return np.clip(guess, 0.01, 2.0)
+
+def implied_volatility(price, spot, strike, time_to_expiry_days, option_type="CE",
+                       r=R, tol=1e-6, max_iter=50):
+    """
+    Inverts Black-Scholes for many contracts at once.
+    Inputs broadcast like calculate_greeks_batch; option_type may be 'CE'/'PE',
+    an array of them, or a boolean array (True = CE).
+    Uses Halley steps from a Corrado-Miller guess, falling back to bisection
+    whenever a step leaves the per-element bracket. Converged elements are
+    masked out of further iterations.
+    Returns IV in percent (NaN where the price violates no-arbitrage bounds).
+    """
+    P = np.asarray(price, dtype=float)
+    S = np.asarray(spot, dtype=float)
+    K = np.asarray(strike, dtype=float)
+    days = np.asarray(time_to_expiry_days, dtype=float)
+
+    is_call = np.asarray(option_type)
+    if is_call.dtype != bool:
+        is_call = np.char.upper(is_call.astype(str)) == "CE"
+
+    P, S, K, days, is_call = np.broadcast_arrays(P, S, K, days, is_call)
+    P, S, K, days = (a.ravel() for a in (P, S, K, days))
+    is_call = is_call.ravel()
+    shape = np.broadcast_shapes(np.shape(price), np.shape(spot), np.shape(strike),
+                                np.shape(time_to_expiry_days), np.shape(option_type))
+
+    T = np.maximum(days, 1e-6) / 365.0
+    disc_K = K * np.exp(-r * T)
+
+    # Solve every contract as a call: puts are mapped via put-call parity
+    target = np.where(is_call, P, P + S - disc_K)
+
+    lower_bound = np.maximum(S - disc_K, 0.0)
+    valid = (P > 0) & (days > 0) & (target > lower_bound) & (target < S)
+
+    sigma = np.full(P.shape, np.nan)
+    if not valid.any():
+        return sigma.reshape(shape) * 100.0
+
+    S_v, K_v, T_v, tgt = S[valid], K[valid], T[valid], target[valid]
+    lo = np.full(tgt.shape, MIN_VOL)
+    hi = np.full(tgt.shape, MAX_VOL)
+    x = _initial_guess(tgt, S_v, K_v, T_v, r)
+    active = np.ones(tgt.shape, dtype=bool)
+
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+
+        xs = x[idx]
+        model, vega, d1, d2 = _call_price_vega(S_v[idx], K_v[idx], T_v[idx], r, xs)
+        diff = model - tgt[idx]
+
+        # Tighten the bracket around the root
+        too_high = diff > 0
+        hi[idx] = np.where(too_high, xs, hi[idx])
+        lo[idx] = np.where(too_high, lo[idx], xs)
+
+        # Halley step (volga = vega * d1 * d2 / sigma); plain Newton where the
+        # curvature correction is large, e.g. on the flat far-OTM tail
+        volga = vega * d1 * d2 / xs
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = diff / vega
+            correction = 0.5 * newton * volga / vega
+            step = np.where(np.abs(correction) < 0.5, newton / (1 - correction), newton)
+        x_new = xs - step
+
+        # Bisection fallback when the step is undefined or leaves the bracket
+        bad = ~np.isfinite(x_new) | (x_new < lo[idx]) | (x_new > hi[idx])
+        x_new = np.where(bad, 0.5 * (lo[idx] + hi[idx]), x_new)
+
+        done = (np.abs(diff) < tol * np.maximum(tgt[idx], 1.0)) | (hi[idx] - lo[idx] < 1e-10)
+        x[idx] = np.where(done, xs, x_new)
+        active[idx[done]] = False
+
+    sigma[valid] = x
+    return sigma.reshape(shape) * 100.0
+
+def fill_chain_iv(chain_df, spot, time_to_expiry_days):
+    """
+    Fills 'ce_iv'/'pe_iv' (percent) from 'ce_ltp'/'pe_ltp' for a whole chain.
+    Strikes whose LTP cannot be inverted keep any IV already in the chain.
+    Returns a copy of the chain.
+    """
+    out = chain_df.copy()
+    strikes = chain_df['strike'].to_numpy(dtype=float)
+
+    for side in ("ce", "pe"):
+        ltp_col, iv_col = f"{side}_ltp", f"{side}_iv"
+        if ltp_col not in chain_df.columns:
+            continue
+        solved = implied_volatility(chain_df[ltp_col].to_numpy(dtype=float), spot,
+                                    strikes, time_to_expiry_days, side.upper())
+        if iv_col in chain_df.columns:
+            solved = np.where(np.isfinite(solved), solved, chain_df[iv_col].to_numpy(dtype=float))
+        out[iv_col] = np.round(solved, 2)
+
+    return out
+
+def atm_implied_vol(chain_df, spot):
+    """
+    Returns the at-the-money IV (percent) from a chain with 'ce_iv'/'pe_iv',
+    averaging the two sides at the strike closest to spot. None if unavailable.
+    """
+    if chain_df is None or chain_df.empty or 'ce_iv' not in chain_df.columns or 'pe_iv' not in chain_df.columns:
+        return None
+    strikes = chain_df['strike'].to_numpy(dtype=float)
+    i = int(np.argmin(np.abs(strikes - spot)))
+    ivs = np.array([chain_df['ce_iv'].iloc[i], chain_df['pe_iv'].iloc[i]], dtype=float)
+    ivs = ivs[np.isfinite(ivs) & (ivs > 0)]
+    if ivs.size == 0:
+        return None
+    return round(float(ivs.mean()), 2)
@@ -1,6 +1,7 @@
-import pandas as pd
-from datetime import datetime, timedelta
-from src.integration.kite_app import kite_client
+from datetime import datetime
+from src.integration.instrument_master import instrument_master
+from src.integration.quote_fetcher import fetch_quote_batches
+from src.quant_engine.strike_index import strike_index_for
 
 def get_option_chain_data(symbol="NIFTY", expiry_type="weekly"):
     """
@@ -9,26 +10,16 @@ def get_option_chain_data(symbol="NIFTY", expiry_type="weekly"):
     expiry_type: 'weekly' or 'monthly'
     Returns: DataFrame with option chain or raises exception if unavailable
     """
+    import pandas as pd
     print(f"--- Building {symbol} {expiry_type} Option Chain ---")
     
-    # 1. Fetch Instruments
-    instruments = kite_client.get_instruments()
-    if not instruments:
+    # 1. Resolve expiries from the cached instrument master
+    if len(instrument_master) == 0:
         raise Exception(f"Failed to fetch instruments from Kite API. Cannot build option chain for {symbol}. Please check API connection.")
 
-    # 2. Convert to DataFrame
-    df = pd.DataFrame(instruments)
-    
-    # 3. Filter by Symbol
-    df = df[df['name'] == symbol]
-    
-    # 4. Filter by Expiry
-    # Logic to distinguish weekly vs monthly: 
-    # Use 'expiry' column. Sort by date. Closest is current weekly/monthly.
-    df['expiry'] = pd.to_datetime(df['expiry'])
-    today = datetime.now()
-    future_expiries = df[df['expiry'] >= today]['expiry'].unique()
-    future_expiries.sort()
+    # 2. Filter by Expiry
+    # Expiries are pre-sorted per underlying. Closest is current weekly/monthly.
+    future_expiries = instrument_master.get_expiries(symbol, from_date=datetime.now())
     
     if len(future_expiries) == 0:
         return pd.DataFrame()
@@ -36,19 +27,20 @@ def get_option_chain_data(symbol="NIFTY", expiry_type="weekly"):
     target_expiry = future_expiries[0] # Nearest expiry
     # If user wants monthly, logic would be slightly more complex (last Thursday of month)
     
-    df_expiry = df[df['expiry'] == target_expiry]
+    df_expiry = instrument_master.get_contracts(symbol, target_expiry)
     
-    # 5. Filter Strikes (Optional optimization to reduce API calls)
+    # 3. Filter Strikes (Optional optimization to reduce API calls)
     # For now, return the filtered DataFrame of instruments
     return df_expiry[['instrument_token', 'tradingsymbol', 'strike', 'instrument_type', 'expiry']]
 
 def fetch_live_chain_snapshot(chain_df):
     """
     Takes the chain dataframe and fetches live quotes.
+    Quotes are fetched in broker-sized, rate-limited batches (see quote_fetcher).
+    Returns: dict of Kite quotes keyed like kite.quote(); use fetch_quotes for a DataFrame
     """
-    tokens = chain_df['instrument_token'].tolist()
-    # Kite allows max 500 tokens maybe? Batching might be needed.
-    quotes = kite_client.get_quote(tokens)
+    tokens = chain_df['instrument_token'].dropna().astype(int).tolist()
+    quotes, _ = fetch_quote_batches(tokens)
     
     return quotes
 
@@ -64,7 +56,7 @@ def get_expiry_date(chain_df):
 
 def get_lot_size(symbol="NIFTY"):
     """
-    Gets the lot size for the given symbol from Kite instruments.
+    Gets the lot size for the given symbol from the cached Kite instruments.
     Returns: int (lot size) or raises exception
     """
     lot_sizes = {
@@ -74,17 +66,11 @@ def get_lot_size(symbol="NIFTY"):
         "MIDCPNIFTY": 75
     }
     
-    # Try to fetch from Kite API first
+    # Try the cached instrument master first
     try:
-        instruments = kite_client.get_instruments()
-        if instruments:
-            df = pd.DataFrame(instruments)
-            symbol_data = df[df['name'] == symbol]
-            if not symbol_data.empty:
-                # Get lot_size from first instrument
-                lot_size = symbol_data['lot_size'].iloc[0]
-                if lot_size:
-                    return int(lot_size)
+        lot_size = instrument_master.get_lot_size(symbol)
+        if lot_size:
+            return int(lot_size)
     except Exception as e:
         print(f"Could not fetch lot size from API: {e}")
     
@@ -96,24 +82,12 @@ def find_closest_strike_in_chain(chain_df, target_strike, option_type="CE"):
     Finds the closest available strike in the option chain.
     Args:
         chain_df: Option chain DataFrame
-        target_strike: Desired strike price
-        option_type: 'CE' or 'PE'
+        target_strike: Desired strike price (or a list of them)
+        option_type: 'CE' or 'PE' (or a list aligned with target_strike)
     Returns:
-        Dict with strike info {'strike', 'tradingsymbol', 'instrument_token'}
+        Dict with strike info {'strike', 'tradingsymbol', 'instrument_token'},
+        or a list of them for list inputs
     """
-    # Filter by option type
-    filtered = chain_df[chain_df['instrument_type'] == option_type].copy()
-    
-    if filtered.empty:
-        raise Exception(f"No {option_type} options found in chain")
-    
-    # Find closest strike
-    filtered['distance'] = abs(filtered['strike'] - target_strike)
-    closest = filtered.nsmallest(1, 'distance').iloc[0]
-    
-    return {
-        'strike': int(closest['strike']),
-        'tradingsymbol': closest['tradingsymbol'],
-        'instrument_token': closest['instrument_token']
-    }
-
+    # Sorted-strike index is built once per chain snapshot and binary-searched
+    legs = strike_index_for(chain_df).resolve(target_strike, option_type)
+    return legs if isinstance(target_strike, (list, tuple)) else legs[0]
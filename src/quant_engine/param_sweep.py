@@ -0,0 +1,161 @@
+"""
+Grid sweep over (sigma multiplier, days to expiry, IV regime) for the short strangle.
+
+Every combination is evaluated in one broadcast pass through
+calculate_range / strike rounding / Black-Scholes:
+  premium      credit for selling both legs (points)
+  breakevens   put strike - premium, call strike + premium
+  pop          probability that spot expires between the breakevens (lognormal, IV vol)
+  expected_pnl premium minus the legs' value at realized vol = realized_ratio x IV,
+               i.e. the edge from implied > realized volatility (points)
+  pop_premium  premium if pop >= min_pop, else pop - 1 (negative): the default ranking.
+
+expected_pnl scales with premium, so it always rises as sigma falls and its
+"optimum" is simply the tightest strikes. The default ranking instead takes
+the richest premium that still meets the POP floor, trading credit against
+the chance of finishing beyond a breakeven.
+
+    table = sweep(spot=22000, sigma_mults=np.linspace(1, 2, 21), dtes=[3, 7, 14], ivs=[11, 14, 18, 25])
+    check = check_recommendation(22000, 14.5, 7, recommended_sigma=1.5)
+"""
+import os
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Sequence
+import numpy as np
+from src.quant_engine.greeks import R, norm, calculate_greeks_batch
+from src.quant_engine.sigma_calculator import get_strangle_strikes_batch
+
+# Range the strategist is allowed to recommend
+SIGMA_RANGE = (1.0, 2.0)
+DEFAULT_SIGMAS = np.round(np.linspace(*SIGMA_RANGE, 21), 2)
+# Realized / implied volatility assumed for expected P&L (implied usually trades rich)
+REALIZED_RATIO = 0.85
+# Minimum probability of profit for the default (pop_premium) ranking
+MIN_POP = 0.80
+# Grids larger than this are split across a process pool
+CHUNK_SIZE = 250_000
+
+def _prob_above(spot, strike, T, v):
+    """P(S_T > strike) under a lognormal with volatility v and drift R."""
+    d2 = (np.log(spot / strike) + (R - 0.5 * v ** 2) * T) / (v * np.sqrt(T))
+    return norm.cdf(d2)
+
+def evaluate(spot, sigma_mult, dte, iv, base: int = 50, realized_ratio: float = REALIZED_RATIO,
+             min_pop: float = MIN_POP) -> Dict[str, np.ndarray]:
+    """
+    Strangle metrics for inputs that broadcast against each other
+    (scalars or NumPy arrays). Returns a dict of arrays.
+    """
+    spot = np.asarray(spot, dtype=float)
+    dte = np.asarray(dte, dtype=float)
+    iv = np.asarray(iv, dtype=float)
+    strikes = get_strangle_strikes_batch(spot, iv, dte, sigma_mult, base)
+    call_k, put_k = strikes["sell_call_strike"], strikes["sell_put_strike"]
+
+    ce = calculate_greeks_batch(spot, call_k, dte, iv, "CE")
+    pe = calculate_greeks_batch(spot, put_k, dte, iv, "PE")
+    premium = ce["price"] + pe["price"]
+    lower, upper = put_k - premium, call_k + premium
+
+    T = np.maximum(dte, 1e-9) / 365.0
+    v = np.maximum(iv, 1e-9) / 100.0
+    pop = _prob_above(spot, lower, T, v) - _prob_above(spot, upper, T, v)
+
+    realized_iv = iv * realized_ratio
+    fair = (calculate_greeks_batch(spot, call_k, dte, realized_iv, "CE")["price"]
+            + calculate_greeks_batch(spot, put_k, dte, realized_iv, "PE")["price"])
+
+    return {
+        "sigma_mult": np.broadcast_to(sigma_mult, premium.shape),
+        "dte": np.broadcast_to(dte, premium.shape),
+        "iv": np.broadcast_to(iv, premium.shape),
+        "call_strike": call_k,
+        "put_strike": put_k,
+        "premium": premium,
+        "lower_breakeven": lower,
+        "upper_breakeven": upper,
+        "pop": pop,
+        "expected_pnl": premium - fair,
+        # Feasible combinations (pop >= min_pop) outrank all others; those rank by POP
+        "pop_premium": np.where(pop >= min_pop, premium, pop - 1.0),
+        "delta": ce["delta"] + pe["delta"],
+        "vega": ce["vega"] + pe["vega"],
+    }
+
+def _evaluate_chunk(args) -> Dict[str, np.ndarray]:
+    spot, sigma_mult, dte, iv, base, realized_ratio, min_pop = args
+    return evaluate(spot, sigma_mult, dte, iv, base, realized_ratio, min_pop)
+
+def sweep(spot: float, sigma_mults: Sequence[float] = DEFAULT_SIGMAS, dtes: Sequence[int] = (7,),
+          ivs: Sequence[float] = (14.0,), base: int = 50, lot_size: int = 50,
+          realized_ratio: float = REALIZED_RATIO, rank_by: str = "pop_premium", min_pop: float = MIN_POP,
+          workers: int = None, chunk_size: int = CHUNK_SIZE):
+    """
+    Evaluates the full sigma x DTE x IV grid and returns a DataFrame ranked by
+    `rank_by` (descending) within each (dte, iv) regime, plus premium_value (x lot_size).
+    Grids larger than chunk_size are split across `workers` processes
+    (default: CPU count; workers=1 stays in-process).
+    """
+    import pandas as pd
+    grid = np.meshgrid(np.asarray(sigma_mults, dtype=float), np.asarray(dtes, dtype=float),
+                       np.asarray(ivs, dtype=float), indexing="ij")
+    sig, dte, iv = (g.ravel() for g in grid)
+
+    workers = workers or os.cpu_count() or 1
+    bounds = range(0, len(sig), chunk_size)
+    chunks = [(spot, sig[i:i + chunk_size], dte[i:i + chunk_size], iv[i:i + chunk_size], base, realized_ratio,
+               min_pop) for i in bounds]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            parts = list(pool.map(_evaluate_chunk, chunks))
+    else:
+        parts = [_evaluate_chunk(c) for c in chunks]
+
+    table = pd.DataFrame({k: np.concatenate([p[k] for p in parts]) for k in parts[0]})
+    table["premium_value"] = table["premium"] * lot_size
+    table["rank"] = (table.groupby(["dte", "iv"])[rank_by]
+                     .rank(ascending=False, method="first").astype(int))
+    return table.sort_values(["dte", "iv", "rank"]).reset_index(drop=True)
+
+@lru_cache(maxsize=4096)
+def _optimum(spot_key: float, dte: int, iv_key: float, base: int, rank_by: str, min_pop: float) -> Dict[str, Any]:
+    metrics = evaluate(spot_key, DEFAULT_SIGMAS, dte, iv_key, base, min_pop=min_pop)
+    best = int(np.argmax(metrics[rank_by]))
+    return {k: float(v[best]) for k, v in metrics.items()}
+
+def optimal_sigma(spot: float, iv: float, dte: int, base: int = 50, rank_by: str = "pop_premium",
+                  min_pop: float = MIN_POP) -> Dict[str, Any]:
+    """
+    Best sigma multiplier in SIGMA_RANGE for one market state (by default the
+    richest premium with pop >= min_pop).
+    Cached on spot (to the strike step) and IV (to 0.1%), so repeated checks are lookups.
+    """
+    return dict(_optimum(float(round(spot / base) * base), int(dte), round(float(iv), 1), base, rank_by,
+                         float(min_pop)))
+
+def check_recommendation(spot: float, iv: float, dte: int, recommended_sigma: float, base: int = 50,
+                         rank_by: str = "pop_premium", min_pop: float = MIN_POP) -> Dict[str, Any]:
+    """
+    Compares an LLM-recommended sigma against the sweep optimum for the same market state.
+    meets_min_pop flags a sigma that is too tight for the POP floor; premium_gap is the
+    credit (points) given up versus the optimum (negative when the recommendation
+    collects more, i.e. by taking more tail risk).
+    """
+    optimum = optimal_sigma(spot, iv, dte, base, rank_by, min_pop)
+    # Same rounded inputs as the cached optimum, so the two are comparable
+    spot_key, iv_key = float(round(spot / base) * base), round(float(iv), 1)
+    chosen = {k: float(v) for k, v in evaluate(spot_key, recommended_sigma, int(dte), iv_key, base,
+                                                min_pop=min_pop).items()}
+    return {
+        "recommended_sigma": float(recommended_sigma),
+        "optimal_sigma": optimum["sigma_mult"],
+        "sigma_gap": round(float(recommended_sigma) - optimum["sigma_mult"], 2),
+        "rank_by": rank_by,
+        "min_pop": min_pop,
+        "meets_min_pop": chosen["pop"] >= min_pop,
+        "premium_gap": round(optimum["premium"] - chosen["premium"], 2),
+        "recommended": chosen,
+        "optimal": optimum,
+        "shortfall": optimum[rank_by] - chosen[rank_by],
+    }
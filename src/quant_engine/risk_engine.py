@@ -0,0 +1,146 @@
+import os
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+import numpy as np
+from src.quant_engine.greeks import calculate_greeks_batch, calculate_price_batch
+
+# Hard limits checked before any LLM review. Greeks are position totals:
+# delta/gamma in underlying units, theta per day and vega per 1% IV in rupees.
+DEFAULT_LIMITS = {
+    "max_abs_delta": float(os.environ.get("RISK_MAX_ABS_DELTA", 100.0)),
+    "max_abs_gamma": float(os.environ.get("RISK_MAX_ABS_GAMMA", 1.0)),
+    "max_abs_vega": float(os.environ.get("RISK_MAX_ABS_VEGA", 5000.0)),
+    "max_scenario_loss": float(os.environ.get("RISK_MAX_SCENARIO_LOSS", 200000.0)),
+    "min_iv": float(os.environ.get("RISK_MIN_IV", 11.0)),  # no option selling below 11% IV
+}
+
+# Scenario grid: relative spot moves x absolute IV changes (points) x days elapsed
+SPOT_SHOCKS = np.linspace(-0.10, 0.10, 41)
+IV_SHOCKS = np.linspace(-5.0, 15.0, 21)
+DAY_SHOCKS = np.array([0.0, 1.0, 2.0, 3.0, 5.0])
+
+def legs_to_arrays(legs: Sequence[Dict[str, Any]], iv: float, days: float) -> Dict[str, np.ndarray]:
+    """
+    Order/position legs -> aligned arrays. Quantity is signed (SELL negative).
+    Legs may carry their own 'iv' (percent) and 'days_to_expiry'; otherwise the
+    market iv / days apply.
+    """
+    return {
+        "strike": np.array([float(l["strike"]) for l in legs]),
+        "is_call": np.array([l["type"] == "CE" for l in legs], dtype=bool),
+        "quantity": np.array([(-1.0 if l.get("action", "SELL") == "SELL" else 1.0) * float(l["quantity"])
+                              for l in legs]),
+        "iv": np.array([float(l.get("iv") or iv) for l in legs]),
+        "days": np.array([float(l.get("days_to_expiry") or days) for l in legs]),
+    }
+
+def net_order_legs(order: Dict[str, Any], open_positions: Sequence[Dict[str, Any]] = ()) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Legs held once the order fills: open positions, less those its close legs
+    ('close': True) unwind, plus its opening legs with the per-side surface vols
+    the executor selected strikes with. Close legs are never priced themselves:
+    a roll at the same strikes would otherwise net the order to zero risk.
+    Returns (legs, problems); problems lists close legs without a matching open
+    position and ADJUST orders that close nothing.
+    """
+    analysis = order.get("analysis", {})
+    held = [dict(leg) for leg in open_positions]
+    closes = [leg for leg in order.get("legs", []) if leg.get("close")]
+    problems = []
+    for leg in closes:
+        remaining = float(leg["quantity"])
+        for position in held:
+            if remaining <= 0:
+                break
+            same = (position.get("instrument") == leg["instrument"] if leg.get("instrument")
+                    else (position["type"], float(position["strike"])) == (leg["type"], float(leg["strike"])))
+            if same and position.get("action", "SELL") != leg.get("action", "BUY") and position["quantity"]:
+                unwound = min(remaining, float(position["quantity"]))
+                position["quantity"] = float(position["quantity"]) - unwound
+                remaining -= unwound
+        if remaining > 0:
+            problems.append(f"Close leg {leg.get('action', 'BUY')} {leg['quantity']} "
+                            f"{leg.get('instrument') or leg['type']} has no matching open position")
+    if order.get("action") == "ADJUST" and not closes:
+        problems.append("ADJUST order has no open positions to close")
+
+    proposed = [{**leg, "iv": leg.get("iv") or analysis.get("call_iv" if leg["type"] == "CE" else "put_iv")}
+                for leg in order.get("legs", []) if not leg.get("close")]
+    return [p for p in held if float(p["quantity"]) > 0] + proposed, problems
+
+def portfolio_greeks(legs: Dict[str, np.ndarray], spot: float) -> Dict[str, float]:
+    """Net price/delta/gamma/theta/vega of the legs (quantity-weighted sums)."""
+    greeks = calculate_greeks_batch(spot, legs["strike"], legs["days"], legs["iv"], legs["is_call"])
+    totals = {name: float(np.dot(legs["quantity"], values)) for name, values in greeks.items()}
+    totals["value"] = totals.pop("price")  # mark-to-market value (negative for net short)
+    return totals
+
+def scenario_pnl(legs: Dict[str, np.ndarray], spot: float, spot_shocks=SPOT_SHOCKS,
+                 iv_shocks=IV_SHOCKS, day_shocks=DAY_SHOCKS) -> np.ndarray:
+    """
+    P&L of the legs for every (spot shock, IV shock, days elapsed) scenario,
+    priced in one broadcast Black-Scholes pass. Returns shape (spots, ivs, days).
+    """
+    S = spot * (1.0 + np.asarray(spot_shocks, dtype=float))[:, None, None, None]
+    v = np.maximum(legs["iv"] + np.asarray(iv_shocks, dtype=float)[None, :, None, None], 1.0)
+    T = np.maximum(legs["days"] - np.asarray(day_shocks, dtype=float)[None, None, :, None], 0.0)
+    now = calculate_price_batch(spot, legs["strike"], legs["days"], legs["iv"], legs["is_call"])
+    shocked = calculate_price_batch(S, legs["strike"], T, v, legs["is_call"])
+    return (shocked - now) @ legs["quantity"]
+
+def assess_order(order: Dict[str, Any], market_data: Dict[str, Any], open_positions: List[Dict[str, Any]] = (),
+                 limits: Dict[str, float] = None) -> Dict[str, Any]:
+    """
+    Deterministic pre-trade check of an executor order plus existing positions.
+    Checks run cheapest first (close legs vs open positions, IV floor, Greeks,
+    then the scenario grid)
+    and stop at the first stage with a breach, so rejections are fast.
+    Returns {'approved', 'breaches' (list of str), 'greeks', 'worst_loss',
+    'worst_scenario', 'scenarios', 'limits', 'elapsed_us'}; metrics from
+    stages that did not run are None.
+    """
+    start = time.perf_counter()
+    limits = {**DEFAULT_LIMITS, **(limits or {})}
+    spot = float(market_data.get("spot_price"))
+    iv = float(market_data.get("iv") or 0.0)
+    days = float(market_data.get("days_to_expiry") or 1)
+    result = {"approved": False, "breaches": [], "greeks": None, "worst_loss": None,
+              "worst_scenario": None, "scenarios": 0, "limits": limits}
+
+    def done():
+        result["approved"] = not result["breaches"]
+        result["elapsed_us"] = round((time.perf_counter() - start) * 1e6, 1)
+        return result
+
+    held, problems = net_order_legs(order, open_positions)
+    if problems:
+        result["breaches"].extend(problems)
+        return done()
+    legs = legs_to_arrays(held, iv, days)
+
+    if iv and iv < limits["min_iv"] and (legs["quantity"] < 0).any():
+        result["breaches"].append(f"IV {iv:.2f}% below minimum {limits['min_iv']}% for selling options")
+        return done()
+
+    greeks = portfolio_greeks(legs, spot)
+    result["greeks"] = {k: round(v, 4) for k, v in greeks.items()}
+    for name in ("delta", "gamma", "vega"):
+        limit = limits[f"max_abs_{name}"]
+        if abs(greeks[name]) > limit:
+            result["breaches"].append(f"|{name}| {abs(greeks[name]):.4g} exceeds limit {limit:g}")
+    if result["breaches"]:
+        return done()
+
+    pnl = scenario_pnl(legs, spot)
+    worst = np.unravel_index(np.argmin(pnl), pnl.shape)
+    result["worst_loss"] = round(float(-pnl[worst]), 2)
+    result["worst_scenario"] = {
+        "spot_move_pct": round(float(SPOT_SHOCKS[worst[0]]) * 100, 2),
+        "iv_change": round(float(IV_SHOCKS[worst[1]]), 2),
+        "days_elapsed": float(DAY_SHOCKS[worst[2]]),
+    }
+    result["scenarios"] = int(pnl.size)
+    if result["worst_loss"] > limits["max_scenario_loss"]:
+        result["breaches"].append(f"Scenario loss {result['worst_loss']:,.0f} exceeds limit "
+                                  f"{limits['max_scenario_loss']:,.0f}")
+    return done()
@@ -1,16 +1,22 @@
-import math
+import numpy as np
+from src.quant_engine.strike_index import StrikeIndex
 
 def calculate_range(spot: float, iv: float, days_to_expiry: int) -> float:
     """
     Calculates the expected range based on IV and time.
     Formula: Spot * (IV / 100) * sqrt(Days / 365)
+    Also accepts NumPy arrays (broadcast elementwise).
     """
-    return spot * (iv / 100) * math.sqrt(days_to_expiry / 365)
+    return spot * (iv / 100) * np.sqrt(days_to_expiry / 365)
 
 def round_to_nearest(value: float, base: int = 50) -> int:
     """Rounds a value to the nearest base (e.g., 50 for Nifty)."""
     return int(base * round(value / base))
 
+def round_to_nearest_batch(values, base: int = 50) -> np.ndarray:
+    """Vectorized round_to_nearest (same round-half-to-even behaviour)."""
+    return base * np.round(np.asarray(values, dtype=float) / base)
+
 def get_strangle_strikes(spot: float, iv: float, days: int, sigma_mult: float = 1.0) -> dict:
     """
     Calculates the Short Strangle strikes based on Sigma range.
@@ -40,6 +46,25 @@ def get_strangle_strikes(spot: float, iv: float, days: int, sigma_mult: float =
         "sell_put_strike": put_strike
     }
 
+def get_strangle_strikes_batch(spot, iv, days, sigma_mult=1.0, base: int = 50) -> dict:
+    """
+    Vectorized get_strangle_strikes: inputs broadcast against each other
+    (scalars or NumPy arrays). Returns a dict of float arrays with the same keys.
+    """
+    market_range = calculate_range(np.asarray(spot, dtype=float), np.asarray(iv, dtype=float),
+                                   np.asarray(days, dtype=float))
+    adjustment = market_range * np.asarray(sigma_mult, dtype=float)
+    upper_bound = spot + adjustment
+    lower_bound = spot - adjustment
+    return {
+        "range_points": market_range,
+        "sigma_mult": np.broadcast_to(sigma_mult, np.shape(adjustment)),
+        "upper_bound_raw": upper_bound,
+        "lower_bound_raw": lower_bound,
+        "sell_call_strike": round_to_nearest_batch(upper_bound, base),
+        "sell_put_strike": round_to_nearest_batch(lower_bound, base),
+    }
+
 def get_atm_strike(spot: float) -> int:
     """Returns the At-The-Money (ATM) strike."""
     return round_to_nearest(spot)
@@ -49,15 +74,17 @@ def find_closest_available_strike(target_strike: float, available_strikes: list,
     Finds the closest available strike from a list of available strikes.
     Args:
         target_strike: Calculated ideal strike
-        available_strikes: List of actual strikes available in option chain
+        available_strikes: List of actual strikes available in option chain,
+            or a StrikeIndex built once for the chain snapshot
         base: Strike interval (50 for Nifty, 100 for BankNifty)
     Returns:
         Closest available strike
     """
-    if not available_strikes:
+    if available_strikes is None or len(available_strikes) == 0:
         # Fallback to rounding if no chain available
         return round_to_nearest(target_strike, base)
     
-    # Find closest strike in available list
-    closest = min(available_strikes, key=lambda x: abs(x - target_strike))
-    return int(closest)
+    # Binary search over the sorted strikes
+    if not isinstance(available_strikes, StrikeIndex):
+        available_strikes = StrikeIndex.from_strikes(available_strikes)
+    return int(available_strikes.nearest(target_strike)[0])
@@ -0,0 +1,129 @@
+import weakref
+from typing import Any, Dict, List
+import numpy as np
+
+SIDES = ("CE", "PE")
+NO_TOKEN = -1
+
+def nearest_sorted(sorted_values: np.ndarray, targets) -> np.ndarray:
+    """
+    Position of the closest value in a sorted array for each target (binary search).
+    Ties go to the lower value, like min(..., key=abs distance) over a sorted list.
+    """
+    targets = np.asarray(targets, dtype=float)
+    n = len(sorted_values)
+    pos = np.searchsorted(sorted_values, targets, side="left")
+    right = np.minimum(pos, n - 1)
+    left = np.maximum(pos - 1, 0)
+    take_left = np.abs(targets - sorted_values[left]) <= np.abs(sorted_values[right] - targets)
+    return np.where(take_left, left, right)
+
+class StrikeIndex:
+    """
+    Sorted-strike index over one option-chain snapshot.
+    Holds the unique strikes as a sorted array plus per-side (CE/PE) trading
+    symbols and instrument tokens aligned to it; each side keeps its own sorted
+    array of strikes that actually have a contract. Closest-strike queries are
+    np.searchsorted binary searches and take arrays, so every leg of an order
+    resolves in one call.
+    """
+
+    def __init__(self, strikes, symbols: Dict[str, np.ndarray] = None, tokens: Dict[str, np.ndarray] = None,
+                 listed: Dict[str, np.ndarray] = None):
+        self.strikes = np.asarray(strikes, dtype=float)
+        n = len(self.strikes)
+        self.symbols = symbols or {side: np.full(n, None, dtype=object) for side in SIDES}
+        self.tokens = tokens or {side: np.full(n, NO_TOKEN, dtype=np.int64) for side in SIDES}
+        # By default every strike counts as listed on both sides
+        listed = listed or {side: np.ones(n, dtype=bool) for side in SIDES}
+        self._side_pos = {side: np.flatnonzero(listed[side]) for side in SIDES}
+        self._side_strikes = {side: self.strikes[self._side_pos[side]] for side in SIDES}
+
+    @classmethod
+    def from_strikes(cls, strikes) -> "StrikeIndex":
+        return cls(np.unique(np.asarray(strikes, dtype=float)))
+
+    @classmethod
+    def from_chain(cls, chain_df) -> "StrikeIndex":
+        """
+        Builds the index from either chain layout:
+        - one row per strike with tradingsymbol_ce/_pe (and optional instrument_token_ce/_pe), or
+        - one row per contract with strike, instrument_type, tradingsymbol, instrument_token
+          (instrument master / get_option_chain_data).
+        """
+        raw = chain_df['strike'].to_numpy(dtype=float)
+        strikes = np.unique(raw)
+        pos = np.searchsorted(strikes, raw)
+        symbols = {side: np.full(len(strikes), None, dtype=object) for side in SIDES}
+        tokens = {side: np.full(len(strikes), NO_TOKEN, dtype=np.int64) for side in SIDES}
+        listed = {side: np.zeros(len(strikes), dtype=bool) for side in SIDES}
+
+        for side in SIDES:
+            if 'instrument_type' in chain_df.columns:
+                rows = (chain_df['instrument_type'] == side).to_numpy()
+                symbol_col, token_col = 'tradingsymbol', 'instrument_token'
+            else:
+                rows = np.ones(len(chain_df), dtype=bool)
+                symbol_col, token_col = f'tradingsymbol_{side.lower()}', f'instrument_token_{side.lower()}'
+            if symbol_col in chain_df.columns:
+                values = chain_df[symbol_col].to_numpy(dtype=object)[rows]
+                # A strike is listed on a side only if it has a trading symbol there
+                present = np.array([isinstance(v, str) and bool(v) for v in values], dtype=bool)
+                symbols[side][pos[rows][present]] = values[present]
+                listed[side][pos[rows]] = present
+            else:
+                listed[side][pos[rows]] = True
+            if token_col in chain_df.columns:
+                tokens[side][pos[rows]] = chain_df[token_col].fillna(NO_TOKEN).to_numpy(dtype=np.int64)[rows]
+        return cls(strikes, symbols, tokens, listed)
+
+    def __len__(self) -> int:
+        return len(self.strikes)
+
+    def _positions(self, targets: np.ndarray, sides: np.ndarray) -> np.ndarray:
+        out = np.empty(len(targets), dtype=np.intp)
+        for side in SIDES:
+            mask = sides == side
+            if not mask.any():
+                continue
+            if not len(self._side_strikes[side]):
+                raise Exception(f"No {side} options found in chain")
+            out[mask] = self._side_pos[side][nearest_sorted(self._side_strikes[side], targets[mask])]
+        return out
+
+    def nearest(self, targets, side: str = "CE") -> np.ndarray:
+        """Closest listed strike on `side` for each target."""
+        targets = np.atleast_1d(np.asarray(targets, dtype=float))
+        return self.strikes[self._positions(targets, np.full(len(targets), side))]
+
+    def resolve(self, targets, sides) -> List[Dict[str, Any]]:
+        """
+        Batch lookup: one {'strike', 'tradingsymbol', 'instrument_token'} per target.
+        sides: 'CE'/'PE' or a sequence of them aligned with targets.
+        instrument_token is None when the chain has no token for the contract.
+        """
+        targets = np.atleast_1d(np.asarray(targets, dtype=float))
+        sides = np.broadcast_to(np.asarray(sides, dtype=object), targets.shape)
+        positions = self._positions(targets, sides)
+        legs = []
+        for side, i in zip(sides.tolist(), positions.tolist()):
+            token = int(self.tokens[side][i])
+            legs.append({
+                'strike': int(self.strikes[i]),
+                'tradingsymbol': self.symbols[side][i],
+                'instrument_token': None if token == NO_TOKEN else token,
+            })
+        return legs
+
+# One index per chain snapshot object; entries drop when the DataFrame is collected
+_index_cache = {}
+
+def strike_index_for(chain_df) -> StrikeIndex:
+    """StrikeIndex for a chain DataFrame, built on first use and reused for the same object."""
+    key = id(chain_df)
+    entry = _index_cache.get(key)
+    if entry is not None and entry[0]() is chain_df:
+        return entry[1]
+    index = StrikeIndex.from_chain(chain_df)
+    _index_cache[key] = (weakref.ref(chain_df, lambda _, key=key: _index_cache.pop(key, None)), index)
+    return index
@@ -0,0 +1,275 @@
+import time
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+import numpy as np
+from src.quant_engine.greeks import R
+from src.quant_engine.sigma_calculator import calculate_range, round_to_nearest
+
+# Minimum quotes for an SVI fit; fewer falls back to a spline in log-moneyness
+MIN_SVI_POINTS = 5
+# Quotes that moved less than this (IV points) since the last fit reuse it
+REFIT_TOL = 0.05
+# SVI fits worse than this RMSE (IV points) fall back to the spline
+MAX_SVI_RMSE = 1.0
+
+def svi_variance(params, k):
+    """Raw SVI implied variance (annualized, decimal): a + b (rho (k - m) + sqrt((k - m)^2 + sigma^2))."""
+    a, b, rho, m, sigma = params
+    d = k - m
+    return a + b * (rho * d + np.sqrt(d * d + sigma * sigma))
+
+def _fit_svi(k, vol, guess=None):
+    """Least-squares SVI fit of implied vols (decimal) in log-moneyness k. Returns (params, rmse)."""
+    from scipy.optimize import least_squares
+
+    var = vol ** 2
+    if guess is None:
+        span = max(float(k.max() - k.min()), 1e-3)
+        guess = (float(var.min()) * 0.9, float(np.ptp(var)) / span + 1e-3, -0.3, 0.0, span / 4)
+
+    def residuals(p):
+        model = np.sqrt(np.maximum(svi_variance(p, k), 1e-12))
+        # Keep minimum variance a + b sigma sqrt(1 - rho^2) non-negative
+        floor = p[0] + p[1] * p[4] * np.sqrt(1 - p[2] ** 2)
+        return np.append(model - vol, 10.0 * min(floor, 0.0))
+
+    lower = (-1.0, 0.0, -0.999, -1.0, 1e-4)
+    upper = (4.0, 50.0, 0.999, 1.0, 2.0)
+    guess = np.clip(guess, lower, upper)
+    fit = least_squares(residuals, guess, bounds=(lower, upper), method="trf", x_scale="jac", max_nfev=200)
+    rmse = float(np.sqrt(np.mean(fit.fun[:-1] ** 2))) * 100.0
+    return tuple(float(x) for x in fit.x), rmse
+
+class VolSurface:
+    """
+    Implied-volatility surface for one underlying.
+
+    Each expiry (keyed by expiry date) holds a smile fitted in log-moneyness
+    k = ln(K / F), F = spot * exp(R T): raw SVI by default, or a natural cubic
+    spline of implied variance when there are too few quotes or SVI fits badly.
+    Between expiries the surface interpolates total variance w = vol^2 T
+    linearly in T at constant k, extrapolating with flat vol outside the fitted
+    expiries; w is made non-decreasing in T so there is no calendar arbitrage.
+
+    Slices are cached: update_slice/update_from_chain skip the fit when quotes
+    moved less than REFIT_TOL, and refits are warm-started from the previous
+    parameters. update_quotes merges a partial set of strike quotes (e.g. from
+    ticks) into the stored slice before refitting.
+
+    Slices fitted on an earlier day than the incoming snapshot, and expiries
+    already past, are evicted on update, so a long-running process never
+    interpolates through yesterday's smiles or rolled expiries.
+    """
+
+    def __init__(self, symbol: str = "NIFTY", r: float = R, refit_tol: float = REFIT_TOL):
+        self.symbol = symbol
+        self.r = r
+        self.refit_tol = refit_tol
+        self.spot = None
+        self._slices: Dict[date, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.fits = 0
+        self.cache_hits = 0
+        self.evictions = 0
+
+    # --- fitting ---
+
+    def _fit_slice(self, dte: float, strikes: np.ndarray, ivs: np.ndarray, spot: float,
+                   previous: Optional[Dict[str, Any]], expiry: date, asof: datetime) -> Dict[str, Any]:
+        start = time.perf_counter()
+        T = dte / 365.0
+        forward = spot * np.exp(self.r * T)
+        k = np.log(strikes / forward)
+        vol = ivs / 100.0
+        method, params, rmse = "spline", None, None
+        if len(k) >= MIN_SVI_POINTS:
+            guess = previous["params"] if previous and previous["method"] == "svi" else None
+            try:
+                params, rmse = _fit_svi(k, vol, guess)
+                method = "svi" if rmse <= MAX_SVI_RMSE else "spline"
+            except Exception as e:
+                print(f"⚠️ [VolSurface] SVI fit failed for {dte}d, using spline: {e}")
+        spline = None
+        if method == "spline":
+            from scipy.interpolate import CubicSpline
+            params = None
+            if len(k) >= 2:
+                spline = CubicSpline(k, vol ** 2, bc_type="natural")
+                rmse = 0.0
+        self.fits += 1
+        return {
+            "dte": dte, "T": T, "expiry": expiry, "asof": asof, "spot": spot, "forward": forward,
+            "strikes": strikes, "ivs": ivs, "k": k,
+            "method": method, "params": params, "spline": spline, "rmse": rmse,
+            "fit_ms": (time.perf_counter() - start) * 1000.0,
+        }
+
+    @staticmethod
+    def _clean(strikes, ivs):
+        strikes = np.asarray(strikes, dtype=float)
+        ivs = np.asarray(ivs, dtype=float)
+        ok = np.isfinite(strikes) & np.isfinite(ivs) & (strikes > 0) & (ivs > 0)
+        strikes, ivs = strikes[ok], ivs[ok]
+        order = np.argsort(strikes)
+        strikes, first = np.unique(strikes[order], return_index=True)
+        return strikes, ivs[order][first]
+
+    @staticmethod
+    def _expiry_key(dte: float, expiry, asof: datetime) -> date:
+        if expiry is None:
+            return (asof + timedelta(days=float(dte))).date()
+        return expiry.date() if isinstance(expiry, datetime) else expiry
+
+    def _evict_stale(self, asof: datetime):
+        """Drops slices fitted before asof's day and expiries already past (caller holds the lock)."""
+        today = asof.date()
+        stale = [key for key, s in self._slices.items() if key < today or s["asof"].date() < today]
+        for key in stale:
+            del self._slices[key]
+        self.evictions += len(stale)
+
+    def update_slice(self, dte: float, strikes, ivs, spot: float, expiry=None,
+                     asof: datetime = None) -> Optional[Dict[str, Any]]:
+        """
+        Sets the quotes (IV in percent per strike) for one expiry and refits if they changed.
+        expiry (date/datetime) keys the slice; it defaults to asof + dte days.
+        asof is the snapshot time (default now). Returns the slice dict, or None when
+        there are no usable quotes.
+        """
+        strikes, ivs = self._clean(strikes, ivs)
+        if not len(strikes):
+            return None
+        dte = float(dte)
+        asof = asof or datetime.now()
+        key = self._expiry_key(dte, expiry, asof)
+        with self._lock:
+            self._evict_stale(asof)
+            self.spot = spot
+            previous = self._slices.get(key)
+            if (previous is not None and previous["dte"] == dte and np.array_equal(previous["strikes"], strikes)
+                    and np.max(np.abs(previous["ivs"] - ivs)) < self.refit_tol
+                    and abs(previous["spot"] - spot) / spot < 1e-4):
+                self.cache_hits += 1
+                return previous
+            fitted = self._fit_slice(dte, strikes, ivs, spot, previous, key, asof)
+            self._slices[key] = fitted
+            return fitted
+
+    def update_quotes(self, dte: float, strikes, ivs, spot: float = None, expiry=None,
+                      asof: datetime = None) -> Optional[Dict[str, Any]]:
+        """Merges changed strike quotes into an existing expiry's quotes, then refits (warm start)."""
+        asof = asof or datetime.now()
+        previous = self._slices.get(self._expiry_key(dte, expiry, asof))
+        spot = spot or (previous["spot"] if previous else self.spot)
+        if previous is None:
+            return self.update_slice(dte, strikes, ivs, spot, expiry, asof)
+        new_strikes, new_ivs = self._clean(strikes, ivs)
+        merged = dict(zip(previous["strikes"].tolist(), previous["ivs"].tolist()))
+        merged.update(zip(new_strikes.tolist(), new_ivs.tolist()))
+        return self.update_slice(dte, list(merged), list(merged.values()), spot, expiry, asof)
+
+    def update_from_chain(self, chain_df, spot: float, dte: float, expiry=None,
+                          asof: datetime = None) -> Optional[Dict[str, Any]]:
+        """
+        Fits the expiry of a chain snapshot with 'ce_iv'/'pe_iv' columns (percent).
+        Uses the out-of-the-money side per strike (puts below the forward, calls above),
+        falling back to the other side where that IV is missing.
+        """
+        if chain_df is None or chain_df.empty or "ce_iv" not in chain_df or "pe_iv" not in chain_df:
+            return None
+        strikes = chain_df["strike"].to_numpy(dtype=float)
+        ce = chain_df["ce_iv"].to_numpy(dtype=float)
+        pe = chain_df["pe_iv"].to_numpy(dtype=float)
+        forward = spot * np.exp(self.r * float(dte) / 365.0)
+        otm, itm = np.where(strikes < forward, pe, ce), np.where(strikes < forward, ce, pe)
+        ivs = np.where(np.isfinite(otm) & (otm > 0), otm, itm)
+        return self.update_slice(dte, strikes, ivs, spot, expiry, asof)
+
+    # --- evaluation ---
+
+    @staticmethod
+    def _slice_variance(s: Dict[str, Any], k: np.ndarray) -> np.ndarray:
+        if s["method"] == "svi":
+            return np.maximum(svi_variance(s["params"], k), 1e-12)
+        if s["spline"] is None:
+            return np.full(k.shape, (s["ivs"][0] / 100.0) ** 2)
+        # Flat extrapolation outside the quoted strikes
+        return np.maximum(s["spline"](np.clip(k, s["k"][0], s["k"][-1])), 1e-12)
+
+    def iv(self, strikes, dte, spot: float = None) -> np.ndarray:
+        """
+        Implied vol (percent) for any (strike, DTE) grid; strikes and dte broadcast.
+        """
+        with self._lock:
+            slices = sorted(self._slices.values(), key=lambda s: s["T"])
+            spot = spot or self.spot
+        if not slices:
+            raise ValueError(f"Vol surface for {self.symbol} has no fitted expiries")
+        K, days = np.broadcast_arrays(np.asarray(strikes, dtype=float), np.asarray(dte, dtype=float))
+        T = np.maximum(days, 1e-3) / 365.0
+        k = np.log(K / (spot * np.exp(self.r * T)))
+
+        Ts = np.array([s["T"] for s in slices])
+        w = np.stack([s["T"] * self._slice_variance(s, k) for s in slices])
+        w = np.maximum.accumulate(w, axis=0)  # total variance non-decreasing in T
+
+        j = np.clip(np.searchsorted(Ts, T), 1, len(Ts) - 1) if len(Ts) > 1 else np.zeros(T.shape, dtype=int)
+        if len(Ts) == 1:
+            total = w[0] * T / Ts[0]
+        else:
+            w_lo = np.take_along_axis(w, (j - 1)[None], axis=0)[0]
+            w_hi = np.take_along_axis(w, j[None], axis=0)[0]
+            t_lo, t_hi = Ts[j - 1], Ts[j]
+            between = w_lo + (w_hi - w_lo) * (T - t_lo) / (t_hi - t_lo)
+            total = np.where(T < Ts[0], w[0] * T / Ts[0],
+                             np.where(T > Ts[-1], w[-1] * T / Ts[-1], between))
+        return np.sqrt(total / T) * 100.0
+
+    def atm_iv(self, dte: float, spot: float = None) -> float:
+        spot = spot or self.spot
+        return float(self.iv(spot * np.exp(self.r * dte / 365.0), dte, spot))
+
+    def strangle_strikes(self, spot: float, days: float, sigma_mult: float = 1.0, base: int = 50,
+                         iterations: int = 4) -> Dict[str, Any]:
+        """
+        Skew-aware get_strangle_strikes: each side's sigma range uses the surface
+        vol at that side's strike (fixed-point iteration from the ATM vol).
+        """
+        atm = self.atm_iv(days, spot)
+        call_iv = put_iv = atm
+        for _ in range(iterations):
+            upper = spot + calculate_range(spot, call_iv, days) * sigma_mult
+            lower = spot - calculate_range(spot, put_iv, days) * sigma_mult
+            call_iv, put_iv = (float(v) for v in self.iv([upper, lower], days, spot))
+        return {
+            "range_points": round(float(calculate_range(spot, atm, days)), 2),
+            "sigma_mult": sigma_mult,
+            "upper_bound_raw": round(float(upper), 2),
+            "lower_bound_raw": round(float(lower), 2),
+            "sell_call_strike": round_to_nearest(upper, base),
+            "sell_put_strike": round_to_nearest(lower, base),
+            "atm_iv": round(atm, 2),
+            "call_iv": round(call_iv, 2),
+            "put_iv": round(put_iv, 2),
+        }
+
+    def slices(self) -> Dict[date, Dict[str, Any]]:
+        """Per-expiry fit summary: dte, method, params, rmse (IV points), fit_ms, quotes."""
+        with self._lock:
+            return {d: {"dte": s["dte"], "method": s["method"], "params": s["params"], "rmse": s["rmse"],
+                        "fit_ms": s["fit_ms"], "quotes": len(s["strikes"])}
+                    for d, s in sorted(self._slices.items())}
+
+    def stats(self) -> Dict[str, int]:
+        return {"expiries": len(self._slices), "fits": self.fits, "cache_hits": self.cache_hits,
+                "evictions": self.evictions}
+
+# Process-wide surfaces, one per underlying
+vol_surfaces = {}
+
+def get_vol_surface(symbol="NIFTY"):
+    """Returns the shared VolSurface for an underlying, creating it on first use."""
+    if symbol not in vol_surfaces:
+        vol_surfaces[symbol] = VolSurface(symbol)
+    return vol_surfaces[symbol]
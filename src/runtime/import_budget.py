@@ -0,0 +1,103 @@
+"""
+Cold-start import budget for the CLI / dashboard entry points.
+
+    python -m src.runtime.import_budget [--module main_graph] [--budget-ms 500] [--runs 5]
+
+Imports the module in fresh interpreters under `python -X importtime`, takes the
+median cumulative import time, prints the slowest imports, and exits non-zero
+if the median exceeds the budget or if any deferred heavy dependency was
+imported at startup.
+"""
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", 500))
+
+# Must only load on first use (models, clients, graph), never at import
+DEFERRED_MODULES = (
+    "langgraph",
+    "langchain_core",
+    "langchain_community",
+    "langchain_chroma",
+    "chromadb",
+    "sentence_transformers",
+    "torch",
+    "transformers",
+    "openai",
+    "kiteconnect",
+    "yfinance",
+    "scipy.stats",
+    "pandas",
+    "pyarrow",
+)
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """Runs one cold import; returns (cumulative ms of `module`, {name: (self_us, cumulative_us)})."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    entries = {}
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            entries[name] = (int(self_us), int(cumulative_us))
+    if module not in entries:
+        raise RuntimeError(f"no importtime entry for {module}")
+    return entries[module][1] / 1000.0, entries
+
+def deferred_violations(entries: Dict[str, Tuple[int, int]]) -> List[str]:
+    """Deferred packages (from DEFERRED_MODULES) that were imported anyway."""
+    found = set()
+    for name in entries:
+        for mod in DEFERRED_MODULES:
+            if name == mod or name.startswith(mod + "."):
+                found.add(mod)
+    return sorted(found)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main_graph")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    samples, entries = [], {}
+    for _ in range(max(1, args.runs)):
+        total_ms, entries = measure(args.module)
+        samples.append(total_ms)
+    median_ms = statistics.median(samples)
+
+    print(f"import {args.module}: median {median_ms:.1f} ms over {len(samples)} runs "
+          f"(min {min(samples):.1f}, max {max(samples):.1f}), budget {args.budget_ms:.0f} ms")
+    print("Slowest imports (cumulative, last run):")
+    for name, (self_us, cumulative_us) in sorted(entries.items(), key=lambda e: -e[1][1])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    violations = deferred_violations(entries)
+    if violations:
+        failed = True
+        print(f"❌ Deferred modules imported at startup: {', '.join(violations)}")
+    if median_ms > args.budget_ms:
+        failed = True
+        print(f"❌ Cold import {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    if not failed:
+        print("✅ Within import budget")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import threading
+from typing import Any, Callable
+
+class LazyProvider:
+    """
+    Deferred singleton: factory() runs once, on first use, instead of at import.
+    Attribute access and truthiness are forwarded to the created object, so a
+    LazyProvider can stand in for a module-level client instance
+    (`client.method()`, `if client:`). A factory may return None (e.g. when an
+    API key is missing); the provider is then falsy.
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: str = None):
+        self._factory = factory
+        self._name = name or getattr(factory, "__name__", "provider")
+        self._lock = threading.Lock()
+        self._instance = None
+        self._initialized = False
+
+    def get(self) -> Any:
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    self._instance = self._factory()
+                    self._initialized = True
+        return self._instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._initialized
+
+    def reset(self):
+        """Drops the instance; the next use calls the factory again."""
+        with self._lock:
+            self._instance = None
+            self._initialized = False
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__") or name in ("_factory", "_name", "_lock", "_instance", "_initialized"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __bool__(self) -> bool:
+        return bool(self.get())
+
+    def __repr__(self) -> str:
+        state = repr(self._instance) if self._initialized else "not initialized"
+        return f"<LazyProvider {self._name}: {state}>"
@@ -0,0 +1,105 @@
+"""
+Record/replay check for the streamed LLM agents (strategist, risk manager).
+
+    python -m src.runtime.replay_check [--chunk-delay 0.01]
+
+Runs both agents against a local StubLLMServer with LLM_CACHE_MODE=record and
+early exit on (decision fields arrive before the rest of the answer), then
+stops the server and runs them again with LLM_CACHE_MODE=replay. Uses a
+throwaway cache file. Exits non-zero if a replayed decision is missing or
+differs from the recorded one.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+STRATEGY_REPLY = json.dumps({
+    "strategy": "Short Strangle",
+    "recommended_sigma": 1.5,
+    "rationale": "IV is moderate and the market is range bound. " * 20,
+    "constraints": "Exit if either leg doubles.",
+})
+RISK_REPLY = json.dumps({
+    "decision": "approved",
+    "reason": "Greeks and worst scenario loss are within limits. " * 20,
+})
+
+MARKET_DATA = {"symbol": "NIFTY", "spot_price": 22000.0, "iv": 14.0, "days_to_expiry": 7}
+RULES = {"strangle": "Sell 1-2 sigma strangles.", "straddle": "Sell ATM straddles in low IV.", "news": "Quiet session."}
+ORDER = {
+    "strategy": "Short Strangle",
+    "legs": [
+        {"type": "CE", "strike": 22550, "quantity": 50, "action": "SELL"},
+        {"type": "PE", "strike": 21450, "quantity": 50, "action": "SELL"},
+    ],
+}
+
+def _reply(request) -> str:
+    system = request["messages"][0]["content"]
+    return RISK_REPLY if "Risk Manager" in system else STRATEGY_REPLY
+
+def run_agents() -> dict:
+    from src.agents.strategist import analyze_strategy
+    from src.agents.risk_manager import validate_order
+    decision = analyze_strategy({"market_data": MARKET_DATA, "strategy_rules": RULES})["strategy_decision"]
+    risk = validate_order({"market_data": MARKET_DATA, "final_order": ORDER, "research_data": "Neutral"})
+    return {
+        "strategy": decision["strategy"],
+        "recommended_sigma": decision["recommended_sigma"],
+        "strategist_response": decision["llm_analysis"],
+        "risk_status": risk["risk_status"],
+        "risk_response": risk["risk_analysis"],
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="seconds between streamed chunks")
+    args = parser.parse_args(argv)
+
+    from src.integration.llm_stub_server import StubLLMServer
+    server = StubLLMServer(reply=_reply, chunk_chars=16, chunk_delay=args.chunk_delay).start()
+    # Both providers point at the stub; set before the lazy clients are first used
+    os.environ.update({
+        "OPENAI_API_KEY": "stub", "GROQ_API_KEY": "stub",
+        "OPENAI_BASE_URL": server.base_url, "GROQ_BASE_URL": server.base_url,
+        "LLM_CACHE_MODE": "record",
+    })
+    from src.integration import llm_cache, llm_client
+    if not llm_client.EARLY_EXIT:
+        print("⚠️ LLM_EARLY_EXIT=0: the check runs, but does not cover early-exited streams")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        llm_cache.llm_cache = llm_cache.LLMResponseCache(path=os.path.join(tmp, "llm_cache.sqlite"))
+        try:
+            recorded = run_agents()
+            stored = llm_client.wait_for_pending_stores(timeout=30)
+        finally:
+            server.stop()
+        requests = server.requests
+
+        os.environ["LLM_CACHE_MODE"] = "replay"
+        replayed = run_agents()
+        entries = llm_cache.llm_cache.stats()["entries"]
+
+    print(f"Recorded {requests} LLM requests, {entries} cache entries")
+    failed = False
+    if not stored:
+        failed = True
+        print("❌ Background stream reads did not finish in time")
+    for agent, key in (("strategist", "strategist_response"), ("risk manager", "risk_response")):
+        if "cache miss" in replayed[key]:
+            failed = True
+            print(f"❌ {agent} missed the cache on replay: {replayed[key]}")
+    for key in ("strategy", "recommended_sigma", "risk_status"):
+        if recorded[key] != replayed[key]:
+            failed = True
+            print(f"❌ {key}: recorded {recorded[key]!r}, replayed {replayed[key]!r}")
+    if not failed:
+        print(f"✅ Replay matches: strategy={replayed['strategy']}, sigma={replayed['recommended_sigma']}, "
+              f"risk={replayed['risk_status']}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
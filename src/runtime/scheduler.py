@@ -0,0 +1,206 @@
+import heapq
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class MonotonicClock:
+    """Wall clock for live runs."""
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(max(0.0, seconds))
+
+class SimulatedClock:
+    """
+    Virtual clock for offline runs and tests. Time only moves when advance()
+    is awaited; sleepers wake in deadline order, each seeing now() equal to
+    its own deadline, so cadence/latency math is exact and instant.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+        self._sleepers = []  # heap of (deadline, seq, future)
+        self._seq = 0
+
+    def now(self) -> float:
+        return self._now
+
+    async def sleep(self, seconds: float):
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._sleepers, (self._now + max(0.0, seconds), self._seq, future))
+        await future
+
+    @staticmethod
+    async def _settle(rounds: int = 20):
+        # Let every runnable task reach its next await before time moves
+        for _ in range(rounds):
+            await asyncio.sleep(0)
+
+    async def advance(self, seconds: float):
+        """Moves time forward by `seconds`, waking sleepers in order."""
+        target = self._now + seconds
+        await self._settle()
+        while self._sleepers and self._sleepers[0][0] <= target:
+            deadline, _, future = heapq.heappop(self._sleepers)
+            if future.done():  # cancelled sleeper
+                continue
+            self._now = deadline
+            future.set_result(None)
+            await self._settle()
+        self._now = target
+        await self._settle()
+
+class CycleScheduler:
+    """
+    Runs `run_cycle()` (a coroutine function) on a fixed cadence and on demand.
+    - Cadence: cycles are due at start + k * interval_sec. A due time that
+      arrives while a cycle is still running is skipped (never queued), and
+      the schedule stays anchored so it does not drift.
+    - Events: trigger(reason) starts a cycle immediately if none is running,
+      otherwise it is skipped as well.
+    Per-cycle records (scheduled/start/end times, latency, start lag) and
+    aggregate metrics (latency percentiles, jitter, skipped count, backlog)
+    are available from metrics(). `clock` may be a SimulatedClock for tests.
+    """
+
+    def __init__(self, run_cycle: Callable[[], Awaitable[Any]], interval_sec: float = 60.0,
+                 clock=None, max_cycles: Optional[int] = None, history: int = 500):
+        self.run_cycle = run_cycle
+        self.interval_sec = interval_sec
+        self.clock = clock or MonotonicClock()
+        self.max_cycles = max_cycles
+        self.records = deque(maxlen=history)
+        self.cycles = 0
+        self.failures = 0
+        self.skipped = 0
+        self.backlog = 0           # triggers skipped while the current cycle runs
+        self.max_backlog = 0
+        self._current = None       # running cycle task
+        self._stopped = False
+        self._trigger = asyncio.Event()
+        self._trigger_reason = None
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None and not self._current.done()
+
+    def trigger(self, reason: str = "event"):
+        """Requests an immediate cycle (e.g. on a market event)."""
+        self._trigger_reason = reason
+        self._trigger.set()
+
+    def stop(self):
+        self._stopped = True
+        self._trigger.set()
+
+    def _start(self, scheduled_at: float, reason: str) -> bool:
+        if self.busy:
+            self.skipped += 1
+            self.backlog += 1
+            self.max_backlog = max(self.max_backlog, self.backlog)
+            logger.warning("Skipping %s cycle: previous cycle still running (backlog %d)", reason, self.backlog)
+            return False
+        self.cycles += 1
+        self._current = asyncio.ensure_future(self._run(scheduled_at, reason, self.cycles))
+        return True
+
+    async def _run(self, scheduled_at: float, reason: str, cycle_no: int):
+        started_at = self.clock.now()
+        record = {
+            "cycle": cycle_no,
+            "reason": reason,
+            "scheduled_at": scheduled_at,
+            "started_at": started_at,
+            "start_lag_ms": round((started_at - scheduled_at) * 1000, 3),
+            "error": None,
+        }
+        try:
+            await self.run_cycle()
+        except Exception as e:
+            self.failures += 1
+            record["error"] = f"{type(e).__name__}: {e}"
+            logger.exception("Cycle %d failed", cycle_no)
+        finished_at = self.clock.now()
+        record["finished_at"] = finished_at
+        record["latency_ms"] = round((finished_at - started_at) * 1000, 3)
+        record["skipped_during"] = self.backlog
+        self.records.append(record)
+        self.backlog = 0
+
+    async def _wait_until(self, deadline: float) -> Optional[str]:
+        """Sleeps until deadline; returns the trigger reason if woken early by trigger()."""
+        if self._trigger.is_set():
+            self._trigger.clear()
+            return self._trigger_reason or "event"
+        sleeper = asyncio.ensure_future(self.clock.sleep(deadline - self.clock.now()))
+        waiter = asyncio.ensure_future(self._trigger.wait())
+        done, pending = await asyncio.wait({sleeper, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if waiter in done:
+            self._trigger.clear()
+            return self._trigger_reason or "event"
+        return None
+
+    async def run(self):
+        """Scheduler loop; returns after stop() or max_cycles started cycles have finished."""
+        next_due = self.clock.now()
+        while not self._stopped:
+            if self.max_cycles is not None and self.cycles >= self.max_cycles:
+                break
+            reason = await self._wait_until(next_due)
+            if self._stopped:
+                break
+            now = self.clock.now()
+            if reason:
+                self._start(now, reason)
+                continue
+            self._start(next_due, "cadence")
+            # Anchor to the original grid; due times already passed are skipped
+            next_due += self.interval_sec
+            while next_due <= now:
+                next_due += self.interval_sec
+                self.skipped += 1
+        if self._current is not None:
+            await self._current
+
+    @staticmethod
+    def _percentile(values: List[float], q: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[idx]
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        latency_*: cycle run time. start_lag_*: delay from due time to start.
+        jitter_ms: std-dev of the start lag of cadence cycles.
+        backlog: triggers skipped since the running cycle started.
+        """
+        latencies = [r["latency_ms"] for r in self.records]
+        lags = [r["start_lag_ms"] for r in self.records]
+        cadence_lags = [r["start_lag_ms"] for r in self.records if r["reason"] == "cadence"]
+        return {
+            "cycles": self.cycles,
+            "completed": len(self.records),
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "backlog": self.backlog,
+            "max_backlog": self.max_backlog,
+            "busy": self.busy,
+            "latency_p50_ms": self._percentile(latencies, 0.5),
+            "latency_p95_ms": self._percentile(latencies, 0.95),
+            "latency_max_ms": max(latencies) if latencies else None,
+            "start_lag_mean_ms": round(statistics.fmean(lags), 3) if lags else None,
+            "start_lag_max_ms": max(lags) if lags else None,
+            "jitter_ms": round(statistics.pstdev(cadence_lags), 3) if len(cadence_lags) > 1 else None,
+        }
@@ -5,6 +5,7 @@ import numpy as np
 import sys
 import os
 import json
+import asyncio
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,24 +13,41 @@ load_dotenv()
 # Add project root to path
 sys.path.append(os.getcwd())
 
-from main_graph import app
-from src.quant_engine.greeks import calculate_greeks
+from main_graph import run_pipeline
+from src.quant_engine.greeks import calculate_greeks_batch
+from src.quant_engine.monte_carlo import simulate_order
 from src.integration.kite_app import kite_client
-from src.integration.yfinance_client import fetch_nifty_spot, fetch_india_vix
+from src.integration.llm_client import wait_for_pending_stores
+from src.integration.market_snapshot import market_snapshot
 
 st.set_page_config(page_title="Agentic RAG Trader", layout="wide")
 
 st.title("🤖 Hybrid Agentic RAG Trading System")
 
-# Fetch initial spot & VIX for defaults
-default_spot = fetch_nifty_spot()
+# Initial spot & VIX defaults from the shared market snapshot (one batched fetch)
+snapshot = market_snapshot.get()
+default_spot = snapshot["NIFTY"]
 if not default_spot: default_spot = 22000.0
 
-default_iv = fetch_india_vix()
+default_iv = snapshot["INDIA_VIX"]
 if not default_iv: default_iv = 15.0
 
+# Tick stream into the chain book (started once per server process); the scanner
+# reads it while fresh. TICK_FEED: kite (default), replay (synthetic demo ticks) or none.
+@st.cache_resource
+def start_tick_stream(feed):
+    from src.integration.kite_ticker import ensure_chain_stream
+    return ensure_chain_stream("NIFTY", feed, default_spot, default_iv)
+
+tick_feed = os.environ.get("TICK_FEED", "kite")
+tick_stream = start_tick_stream(tick_feed) if tick_feed != "none" else None
+
 # Sidebar Controls
 st.sidebar.header("Simulation Controls")
+if tick_stream is None:
+    st.sidebar.caption("📡 Tick feed: off (polling)")
+else:
+    st.sidebar.caption(f"📡 Tick feed: {tick_feed} ({tick_stream.book.tick_count} ticks)")
 mock_spot = st.sidebar.number_input("Spot Price", value=float(default_spot))
 mock_iv = st.sidebar.number_input("IV (%)", value=float(default_iv))
 mock_days = st.sidebar.slider("Days to Expiry", 1, 30, 5)
@@ -63,7 +81,9 @@ if st.sidebar.button("Run Agent Simulation"):
         }
         
         # Run Graph
-        result = app.invoke(initial_state)
+        result = asyncio.run(run_pipeline(initial_state))
+        # The strategist returns once its decision fields stream in; let the rationale finish
+        wait_for_pending_stores(timeout=30)
         
         # Store result in session state to persist across reruns
         st.session_state['result'] = result
@@ -80,6 +100,10 @@ if 'result' in st.session_state:
     col3.metric("Strategy", result['strategy_decision']['strategy'])
     col4.metric("Risk Status", result.get('risk_status', 'N/A'))
 
+    if result.get('node_timings'):
+        with st.expander("Pipeline Timings (ms)"):
+            st.json(result['node_timings'])
+
     # Tabs
     tab1, tab2, tab3 = st.tabs(["Agent Reasoning", "Execution Plan", "Payoff Diagram"])
     
@@ -110,27 +134,52 @@ if 'result' in st.session_state:
              cols = st.columns(len(legs))
              greeks_data = []
              
+             # Calculate Greeks for all legs in one vectorized pass
+             # Retrieve Spot/IV/Time from market_data (or inputs if inputs changed)
+             # ideally usage consistent with the run input
+             m_data = result.get("market_data", {})
+             # Per-leg surface vols from the executor when available, else the scalar IV
+             analysis = order.get("analysis", {})
+             leg_ivs = [analysis.get("call_iv" if leg['type'] == "CE" else "put_iv", m_data['iv'])
+                        for leg in legs]
+             leg_greeks = calculate_greeks_batch(
+                 m_data['spot_price'],
+                 [leg['strike'] for leg in legs],
+                 m_data['days_to_expiry'],
+                 leg_ivs,
+                 [leg['type'] for leg in legs]
+             )
+             
              for i, leg in enumerate(legs):
                  with cols[i]:
                      st.write(f"**{leg['type']}**")
                      st.write(f"Strike: {leg['strike']}")
                      
-                     # Calculate Greeks
-                     # Retrieve Spot/IV/Time from market_data (or inputs if inputs changed)
-                     # ideally usage consistent with the run input
-                     m_data = result.get("market_data", {})
-                     g = calculate_greeks(
-                         m_data['spot_price'], 
-                         leg['strike'], 
-                         m_data['days_to_expiry'], 
-                         m_data['iv'], 
-                         leg['type']
-                     )
+                     g = {name: round(float(values[i]), 6 if name == "gamma" else 4)
+                          for name, values in leg_greeks.items()}
                      greeks_data.append(g)
                      
                      st.dataframe(g)
 
              st.success(f"Risk Status: {result.get('risk_status')}")
+             if result.get("risk_metrics"):
+                 with st.expander("Portfolio Risk (Greeks & Scenario Grid)"):
+                     st.caption(result.get("risk_analysis") or "")
+                     st.json(result["risk_metrics"])
+             if st.checkbox("Monte Carlo tail risk (1M paths to expiry)"):
+                 mc_model = st.radio("Model", ["gbm", "jump"], horizontal=True)
+                 try:
+                     mc = simulate_order(order, m_data, model=mc_model, seed=42,
+                                         open_positions=result.get("open_positions") or [])
+                 except ValueError as e:
+                     st.warning(f"Monte Carlo skipped: {e}")
+                 else:
+                     mc_cols = st.columns(4)
+                     mc_cols[0].metric("Prob. of Profit", f"{mc['pop']:.1%}")
+                     mc_cols[1].metric("VaR 99%", f"{mc['var']['99']:,.0f}")
+                     mc_cols[2].metric("CVaR 99%", f"{mc['cvar']['99']:,.0f}")
+                     mc_cols[3].metric("Max Loss", f"{mc['max_loss']:,.0f}")
+                     st.caption(f"{mc['paths']:,} paths, vol {mc['vol']}% ({mc['vol_source']}), {mc['elapsed_ms']:.0f} ms")
              
              # Manual Execution Button
              # Manual Execution Button
@@ -173,7 +222,8 @@ if 'result' in st.session_state:
             spot_range = np.linspace(mock_spot * 0.9, mock_spot * 1.1, 100)
             pnl = np.zeros_like(spot_range)
             
-            for leg in legs:
+            # Close legs unwind existing positions; the payoff is of the new position
+            for leg in (l for l in legs if not l.get("close")):
                 strike = leg['strike']
                 premium = 100 # Mock premium for visualization
                 if leg['type'] == 'CE':